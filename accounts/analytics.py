@@ -0,0 +1,167 @@
+"""
+Totais de receitas, despesas e quantidade de transações agrupados por
+categoria, conta, tipo ou período (dia, semana ou mês).
+
+Cada agrupamento é uma única consulta ``GROUP BY`` no banco. Quando o
+intervalo cobre meses inteiros e o agrupamento cabe nos consolidados
+mensais (categoria, conta ou mês), a consulta lê ``MonthlyRollup`` em
+vez das transações. O resultado é colunar: uma lista por campo, na mesma
+ordem, em vez de uma lista de objetos.
+"""
+from datetime import datetime, timedelta
+
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek
+
+from .models import BankTransaction, MonthlyRollup
+from . import periods
+from .periods import current_month, default_start, month_range
+
+DIMENSIONS = ('category_group', 'bank_account', 'transaction_type', 'day', 'week', 'month')
+DEFAULT_DIMENSIONS = ('category_group', 'month')
+PERIOD_DIMENSIONS = ('day', 'week', 'month')
+# Agrupamentos que os consolidados mensais respondem sozinhos
+ROLLUP_DIMENSIONS = ('category_group', 'bank_account', 'month')
+
+# Intervalo máximo aceito, em dias (cerca de 10 anos)
+MAX_ANALYTICS_DAYS = 3660
+
+TRUNCATE = {'day': TruncDay, 'week': TruncWeek, 'month': TruncMonth}
+
+# Campo de nome incluído no agrupamento, para os rótulos
+LABELS = {
+    'category_group': 'category_group__name',
+    'bank_account': 'bank_account__name',
+}
+
+
+class AnalyticsError(ValueError):
+    """Parâmetros inválidos da consulta"""
+
+
+def parse_date(value, end=False):
+    """Aceita 'YYYY-MM-DD' ou 'YYYY-MM' (primeiro ou último dia do mês)"""
+    try:
+        return periods.parse_date(value, end)
+    except ValueError:
+        raise AnalyticsError("Data inválida. Use YYYY-MM-DD ou YYYY-MM")
+
+
+def analytics_period(start=None, end=None):
+    """Intervalo da consulta; o padrão são os últimos 12 meses, incluindo o atual"""
+    end_date = parse_date(end, end=True) if end else month_range(current_month())[1]
+    start_date = parse_date(start) if start else default_start(end_date)
+    if start_date > end_date:
+        raise AnalyticsError("A data inicial deve ser anterior à final")
+    if (end_date - start_date).days > MAX_ANALYTICS_DAYS:
+        raise AnalyticsError(f"O intervalo deve ter no máximo {MAX_ANALYTICS_DAYS} dias")
+    return start_date, end_date
+
+
+def parse_dimensions(value):
+    dimensions = tuple(item.strip() for item in value.split(',') if item.strip()) if value else DEFAULT_DIMENSIONS
+    invalid = [dimension for dimension in dimensions if dimension not in DIMENSIONS]
+    if invalid or not dimensions:
+        raise AnalyticsError(f"Agrupamento inválido. Use: {', '.join(DIMENSIONS)}")
+    return dimensions
+
+
+def _covers_whole_months(start_date, end_date):
+    return start_date.day == 1 and end_date == month_range(end_date.strftime('%Y-%m'))[1]
+
+
+def _source(user, start_date, end_date, dimension, filters):
+    """(queryset, campo de data, expressões de receita, despesa e quantidade)"""
+    use_rollups = (
+        dimension in ROLLUP_DIMENSIONS
+        and 'transaction_type' not in filters
+        and _covers_whole_months(start_date, end_date)
+    )
+    if use_rollups:
+        queryset = MonthlyRollup.objects.filter(user=user, month__range=[start_date, end_date], **filters)
+        return queryset, 'month', {
+            'income': Sum('total_income', default=0),
+            'expense': Sum('total_expense', default=0),
+            'count': Sum('transaction_count', default=0),
+        }
+
+    queryset = BankTransaction.objects.filter(user=user, transaction_date__range=[start_date, end_date], **filters)
+    return queryset, 'transaction_date', {
+        'income': Sum('amount', filter=Q(transaction_type='income'), default=0),
+        'expense': Sum('amount', filter=Q(transaction_type='expense'), default=0),
+        'count': Count('id'),
+    }
+
+
+def _group(dimension, date_field):
+    """(expressão da chave, campos de rótulo) do agrupamento"""
+    if dimension in LABELS:
+        return F(f'{dimension}_id'), (LABELS[dimension],)
+    if dimension == 'transaction_type':
+        return F('transaction_type'), ()
+    if date_field == 'month':
+        # Os consolidados já são mensais
+        return F('month'), ()
+    return TRUNCATE[dimension](date_field), ()
+
+
+def _as_date(value):
+    return value.date() if isinstance(value, datetime) else value
+
+
+def _period_keys(dimension, start_date, end_date):
+    """Todos os períodos do intervalo, para preencher os que não têm transações"""
+    if dimension == 'day':
+        current, step = start_date, timedelta(days=1)
+    elif dimension == 'week':
+        current, step = start_date - timedelta(days=start_date.weekday()), timedelta(days=7)
+    else:
+        current, step = start_date.replace(day=1), None
+    keys = []
+    while current <= end_date:
+        keys.append(current)
+        current = current + step if step else (current + timedelta(days=32)).replace(day=1)
+    return keys
+
+
+def breakdown(user, start_date, end_date, dimension, filters=None):
+    """Totais de um agrupamento em colunas: keys, [labels,] income, expense, count"""
+    filters = filters or {}
+    queryset, date_field, totals = _source(user, start_date, end_date, dimension, filters)
+    key, labels = _group(dimension, date_field)
+
+    rows = list(
+        queryset.order_by()
+        .annotate(key=key)
+        .values('key', *labels)
+        .annotate(**totals)
+        .order_by('key')
+        .values_list('key', *labels, 'income', 'expense', 'count')
+    )
+
+    if dimension in PERIOD_DIMENSIONS:
+        # Séries contínuas: períodos sem transações entram zerados
+        by_key = {_as_date(row[0]): row[1:] for row in rows}
+        keys = _period_keys(dimension, start_date, end_date)
+        rows = [(period.isoformat(), *by_key.get(period, (0, 0, 0))) for period in keys]
+
+    columns = {'keys': [row[0] for row in rows]}
+    if labels:
+        columns['labels'] = [row[1] for row in rows]
+    offset = 1 + len(labels)
+    columns['income'] = [row[offset] for row in rows]
+    columns['expense'] = [row[offset + 1] for row in rows]
+    columns['count'] = [row[offset + 2] for row in rows]
+    return columns
+
+
+def analytics(user, start_date, end_date, dimensions, filters=None):
+    """Um agrupamento colunar por dimensão pedida, todos sobre o mesmo intervalo"""
+    return {
+        'start': start_date.isoformat(),
+        'end': end_date.isoformat(),
+        'breakdowns': {
+            dimension: breakdown(user, start_date, end_date, dimension, filters)
+            for dimension in dimensions
+        },
+    }
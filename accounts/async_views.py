@@ -0,0 +1,149 @@
+"""
+Variantes assíncronas das leituras mais frequentes da API, para o modo ASGI.
+
+Substituem as views de ``views.py`` nas mesmas URLs quando
+``ACCOUNTS_ASYNC_VIEWS`` está ligado (ver ``urls.py``). As leituras usam o
+ORM assíncrono e as consultas independentes são disparadas juntas com
+``asyncio.gather``; as escritas reaproveitam as funções síncronas de
+``views.py`` via ``sync_to_async``.
+"""
+import asyncio
+
+from adrf.decorators import api_view
+from asgiref.sync import sync_to_async
+from rest_framework import status
+from rest_framework.decorators import permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from . import cache
+from .cache import cached_response
+from .conditional import (
+    conditional_get, bank_accounts_etag, transactions_etag, financial_summary_etag, dashboard_etag
+)
+from .exports import astream_export, export_response
+from .pagination import TransactionCursorPagination
+from .periods import current_month, month_range, transactions_period
+from .profiling import timed
+from .serializers import (
+    BankAccountSerializer, CategoryGroupSerializer, serialize_transaction_rows, transaction_list_rows,
+    transaction_row_cursor,
+)
+from .views import (
+    _bank_accounts_queryset, _category_groups_queryset, _create_bank_account, _create_transaction,
+    _dashboard_data, _export_queryset, _monthly_rollups, _summary_data, _summary_totals, _transactions_queryset,
+)
+
+
+async def _bank_accounts_data(request):
+    accounts = [account async for account in _bank_accounts_queryset(request.user)]
+    with timed('serialize'):
+        return BankAccountSerializer(accounts, many=True, context={'request': request}).data
+
+
+async def _category_groups_data(request):
+    groups = [group async for group in _category_groups_queryset(request.user)]
+    with timed('serialize'):
+        return CategoryGroupSerializer(groups, many=True, context={'request': request}).data
+
+
+async def _transactions_page(request, start_date, end_date):
+    rows = transaction_list_rows(_transactions_queryset(request.user, start_date, end_date))
+    paginator = TransactionCursorPagination(cursor_key=transaction_row_cursor)
+    page = await paginator.apaginate_queryset(rows, request)
+    return paginator, serialize_transaction_rows(page)
+
+
+async def _monthly_summary_data(user, month_year):
+    totals = await _monthly_rollups(user, month_year).aaggregate(**_summary_totals())
+    return _summary_data(month_year, totals)
+
+
+@api_view(['GET', 'POST'])
+@permission_classes([IsAuthenticated])
+@conditional_get(bank_accounts_etag, cache.BANK_ACCOUNTS)
+@cached_response(cache.BANK_ACCOUNTS)
+async def bank_accounts_view(request):
+    """Listar e criar contas bancárias do usuário"""
+    if request.method == 'GET':
+        return Response(await _bank_accounts_data(request))
+
+    elif request.method == 'POST':
+        return await sync_to_async(_create_bank_account)(request)
+
+
+@api_view(['GET', 'POST'])
+@permission_classes([IsAuthenticated])
+@conditional_get(transactions_etag, cache.TRANSACTIONS)
+@cached_response(cache.TRANSACTIONS)
+async def transactions_view(request):
+    """Listar e criar transações do usuário"""
+    if request.method == 'GET':
+        try:
+            start_date, end_date = transactions_period(request.GET.get('month_year'))
+        except ValueError:
+            return Response(
+                {"error": "Formato de mês inválido. Use YYYY-MM"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        paginator, data = await _transactions_page(request, start_date, end_date)
+        return paginator.get_paginated_response(data)
+
+    elif request.method == 'POST':
+        return await sync_to_async(_create_transaction)(request)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+async def export_transactions(request, export_format):
+    """Exportar o histórico de transações; o laço de eventos atende outras requisições entre os blocos"""
+    queryset, error = _export_queryset(request, export_format)
+    if error:
+        return error
+    return export_response(astream_export(queryset, export_format), export_format)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@conditional_get(financial_summary_etag, cache.FINANCIAL_SUMMARY)
+@cached_response(cache.FINANCIAL_SUMMARY)
+async def financial_summary(request):
+    """Resumo financeiro do usuário por mês"""
+    month_year = request.GET.get('month_year') or current_month()
+
+    try:
+        return Response(await _monthly_summary_data(request.user, month_year))
+    except ValueError:
+        return Response(
+            {"error": "Formato de mês inválido. Use YYYY-MM"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@conditional_get(dashboard_etag, cache.DASHBOARD)
+@cached_response(cache.DASHBOARD)
+async def dashboard_view(request):
+    """Contas, categorias, primeira página de transações e resumo do mês"""
+    month_year = request.GET.get('month_year') or current_month()
+
+    try:
+        start_date, end_date = month_range(month_year)
+    except ValueError:
+        return Response(
+            {"error": "Formato de mês inválido. Use YYYY-MM"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    # As quatro leituras não dependem umas das outras
+    bank_accounts, category_groups, (paginator, transactions), summary = await asyncio.gather(
+        _bank_accounts_data(request),
+        _category_groups_data(request),
+        _transactions_page(request, start_date, end_date),
+        _monthly_summary_data(request.user, month_year),
+    )
+    return Response(_dashboard_data(
+        request, month_year, bank_accounts, category_groups, paginator, transactions, summary,
+    ))
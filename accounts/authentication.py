@@ -0,0 +1,30 @@
+"""
+Autenticação da API por token JWT (``Authorization: Bearer <token>``).
+"""
+from rest_framework import authentication, exceptions
+
+from .tokens import ACCESS, InvalidToken, decode_token, token_user
+
+
+class JWTAuthentication(authentication.BaseAuthentication):
+    """
+    Valida o token de acesso sem consultar o banco (ver ``tokens.py``).
+    Requisições sem cabeçalho Bearer seguem para as demais autenticações.
+    """
+    keyword = 'Bearer'
+
+    def authenticate(self, request):
+        auth = authentication.get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed('Cabeçalho de token inválido.')
+
+        try:
+            claims = decode_token(auth[1].decode(), ACCESS)
+        except (InvalidToken, UnicodeError):
+            raise exceptions.AuthenticationFailed('Token inválido ou expirado.')
+        return token_user(claims), claims
+
+    def authenticate_header(self, request):
+        return f'{self.keyword} realm="api"'
@@ -0,0 +1,167 @@
+"""
+Operações em lote sobre transações (criar, alterar e excluir).
+
+Todas as operações são validadas contra as contas e categorias do usuário,
+carregadas uma única vez, e aplicadas de forma atômica com ``bulk_create``,
+``bulk_update`` e um DELETE por lote. As transações alteradas e excluídas
+são lidas com ``SELECT ... FOR UPDATE`` na mesma transação do banco em que
+o lote é gravado. Se qualquer item for inválido nada é gravado e o
+resultado indica o erro de cada item.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from .ledger import LedgerBatch, delete_transactions, ledger_entry
+from .models import BankAccount, BankTransaction, CategoryGroup
+from .serializers import BankTransactionBatchItemSerializer, BankTransactionSerializer
+
+MAX_BATCH_OPERATIONS = 1000
+
+BATCH_OPERATIONS = ('create', 'update', 'delete')
+
+# Campos gravados pelo bulk_update das alterações
+UPDATE_FIELDS = (
+    'bank_account', 'category_group', 'transaction_type', 'amount',
+    'description', 'transaction_date', 'updated_at',
+)
+
+
+class BatchError(Exception):
+    """Lote malformado como um todo (e não um item específico)"""
+
+
+def _parse_operations(operations):
+    if not isinstance(operations, list) or not operations:
+        raise BatchError("Envie uma lista de operações em 'operations'.")
+    if len(operations) > MAX_BATCH_OPERATIONS:
+        raise BatchError(f"O lote aceita no máximo {MAX_BATCH_OPERATIONS} operações.")
+    for operation in operations:
+        if not isinstance(operation, dict) or operation.get('op') not in BATCH_OPERATIONS:
+            raise BatchError("Cada operação deve ter 'op' igual a create, update ou delete.")
+
+
+def _prepare(user, operations, targets, context):
+    """
+    Valida cada operação contra as transações-alvo já carregadas. Retorna os
+    resultados e as listas de criações, alterações e exclusões.
+    """
+    bank_accounts, category_groups = context['bank_accounts'], context['category_groups']
+    results = []
+    to_create, to_update, to_delete = [], [], []
+    seen_ids = set()
+    for index, operation in enumerate(operations):
+        op = operation['op']
+        result = {'index': index, 'op': op}
+        results.append(result)
+
+        instance = None
+        if op != 'create':
+            try:
+                transaction_id = int(operation.get('id'))
+            except (TypeError, ValueError):
+                transaction_id = None
+            instance = targets.get(transaction_id)
+            if instance is None:
+                result.update(status='error', errors={'id': ["Transação não encontrada"]})
+                continue
+            if transaction_id in seen_ids:
+                result.update(status='error', errors={'id': ["Transação repetida no lote"]})
+                continue
+            seen_ids.add(transaction_id)
+            result['id'] = transaction_id
+
+        if op == 'delete':
+            result['status'] = 'ok'
+            to_delete.append(instance)
+            continue
+
+        serializer = BankTransactionBatchItemSerializer(
+            instance, data=operation.get('data') or {}, partial=op == 'update', context=context
+        )
+        if not serializer.is_valid():
+            result.update(status='error', errors=serializer.errors)
+            continue
+
+        data = dict(serializer.validated_data)
+        if 'bank_account' in data:
+            data['bank_account'] = bank_accounts[data['bank_account']]
+        if 'category_group' in data:
+            data['category_group'] = category_groups[data['category_group']]
+
+        result['status'] = 'ok'
+        if op == 'create':
+            to_create.append((result, BankTransaction(user=user, **data)))
+        else:
+            previous = ledger_entry(instance)
+            for field, value in data.items():
+                setattr(instance, field, value)
+            to_update.append((result, previous, instance))
+    return results, to_create, to_update, to_delete
+
+
+def apply_batch(user, operations):
+    """
+    Valida e aplica as operações. Retorna (resultados, sucesso); quando
+    ``sucesso`` é falso nenhuma alteração foi gravada.
+    """
+    _parse_operations(operations)
+
+    bank_accounts = {account.pk: account for account in BankAccount.objects.filter(user=user)}
+    category_groups = {group.pk: group for group in CategoryGroup.objects.filter(user=user)}
+    context = {'bank_accounts': bank_accounts, 'category_groups': category_groups}
+
+    target_ids = set()
+    for operation in operations:
+        if operation['op'] != 'create':
+            try:
+                target_ids.add(int(operation.get('id')))
+            except (TypeError, ValueError):
+                pass
+
+    with transaction.atomic():
+        # As transações-alvo ficam bloqueadas até o fim do lote: o estado
+        # anterior estornado dos saldos e consolidados é o que será alterado,
+        # mesmo com outra requisição mexendo nelas ao mesmo tempo
+        targets = (
+            BankTransaction.objects.filter(user=user, pk__in=target_ids)
+            .select_for_update().order_by('pk').in_bulk()
+        )
+        results, to_create, to_update, to_delete = _prepare(user, operations, targets, context)
+
+        if any(result['status'] == 'error' for result in results):
+            for result in results:
+                if result['status'] == 'ok':
+                    result['status'] = 'skipped'
+            return results, False
+
+        ledger = LedgerBatch()
+
+        BankTransaction.objects.bulk_create([instance for _result, instance in to_create])
+        for _result, instance in to_create:
+            ledger.add(ledger_entry(instance))
+
+        now = timezone.now()
+        for _result, previous, instance in to_update:
+            instance.updated_at = now
+            ledger.add(previous, sign=-1)
+            ledger.add(ledger_entry(instance))
+        BankTransaction.objects.bulk_update(
+            [instance for _result, _previous, instance in to_update], UPDATE_FIELDS, batch_size=500
+        )
+
+        if to_delete:
+            for instance in to_delete:
+                ledger.add(ledger_entry(instance), sign=-1)
+            delete_transactions(BankTransaction.objects.filter(pk__in=[instance.pk for instance in to_delete]))
+
+        ledger.apply()
+
+    for result, instance in to_create:
+        result['id'] = instance.pk
+        result['data'] = BankTransactionSerializer(instance).data
+    for result, _previous, instance in to_update:
+        instance.bank_account = bank_accounts[instance.bank_account_id]
+        instance.category_group = category_groups[instance.category_group_id]
+        result['data'] = BankTransactionSerializer(instance).data
+
+    return results, True
@@ -0,0 +1,206 @@
+"""
+Cache das respostas de leitura da API, por usuário e parâmetros da consulta.
+
+Cada usuário tem uma versão por recurso; a chave da resposta inclui essa
+versão, então invalidar é apenas trocar a versão (ver ``invalidate``),
+feito pelos sinais de ``BankAccount``, ``CategoryGroup`` e
+``BankTransaction`` depois do commit da transação do banco. Em produção com
+vários processos use um backend de cache compartilhado (arquivo, Redis ou
+Memcached): com o ``LocMemCache`` cada processo só enxerga as próprias
+invalidações, e por isso o cache fica desligado por padrão com ele (ver
+``ACCOUNTS_CACHE_ENABLED`` em backend/settings.py).
+
+Os contadores de acertos e falhas ficam na memória de cada processo, que
+grava o total acumulado numa chave só dele; ``cache_stats`` soma as chaves
+de todos os processos. Um ``incr`` na mesma chave por todos os processos
+perderia contagens no ``FileBasedCache``, em que ele lê e regrava o arquivo
+sem bloqueio.
+"""
+import hashlib
+import os
+import socket
+import threading
+import time
+from collections import Counter
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework import status
+from rest_framework.response import Response
+
+KEY_PREFIX = 'accounts'
+
+# Recursos cacheados
+BANK_ACCOUNTS = 'bank_accounts'
+CATEGORY_GROUPS = 'category_groups'
+TRANSACTIONS = 'transactions'
+FINANCIAL_SUMMARY = 'financial_summary'
+DASHBOARD = 'dashboard'
+ANALYTICS = 'analytics'
+RESOURCES = (BANK_ACCOUNTS, CATEGORY_GROUPS, TRANSACTIONS, FINANCIAL_SUMMARY, DASHBOARD, ANALYTICS)
+
+# Recursos afetados pela alteração de cada modelo
+DEPENDENCIES = {
+    'BankAccount': (BANK_ACCOUNTS, TRANSACTIONS, FINANCIAL_SUMMARY, DASHBOARD, ANALYTICS),
+    'CategoryGroup': (CATEGORY_GROUPS, TRANSACTIONS, FINANCIAL_SUMMARY, DASHBOARD, ANALYTICS),
+    'BankTransaction': (BANK_ACCOUNTS, TRANSACTIONS, FINANCIAL_SUMMARY, DASHBOARD, ANALYTICS),
+}
+
+
+def get_cache():
+    return caches[settings.ACCOUNTS_CACHE_ALIAS]
+
+
+def _version_key(user_id, resource):
+    return f'{KEY_PREFIX}:version:{resource}:{user_id}'
+
+
+# Chaves com os contadores de cada processo que já contou algo
+STATS_WORKERS_KEY = f'{KEY_PREFIX}:stats:workers'
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def _worker_stats_key():
+    return f'{KEY_PREFIX}:stats:worker:{socket.gethostname()}:{os.getpid()}'
+
+
+def _response_key(request, resource, version, kind='response'):
+    params = sorted(request.query_params.lists())
+    digest = hashlib.sha1(repr((request.get_host(), request.path, params)).encode()).hexdigest()
+    return f'{KEY_PREFIX}:{kind}:{resource}:{request.user.pk}:{version}:{digest}'
+
+
+def _request_key(request, resource, kind='response'):
+    """Chave da requisição na versão atual do recurso para o usuário"""
+    version = get_cache().get(_version_key(request.user.pk, resource), 0)
+    return _response_key(request, resource, version, kind)
+
+
+def _count(resource, outcome):
+    with _stats_lock:
+        _stats[resource, outcome] += 1
+        totals = dict(_stats)
+    cache = get_cache()
+    key = _worker_stats_key()
+    # Só este processo grava a chave, e cada gravação traz o total acumulado:
+    # uma gravação perdida ou fora de ordem é corrigida pela seguinte. O mesmo
+    # vale para o registro dos processos, conferido a cada contagem
+    cache.set(key, totals, timeout=None)
+    workers = cache.get(STATS_WORKERS_KEY, [])
+    if key not in workers:
+        cache.set(STATS_WORKERS_KEY, [*workers, key], timeout=None)
+
+
+def clear_stats():
+    """Zera os contadores deste processo"""
+    with _stats_lock:
+        _stats.clear()
+
+
+def invalidate(user_id, resources=RESOURCES):
+    """Descarta as respostas cacheadas do usuário para os recursos informados"""
+    version = time.time_ns()
+    get_cache().set_many(
+        {_version_key(user_id, resource): version for resource in resources},
+        timeout=None,
+    )
+
+
+def invalidate_for_model(model_name, user_id):
+    """
+    Invalida os recursos que dependem do modelo quando a transação do banco
+    confirmar: invalidando antes, uma requisição concorrente ainda lê o
+    estado anterior e o guarda na versão nova, que ficaria valendo até expirar.
+    """
+    resources = DEPENDENCIES[model_name]
+    transaction.on_commit(lambda: invalidate(user_id, resources))
+
+
+def _lookup(request, resource):
+    """(chave, dados cacheados ou None) da requisição, contando acertos e falhas"""
+    key = _request_key(request, resource)
+    data = get_cache().get(key)
+    _count(resource, 'hits' if data is not None else 'misses')
+    return key, data
+
+
+def _store(key, response):
+    if response.status_code == status.HTTP_200_OK:
+        get_cache().set(key, response.data, timeout=settings.ACCOUNTS_CACHE_TIMEOUT)
+
+
+def cached_response(resource):
+    """
+    Decorador para views de API: responde requisições GET a partir do cache
+    do usuário e guarda as respostas 200 calculadas. Aceita views síncronas e
+    assíncronas.
+    """
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                if request.method != 'GET' or not settings.ACCOUNTS_CACHE_ENABLED:
+                    return await view(request, *args, **kwargs)
+
+                key, data = await sync_to_async(_lookup)(request, resource)
+                if data is not None:
+                    return Response(data)
+
+                response = await view(request, *args, **kwargs)
+                await sync_to_async(_store)(key, response)
+                return response
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method != 'GET' or not settings.ACCOUNTS_CACHE_ENABLED:
+                return view(request, *args, **kwargs)
+
+            key, data = _lookup(request, resource)
+            if data is not None:
+                return Response(data)
+
+            response = view(request, *args, **kwargs)
+            _store(key, response)
+            return response
+        return wrapper
+    return decorator
+
+
+def cached_value(request, resource, kind, compute):
+    """
+    Valor derivado da requisição (por exemplo o ETag), guardado na mesma
+    versão do recurso que as respostas e portanto invalidado junto com elas.
+    """
+    if not settings.ACCOUNTS_CACHE_ENABLED:
+        return compute()
+    cache = get_cache()
+    key = _request_key(request, resource, kind)
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        if value is not None:
+            cache.set(key, value, timeout=settings.ACCOUNTS_CACHE_TIMEOUT)
+    return value
+
+
+def cache_stats():
+    """Contadores de acertos e falhas por recurso, somados entre os processos"""
+    cache = get_cache()
+    totals = Counter()
+    for counts in cache.get_many(cache.get(STATS_WORKERS_KEY, [])).values():
+        totals.update(counts)
+
+    stats = {
+        resource: {outcome: totals[resource, outcome] for outcome in ('hits', 'misses')}
+        for resource in RESOURCES
+    }
+    for counters in stats.values():
+        total = counters['hits'] + counters['misses']
+        counters['hit_ratio'] = round(counters['hits'] / total, 4) if total else None
+    return stats
@@ -0,0 +1,159 @@
+"""
+Validadores ETag das respostas de leitura da API (GET condicional).
+
+Cada ETag é derivado do maior ``updated_at`` e da quantidade de linhas do
+recurso para o usuário, obtidos com uma única agregação indexada. Quando o
+cliente envia um ``If-None-Match`` igual, a view responde 304 sem executar
+serializers nem as consultas da listagem. Os ETags calculados ficam no cache
+de respostas, de modo que revalidações repetidas nem chegam ao banco.
+"""
+import hashlib
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.db.models import Count, Max
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from . import cache
+from .models import BankAccount, BankTransaction, CategoryGroup
+from .analytics import AnalyticsError, analytics_period
+from .periods import current_month, month_range, summary_range, transactions_period
+
+
+def _etag(*parts):
+    return hashlib.md5(repr(parts).encode(), usedforsecurity=False).hexdigest()
+
+
+def _table_state(queryset):
+    """(maior updated_at, quantidade de linhas) do queryset"""
+    state = queryset.order_by().aggregate(last_update=Max('updated_at'), count=Count('id'))
+    return state['last_update'], state['count']
+
+
+def _labels_state(user):
+    """Estado de contas e categorias, cujos nomes aparecem nas transações"""
+    accounts = BankAccount.objects.filter(user=user).order_by().aggregate(last_update=Max('updated_at'))
+    groups = CategoryGroup.objects.filter(user=user).order_by().aggregate(last_update=Max('updated_at'))
+    return accounts['last_update'], groups['last_update']
+
+
+def bank_accounts_etag(request):
+    # O saldo gravado também atualiza o updated_at da conta (ver ledger.py)
+    return _etag('bank_accounts', request.user.pk, _table_state(
+        BankAccount.objects.filter(user=request.user, is_active=True)
+    ))
+
+
+def category_groups_etag(request):
+    return _etag('category_groups', request.user.pk, _table_state(
+        CategoryGroup.objects.filter(user=request.user, is_active=True)
+    ))
+
+
+def transactions_etag(request):
+    try:
+        start_date, end_date = transactions_period(request.GET.get('month_year'))
+    except ValueError:
+        return None
+    transactions = BankTransaction.objects.filter(
+        user=request.user, transaction_date__range=[start_date, end_date]
+    )
+    return _etag(
+        'transactions', request.user.pk, start_date, end_date,
+        _table_state(transactions), _labels_state(request.user),
+    )
+
+
+def financial_summary_etag(request):
+    try:
+        start_date, end_date = month_range(request.GET.get('month_year') or current_month())
+    except ValueError:
+        return None
+    transactions = BankTransaction.objects.filter(
+        user=request.user, transaction_date__range=[start_date, end_date]
+    )
+    return _etag('financial_summary', request.user.pk, start_date, _table_state(transactions))
+
+
+def financial_summary_range_etag(request):
+    try:
+        start_month, end_month = summary_range(request.GET.get('start'), request.GET.get('end'))
+        end_date = month_range(end_month.strftime('%Y-%m'))[1]
+    except ValueError:
+        return None
+    transactions = BankTransaction.objects.filter(
+        user=request.user, transaction_date__range=[start_month, end_date]
+    )
+    return _etag(
+        'financial_summary_range', request.user.pk, sorted(request.GET.lists()),
+        _table_state(transactions),
+    )
+
+
+def analytics_etag(request):
+    try:
+        start_date, end_date = analytics_period(request.GET.get('start'), request.GET.get('end'))
+    except AnalyticsError:
+        return None
+    transactions = BankTransaction.objects.filter(
+        user=request.user, transaction_date__range=[start_date, end_date]
+    )
+    # Nomes de contas e categorias aparecem nos rótulos
+    return _etag(
+        'analytics', request.user.pk, sorted(request.GET.lists()),
+        _table_state(transactions), _labels_state(request.user),
+    )
+
+
+def dashboard_etag(request):
+    try:
+        start_date, end_date = month_range(request.GET.get('month_year') or current_month())
+    except ValueError:
+        return None
+    # O saldo gravado atualiza o updated_at da conta, então transações de
+    # outros meses também mudam o estado das contas
+    transactions = BankTransaction.objects.filter(
+        user=request.user, transaction_date__range=[start_date, end_date]
+    )
+    return _etag(
+        'dashboard', request.user.pk, start_date, sorted(request.GET.lists()),
+        _table_state(BankAccount.objects.filter(user=request.user)),
+        _table_state(CategoryGroup.objects.filter(user=request.user)),
+        _table_state(transactions),
+    )
+
+
+def conditional_get(etag_func, resource):
+    """
+    Decorador para views de API: aplica ``condition`` do Django às
+    requisições GET e pede que o cliente sempre revalide a resposta. O ETag
+    calculado fica no cache de respostas do recurso (ver ``cache.py``).
+    Em views assíncronas o ETag é calculado antes, fora do laço de eventos.
+    """
+    def safe_etag_func(request, *args, **kwargs):
+        if request.method != 'GET':
+            return None
+        return cache.cached_value(request, resource, 'etag', lambda: etag_func(request))
+
+    def add_cache_control(request, response):
+        if request.method == 'GET':
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                etag = await sync_to_async(safe_etag_func)(request, *args, **kwargs)
+                conditional_view = condition(etag_func=lambda *args, **kwargs: etag)(view)
+                return add_cache_control(request, await conditional_view(request, *args, **kwargs))
+            return async_wrapper
+
+        conditional_view = condition(etag_func=safe_etag_func)(view)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            return add_cache_control(request, conditional_view(request, *args, **kwargs))
+        return wrapper
+    return decorator
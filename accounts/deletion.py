@@ -0,0 +1,104 @@
+"""
+Exclusão de usuários e contas bancárias com históricos grandes.
+
+O ``delete()`` do Django carrega todas as transações relacionadas para
+excluí-las em cascata, o que consome memória e segura bloqueios em
+proporção ao histórico. Aqui a exclusão tem duas etapas:
+
+1. ``soft_delete_*`` marca o registro na hora (``deleted_at``): a conta e
+   suas transações somem de todas as consultas (ver os managers em
+   models.py) e o usuário fica inativo, com os tokens revogados (demais
+   processos recusam-nos em até ``JWT_REVOCATION_REFRESH_INTERVAL``
+   segundos) e sem novas transações recorrentes.
+2. ``purge_*``, chamado pela tarefa em segundo plano (jobs.py), apaga as
+   linhas filhas em lotes de ``PURGE_BATCH_SIZE`` com DELETE direto, sem
+   carregar objetos nem disparar sinais, e por fim o próprio registro, cuja
+   cascata já não encontra quase nada. Cada lote é uma instrução curta, e o
+   andamento é gravado a cada lote.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from .ledger import raw_delete
+from .models import (
+    BankAccount, BankTransaction, Contribution, MonthlyRollup, RecurringTransaction, User, YieldEvent,
+)
+from .tokens import revoke_user_tokens
+
+PURGE_BATCH_SIZE = 5000
+
+
+def soft_delete_bank_account(account):
+    """Esconde a conta e suas transações; o histórico é apagado depois"""
+    with transaction.atomic():
+        # Os consolidados da conta são poucos (categorias x meses) e saem já
+        raw_delete(MonthlyRollup.objects.filter(bank_account=account))
+        account.deleted_at = timezone.now()
+        # O post_save descarta as respostas cacheadas do dono
+        account.save(update_fields=['deleted_at', 'updated_at'])
+
+
+def soft_delete_user(user):
+    """
+    Desativa o usuário, revoga seus tokens e o tira das listagens; o
+    histórico é apagado depois. Retorna a partir de quando o usuário pode
+    ser apagado (quando expira o último token de acesso revogado).
+    """
+    with transaction.atomic():
+        user.deleted_at = timezone.now()
+        user.is_active = False
+        user.save(update_fields=['deleted_at', 'is_active', 'updated_at'])
+        # As recorrências param de gerar transações
+        RecurringTransaction.objects.filter(user=user).update(is_active=False)
+        return revoke_user_tokens(user)
+
+
+def purge_in_batches(queryset, batch_size=PURGE_BATCH_SIZE, on_batch=None):
+    """
+    Apaga as linhas do queryset em lotes de ``batch_size`` ids, cada lote
+    com um DELETE direto. ``on_batch(quantidade)`` é chamado após cada lote.
+    Retorna o total de linhas apagadas.
+    """
+    deleted = 0
+    while True:
+        ids = list(queryset.order_by().values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        count = raw_delete(queryset.model._base_manager.filter(pk__in=ids))
+        deleted += count
+        if on_batch:
+            on_batch(count)
+
+
+def _purge(children, parent, batch_size, progress):
+    """Apaga os querysets ``children`` em lotes e depois ``parent``"""
+    if progress:
+        progress.update(0, sum(queryset.count() for queryset in children))
+    purged = 0
+    for queryset in children:
+        purged += purge_in_batches(queryset, batch_size, progress.advance if progress else None)
+    deleted, _ = parent.delete()
+    return {'deleted': bool(deleted), 'purged': purged}
+
+
+def purge_bank_account(bank_account_id, batch_size=PURGE_BATCH_SIZE, progress=None):
+    """Apaga em lotes o histórico da conta e depois a conta"""
+    # Tarefas enfileiradas sem a marcação também escondem a conta antes de começar
+    BankAccount.all_objects.filter(pk=bank_account_id, deleted_at__isnull=True).update(deleted_at=timezone.now())
+    children = [
+        BankTransaction.all_objects.filter(bank_account_id=bank_account_id),
+        MonthlyRollup.objects.filter(bank_account_id=bank_account_id),
+    ]
+    return _purge(children, BankAccount.all_objects.filter(pk=bank_account_id), batch_size, progress)
+
+
+def purge_user(user_id, batch_size=PURGE_BATCH_SIZE, progress=None):
+    """Apaga em lotes o histórico do usuário e depois o usuário"""
+    User.objects.filter(pk=user_id, deleted_at__isnull=True).update(deleted_at=timezone.now(), is_active=False)
+    children = [
+        BankTransaction.all_objects.filter(user_id=user_id),
+        MonthlyRollup.objects.filter(user_id=user_id),
+        Contribution.objects.filter(investment__user_id=user_id),
+        YieldEvent.objects.filter(investment__user_id=user_id),
+    ]
+    return _purge(children, User.objects.filter(pk=user_id), batch_size, progress)
@@ -0,0 +1,110 @@
+"""
+Exportação do histórico de transações em CSV ou NDJSON, em streaming.
+
+As linhas são lidas com ``iterator`` (cursor no servidor no PostgreSQL) e
+codificadas em blocos de ``EXPORT_CHUNK_SIZE``, então a memória usada não
+depende do tamanho do histórico. O CSV tem as mesmas colunas aceitas pela
+importação (contas e categorias pelo nome), de modo que o arquivo exportado
+pode ser importado de volta.
+
+A resposta pode levar mais que o ``timeout`` do Gunicorn: sirva com o worker
+``gthread`` (padrão no modo WSGI) ou no modo ASGI, nunca com o ``sync``
+(ver gunicorn.conf.py).
+"""
+import csv
+import io
+import itertools
+import json
+
+from asgiref.sync import sync_to_async
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from .models import BankTransaction
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORT_COLUMNS = (
+    'id', 'transaction_date', 'description', 'transaction_type', 'amount', 'bank_account', 'category_group',
+)
+_QUERY_COLUMNS = (
+    'id', 'transaction_date', 'description', 'transaction_type', 'amount',
+    'bank_account__name', 'category_group__name',
+)
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def export_queryset(user, start_date=None, end_date=None):
+    """Tuplas das transações do usuário, da mais antiga para a mais recente"""
+    transactions = BankTransaction.objects.filter(user=user)
+    if start_date:
+        transactions = transactions.filter(transaction_date__gte=start_date)
+    if end_date:
+        transactions = transactions.filter(transaction_date__lte=end_date)
+    # Mesma ordem do índice (user, transaction_date, created_at, id)
+    return transactions.order_by('transaction_date', 'created_at', 'id').values_list(*_QUERY_COLUMNS)
+
+
+def _header(export_format):
+    if export_format == 'csv':
+        # BOM para o Excel reconhecer UTF-8; a importação o ignora
+        return '﻿' + ','.join(EXPORT_COLUMNS) + '\r\n'
+    return ''
+
+
+def _encode_csv(rows):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue().encode()
+
+
+def _encode_ndjson(rows):
+    # Decimais como texto, como nas demais respostas da API
+    if orjson is not None:
+        return b''.join(orjson.dumps(dict(zip(EXPORT_COLUMNS, row)), default=str) + b'\n' for row in rows)
+    return ''.join(
+        json.dumps(dict(zip(EXPORT_COLUMNS, row)), default=str, ensure_ascii=False) + '\n' for row in rows
+    ).encode()
+
+
+ENCODERS = {'csv': _encode_csv, 'ndjson': _encode_ndjson}
+
+
+def stream_export(queryset, export_format, chunk_size=EXPORT_CHUNK_SIZE):
+    """Gera o arquivo em blocos de ``chunk_size`` linhas"""
+    encode = ENCODERS[export_format]
+    yield _header(export_format).encode()
+    rows = queryset.iterator(chunk_size=chunk_size)
+    while chunk := list(itertools.islice(rows, chunk_size)):
+        yield encode(chunk)
+
+
+async def astream_export(queryset, export_format, chunk_size=EXPORT_CHUNK_SIZE):
+    """Versão assíncrona de ``stream_export``, para o modo ASGI"""
+    encode = ENCODERS[export_format]
+    yield _header(export_format).encode()
+    # ``aiterator`` com ``values_list`` executa a consulta dentro do laço de
+    # eventos; cada bloco é lido numa thread, com o mesmo cursor no servidor
+    rows = queryset.iterator(chunk_size=chunk_size)
+    next_chunk = sync_to_async(lambda: list(itertools.islice(rows, chunk_size)))
+    while chunk := await next_chunk():
+        yield encode(chunk)
+
+
+def export_response(content, export_format):
+    """Resposta em streaming com o arquivo como anexo"""
+    filename = f"transacoes-{timezone.localdate():%Y%m%d}.{export_format}"
+    response = StreamingHttpResponse(content, content_type=EXPORT_FORMATS[export_format])
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    # Proxies como o nginx não devem acumular a resposta antes de repassá-la
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,267 @@
+"""
+Importação em massa de extratos bancários (CSV e OFX).
+
+Os arquivos são lidos linha a linha, validados contra um mapa pré-carregado
+das contas e categorias do usuário e gravados com ``bulk_create`` em lotes,
+dentro de uma única transação. Assim a memória usada depende do tamanho do
+lote, e não do tamanho do arquivo.
+"""
+import codecs
+import csv
+import itertools
+import re
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+
+from .ledger import LedgerBatch, ledger_entry
+from .models import BankAccount, BankTransaction, CategoryGroup
+
+IMPORT_BATCH_SIZE = 1000
+
+# Quantidade máxima de erros detalhados no relatório (os demais são só contados)
+MAX_REPORTED_ERRORS = 1000
+
+MAX_AMOUNT = Decimal('99999999.99')
+DESCRIPTION_MAX_LENGTH = BankTransaction._meta.get_field('description').max_length
+
+DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y', '%Y%m%d')
+
+TRANSACTION_TYPE_ALIASES = {
+    'income': 'income',
+    'receita': 'income',
+    'credit': 'income',
+    'credito': 'income',
+    'crédito': 'income',
+    'expense': 'expense',
+    'despesa': 'expense',
+    'debit': 'expense',
+    'debito': 'expense',
+    'débito': 'expense',
+}
+
+OFX_TAG_RE = re.compile(r'<(/?)([A-Za-z0-9.]+)>([^<\r\n]*)')
+
+
+class ImportRowError(Exception):
+    """Linha do arquivo que não pode ser importada"""
+
+
+def parse_amount(value):
+    """
+    Converte '1234.56', '-1.234,56', '1,234.56' ou 'R$ 10,00' em Decimal. O
+    separador decimal é o último ponto ou vírgula do valor (o outro separa
+    milhares); um separador repetido só separa milhares. Valores com mais de
+    duas casas decimais são recusados em vez de arredondados, já que '1.234'
+    tanto pode ser mil duzentos e trinta e quatro quanto 1,234.
+    """
+    original = value
+    value = (value or '').strip().replace('R$', '').replace(' ', '')
+    position = max(value.rfind('.'), value.rfind(','))
+    if position >= 0:
+        separator = value[position]
+        if value.count(separator) > 1:
+            value = value.replace(separator, '')
+        else:
+            integer, fraction = value[:position], value[position + 1:]
+            thousands = ',' if separator == '.' else '.'
+            if len(fraction) > 2:
+                raise ImportRowError(f"Valor com mais de duas casas decimais: '{original}'")
+            value = f"{integer.replace(thousands, '')}.{fraction}"
+    try:
+        amount = Decimal(value)
+    except InvalidOperation:
+        raise ImportRowError(f"Valor inválido: '{original}'")
+    if not amount.is_finite() or abs(amount) > MAX_AMOUNT:
+        raise ImportRowError(f"Valor inválido: '{original}'")
+    return amount.quantize(Decimal('0.01'))
+
+
+def parse_date(value):
+    """Aceita YYYY-MM-DD, DD/MM/YYYY e datas OFX (YYYYMMDD[HHMMSS...])"""
+    value = (value or '').strip()
+    candidates = (value, value[:8])
+    for date_format in DATE_FORMATS:
+        for candidate in candidates:
+            try:
+                return datetime.strptime(candidate, date_format).date()
+            except ValueError:
+                continue
+    raise ImportRowError(f"Data inválida: '{value}'")
+
+
+def iter_csv_rows(upload):
+    """
+    Lê um CSV com cabeçalho (separado por vírgula ou ponto e vírgula) e gera
+    (número da linha, dicionário). Colunas reconhecidas: transaction_date,
+    description, amount e, opcionalmente, transaction_type, bank_account e
+    category_group (id ou nome).
+    """
+    lines = codecs.iterdecode(upload, 'utf-8-sig')
+    header = next(lines, '')
+    delimiter = ';' if header.count(';') > header.count(',') else ','
+    reader = csv.DictReader(itertools.chain([header], lines), delimiter=delimiter)
+    if reader.fieldnames:
+        reader.fieldnames = [name.strip().lower() for name in reader.fieldnames]
+    for row in reader:
+        yield reader.line_num, row
+
+
+def _ofx_encoding(header_lines):
+    header = b''.join(header_lines).upper()
+    if b'UTF-8' in header or b'UTF8' in header:
+        return 'utf-8'
+    return 'cp1252'
+
+
+def iter_ofx_rows(upload):
+    """
+    Lê os blocos <STMTTRN> de um arquivo OFX (SGML ou XML) e gera
+    (número da transação, dicionário) com data, valor e descrição.
+    """
+    lines = iter(upload)
+    header_lines = []
+    for line in lines:
+        if b'<' in line and not line.lstrip().startswith(b'<?'):
+            lines = itertools.chain([line], lines)
+            break
+        header_lines.append(line)
+    decoder = codecs.getincrementaldecoder(_ofx_encoding(header_lines))(errors='replace')
+
+    current = None
+    number = 0
+    for line in lines:
+        for closing, tag, value in OFX_TAG_RE.findall(decoder.decode(line)):
+            tag = tag.upper()
+            if tag == 'STMTTRN':
+                if closing and current is not None:
+                    number += 1
+                    yield number, {
+                        'transaction_date': current.get('DTPOSTED', ''),
+                        'amount': current.get('TRNAMT', ''),
+                        'description': current.get('MEMO') or current.get('NAME', ''),
+                    }
+                current = None if closing else {}
+            elif current is not None and not closing:
+                current[tag] = value.strip()
+
+
+class TransactionImporter:
+    """Valida linhas de extrato e as grava em lote para um usuário"""
+
+    def __init__(self, user, bank_account=None, income_category=None, expense_category=None,
+                 batch_size=IMPORT_BATCH_SIZE):
+        self.user = user
+        self.batch_size = batch_size
+
+        self.accounts = {}
+        for account in BankAccount.objects.filter(user=user).only('id', 'name'):
+            self.accounts[str(account.pk)] = account.pk
+            self.accounts[account.name.strip().lower()] = account.pk
+
+        self.categories_by_id = {}
+        self.categories_by_name = {}
+        for group in CategoryGroup.objects.filter(user=user).only('id', 'name', 'transaction_type'):
+            self.categories_by_id[str(group.pk)] = (group.pk, group.transaction_type)
+            self.categories_by_name[(group.name.strip().lower(), group.transaction_type)] = group.pk
+
+        self.default_account = self.resolve_account(bank_account) if bank_account else None
+        self.default_categories = {
+            'income': self.resolve_category(income_category, 'income') if income_category else None,
+            'expense': self.resolve_category(expense_category, 'expense') if expense_category else None,
+        }
+
+    def resolve_account(self, value):
+        account_id = self.accounts.get(str(value).strip().lower())
+        if account_id is None:
+            raise ImportRowError("Conta bancária inválida.")
+        return account_id
+
+    def resolve_category(self, value, transaction_type):
+        value = str(value).strip()
+        if value in self.categories_by_id:
+            group_id, group_type = self.categories_by_id[value]
+            if group_type != transaction_type:
+                raise ImportRowError("Tipo de transação deve corresponder ao grupo de categoria.")
+            return group_id
+        group_id = self.categories_by_name.get((value.lower(), transaction_type))
+        if group_id is None:
+            raise ImportRowError("Grupo de categoria inválido.")
+        return group_id
+
+    def build_transaction(self, row):
+        """Converte uma linha do arquivo em BankTransaction (sem gravar)"""
+        amount = parse_amount(row.get('amount'))
+        transaction_date = parse_date(row.get('transaction_date'))
+
+        raw_type = (row.get('transaction_type') or '').strip().lower()
+        if raw_type:
+            transaction_type = TRANSACTION_TYPE_ALIASES.get(raw_type)
+            if transaction_type is None:
+                raise ImportRowError(f"Tipo de transação inválido: '{raw_type}'")
+        else:
+            transaction_type = 'expense' if amount < 0 else 'income'
+
+        account_value = (row.get('bank_account') or '').strip()
+        bank_account_id = self.resolve_account(account_value) if account_value else self.default_account
+        if bank_account_id is None:
+            raise ImportRowError("Conta bancária não informada.")
+
+        category_value = (row.get('category_group') or '').strip()
+        if category_value:
+            category_group_id = self.resolve_category(category_value, transaction_type)
+        else:
+            category_group_id = self.default_categories[transaction_type]
+        if category_group_id is None:
+            raise ImportRowError("Grupo de categoria não informado.")
+
+        description = (row.get('description') or '').strip()
+        if not description:
+            raise ImportRowError("Descrição não informada.")
+
+        return BankTransaction(
+            user=self.user,
+            bank_account_id=bank_account_id,
+            category_group_id=category_group_id,
+            transaction_type=transaction_type,
+            amount=abs(amount),
+            description=description[:DESCRIPTION_MAX_LENGTH],
+            transaction_date=transaction_date,
+        )
+
+    @transaction.atomic
+    def run(self, rows):
+        """Importa as linhas e retorna o relatório com criados e erros"""
+        created = 0
+        error_count = 0
+        errors = []
+        pending = []
+        ledger = LedgerBatch()
+
+        def flush():
+            BankTransaction.objects.bulk_create(pending, batch_size=self.batch_size)
+            for instance in pending:
+                ledger.add(ledger_entry(instance))
+            pending.clear()
+
+        for row_number, row in rows:
+            try:
+                pending.append(self.build_transaction(row))
+            except ImportRowError as exc:
+                error_count += 1
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    errors.append({'row': row_number, 'error': str(exc)})
+                continue
+            created += 1
+            if len(pending) >= self.batch_size:
+                flush()
+        if pending:
+            flush()
+
+        ledger.apply()
+        return {
+            'created': created,
+            'error_count': error_count,
+            'errors': errors,
+        }
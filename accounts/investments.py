@@ -0,0 +1,278 @@
+"""
+Cálculo da carteira de investimentos: valor ao longo do tempo, ROI e
+retornos ponderados pelo tempo (TWR) e pelo capital (MWR) por ativo e da
+carteira.
+
+Cada ativo é uma sequência de eventos: a compra inicial e os aportes somam
+dinheiro; os rendimentos multiplicam o valor por ``1 + percentual / 100``.
+No mesmo dia os aportes entram antes dos rendimentos. Com ``V_k = (V_{k-1} +
+c_k) * g_k`` todo o histórico sai de uma soma e um produto acumulados sobre
+os arrays de eventos, sem laço em Python.
+
+As métricas de cada ativo ficam no cache (chave por investimento e data de
+referência) e são descartadas pelos sinais quando o investimento, um aporte
+ou um rendimento muda (ver ``signals.py``). A carteira é recalculada a
+partir das métricas cacheadas dos ativos.
+"""
+from datetime import date
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+
+from . import cache
+from .models import Contribution, YieldEvent
+
+DAYS_PER_YEAR = 365.0
+
+# Newton para a taxa interna de retorno (MWR)
+IRR_MAX_ITERATIONS = 100
+IRR_TOLERANCE = 1e-10
+# Limite de ln(1 + taxa anual), para não estourar exp() em prazos curtos
+IRR_LOG_RATE_BOUND = 50.0
+
+# No mesmo dia, aportes antes de rendimentos
+_CONTRIBUTION, _YIELD = 0, 1
+
+
+def _percent(value):
+    return None if value is None else round(float(value) * 100, 4)
+
+
+def _money(value):
+    return round(float(value), 2)
+
+
+def value_history(days, flows, factors, kinds):
+    """
+    Valor e total investido depois de cada evento, na ordem cronológica.
+
+    ``days`` são datas em ordinal, ``flows`` o dinheiro que entra em cada
+    evento e ``factors`` o fator de rendimento (1 para aportes). Retorna os
+    arrays já ordenados: (days, flows, factors, values, invested).
+    """
+    order = np.lexsort((kinds, days))
+    days, flows, factors = days[order], flows[order], factors[order]
+
+    growth = np.cumprod(factors)
+    previous_growth = np.concatenate(([1.0], growth[:-1]))
+    values = growth * np.cumsum(flows / previous_growth)
+    return days, flows, factors, values, np.cumsum(flows)
+
+
+def money_weighted_return(days, flows, final_value, final_day):
+    """
+    Taxa anual que leva os aportes ao valor final (XIRR), resolvida por
+    Newton em ``ln(1 + taxa)``. Com aportes positivos a função é crescente e
+    convexa, então a raiz é única. Retorna None se não houver prazo.
+    """
+    years = (final_day - days) / DAYS_PER_YEAR
+    if not len(flows) or not np.any(years > 0):
+        return None
+    if final_value <= 0:
+        return -1.0
+
+    log_rate = 0.0
+    for _ in range(IRR_MAX_ITERATIONS):
+        grown = flows * np.exp(log_rate * years)
+        error = grown.sum() - final_value
+        slope = (grown * years).sum()
+        if slope == 0:
+            break
+        step = error / slope
+        log_rate = float(np.clip(log_rate - step, -IRR_LOG_RATE_BOUND, IRR_LOG_RATE_BOUND))
+        if abs(step) < IRR_TOLERANCE:
+            break
+    return float(np.expm1(log_rate))
+
+
+def time_weighted_return(values, flows):
+    """
+    Retorno encadeado dos subperíodos, sem o efeito dos aportes: em cada
+    data ``(V_i - C_i) / V_{i-1}``. ``values`` e ``flows`` são por data.
+    """
+    if len(values) < 2:
+        return 0.0
+    start = values[:-1]
+    valid = start > 0
+    period = (values[1:][valid] - flows[1:][valid]) / start[valid]
+    return float(np.prod(period) - 1)
+
+
+def compute_asset(investment, contributions, yields, as_of):
+    """
+    Métricas e histórico de um investimento. ``contributions`` são pares
+    (data, valor) e ``yields`` pares (data, percentual).
+    """
+    count = 1 + len(contributions) + len(yields)
+    days = np.empty(count, dtype=np.int64)
+    flows = np.zeros(count)
+    factors = np.ones(count)
+    kinds = np.full(count, _CONTRIBUTION, dtype=np.int8)
+
+    days[0] = investment.purchase_date.toordinal()
+    flows[0] = float(investment.initial_value)
+    if contributions:
+        end = 1 + len(contributions)
+        contribution_days, amounts = zip(*contributions)
+        days[1:end] = [day.toordinal() for day in contribution_days]
+        flows[1:end] = np.array(amounts, dtype=float)
+    if yields:
+        start = 1 + len(contributions)
+        yield_days, percentages = zip(*yields)
+        days[start:] = [day.toordinal() for day in yield_days]
+        factors[start:] = 1 + np.array(percentages, dtype=float) / 100
+        kinds[start:] = _YIELD
+
+    days, flows, factors, values, invested = value_history(days, flows, factors, kinds)
+
+    # Um ponto por data: o estado ao fim do dia
+    last_of_day = np.append(days[1:] != days[:-1], True)
+    current_value = float(values[-1])
+    total_invested = float(invested[-1])
+    initial_value = float(investment.initial_value)
+    gain = current_value - total_invested
+
+    return {
+        'id': investment.pk,
+        'status': investment.status,
+        'initial_value': _money(initial_value),
+        'total_contributions': _money(total_invested - initial_value),
+        'total_invested': _money(total_invested),
+        'current_value': _money(current_value),
+        'total_yield': _money(gain),
+        'roi': _percent(gain / total_invested) if total_invested > 0 else 0.0,
+        'simple_roi': _percent((current_value - initial_value) / initial_value) if initial_value > 0 else 0.0,
+        'time_weighted_return': _percent(np.prod(factors) - 1),
+        'money_weighted_return': _percent(money_weighted_return(
+            days[flows > 0], flows[flows > 0], current_value, as_of.toordinal()
+        )),
+        'last_update': date.fromordinal(int(days[-1])).isoformat(),
+        # Arrays por data, usados no histórico e no cálculo da carteira
+        'series': {
+            'days': days[last_of_day].tolist(),
+            'values': values[last_of_day].tolist(),
+            'invested': invested[last_of_day].tolist(),
+        },
+        'flows': {
+            'days': days[flows > 0].tolist(),
+            'amounts': flows[flows > 0].tolist(),
+        },
+    }
+
+
+def _asset_key(investment_id, as_of):
+    return f'{cache.KEY_PREFIX}:investment:{investment_id}:{as_of.isoformat()}'
+
+
+def invalidate_asset(investment_id, as_of=None):
+    """Descarta as métricas cacheadas do investimento"""
+    as_of = as_of or timezone.localdate()
+    cache.get_cache().delete(_asset_key(investment_id, as_of))
+
+
+def asset_metrics(investments, as_of=None):
+    """
+    Métricas de cada investimento, na ordem recebida. As ausentes do cache
+    são calculadas com uma consulta para os aportes e outra para os
+    rendimentos de todos os investimentos que faltam.
+    """
+    as_of = as_of or timezone.localdate()
+    investments = list(investments)
+    keys = {investment.pk: _asset_key(investment.pk, as_of) for investment in investments}
+
+    use_cache = settings.ACCOUNTS_CACHE_ENABLED
+    cached = cache.get_cache().get_many(keys.values()) if use_cache else {}
+    metrics = {pk: cached[key] for pk, key in keys.items() if key in cached}
+
+    missing = [investment for investment in investments if investment.pk not in metrics]
+    if missing:
+        ids = [investment.pk for investment in missing]
+        contributions, yields = {}, {}
+        for investment_id, day, amount in Contribution.objects.filter(investment_id__in=ids).values_list(
+            'investment_id', 'contribution_date', 'amount'
+        ):
+            contributions.setdefault(investment_id, []).append((day, amount))
+        for investment_id, day, percentage in YieldEvent.objects.filter(investment_id__in=ids).values_list(
+            'investment_id', 'event_date', 'percentage'
+        ):
+            yields.setdefault(investment_id, []).append((day, percentage))
+
+        computed = {
+            investment.pk: compute_asset(
+                investment, contributions.get(investment.pk, []), yields.get(investment.pk, []), as_of,
+            )
+            for investment in missing
+        }
+        metrics.update(computed)
+        if use_cache:
+            cache.get_cache().set_many(
+                {keys[pk]: value for pk, value in computed.items()},
+                timeout=settings.ACCOUNTS_CACHE_TIMEOUT,
+            )
+
+    return [metrics[investment.pk] for investment in investments]
+
+
+def portfolio_metrics(assets, as_of=None):
+    """
+    Totais, ROI, TWR e MWR da carteira a partir das métricas dos ativos
+    ativos, e o histórico do valor e do total investido por data.
+    """
+    as_of = as_of or timezone.localdate()
+    assets = [asset for asset in assets if asset['status'] == 'active']
+    summary = {
+        'total_investments': len(assets),
+        'total_invested': 0.0,
+        'current_value': 0.0,
+        'total_yield': 0.0,
+        'roi': 0.0,
+        'time_weighted_return': 0.0,
+        'money_weighted_return': None,
+        'history': [],
+    }
+    if not assets:
+        return summary
+
+    flow_days = np.concatenate([np.array(asset['flows']['days'], dtype=np.int64) for asset in assets])
+    flow_amounts = np.concatenate([np.array(asset['flows']['amounts'], dtype=float) for asset in assets])
+    dates = np.unique(np.concatenate([np.array(asset['series']['days'], dtype=np.int64) for asset in assets]))
+
+    # Valor de cada ativo em todas as datas da carteira (o último conhecido)
+    values = np.zeros(len(dates))
+    for asset in assets:
+        series_days = np.array(asset['series']['days'], dtype=np.int64)
+        index = np.searchsorted(series_days, dates, side='right') - 1
+        known = index >= 0
+        values[known] += np.array(asset['series']['values'])[index[known]]
+
+    flows = np.bincount(np.searchsorted(dates, flow_days), weights=flow_amounts, minlength=len(dates))
+    invested = np.cumsum(flows)
+
+    total_invested = float(invested[-1])
+    current_value = float(values[-1])
+    gain = current_value - total_invested
+    summary.update(
+        total_invested=_money(total_invested),
+        current_value=_money(current_value),
+        total_yield=_money(gain),
+        roi=_percent(gain / total_invested) if total_invested > 0 else 0.0,
+        time_weighted_return=_percent(time_weighted_return(values, flows)),
+        money_weighted_return=_percent(
+            money_weighted_return(flow_days, flow_amounts, current_value, as_of.toordinal())
+        ),
+        history=[
+            {'date': date.fromordinal(day).isoformat(), 'value': _money(value), 'invested': _money(total)}
+            for day, value, total in zip(dates.tolist(), values.tolist(), invested.tolist())
+        ],
+    )
+    return summary
+
+
+def asset_history(metrics):
+    """Histórico do ativo por data, no formato da API"""
+    series = metrics['series']
+    return [
+        {'date': date.fromordinal(day).isoformat(), 'value': _money(value), 'invested': _money(total)}
+        for day, value, total in zip(series['days'], series['values'], series['invested'])
+    ]
@@ -0,0 +1,227 @@
+"""
+Fila de tarefas em segundo plano guardada no próprio banco (modelo ``Job``).
+
+As views enfileiram operações demoradas com ``enqueue`` e respondem 202 na
+hora; os workers (``python manage.py run_jobs``) pegam as tarefas com
+``SELECT ... FOR UPDATE SKIP LOCKED`` no PostgreSQL, de modo que vários
+processos dividem a fila sem pegar a mesma tarefa, e não há broker externo.
+
+Cada tipo de tarefa é uma função registrada com ``@job('tipo')``, que
+recebe um ``JobProgress`` e o ``payload`` como argumentos nomeados e
+retorna o resultado (serializável em JSON). Exceções fazem a tarefa voltar
+para a fila com espera exponencial, até ``max_attempts`` tentativas;
+``JobError`` falha a tarefa de vez. Cada gravação de andamento renova a
+reserva (``locked_at``); tarefas de um worker que morreu no meio, sem
+andamento por ``JOB_LOCK_TIMEOUT``, voltam para a fila. O desfecho só é
+gravado se a reserva ainda for do worker que executou a tarefa.
+"""
+import logging
+import os
+import socket
+from datetime import timedelta
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .deletion import purge_bank_account, purge_user
+from .ledger import rebuild_balances, rebuild_rollups
+from .models import BankAccount, Job, User
+
+logger = logging.getLogger(__name__)
+
+PENDING_STATUSES = ('queued', 'running')
+JOB_RETRY_DELAY = timedelta(seconds=30)
+JOB_LOCK_TIMEOUT = timedelta(minutes=30)
+
+JOB_HANDLERS = {}
+
+
+class JobError(Exception):
+    """Falha definitiva: a tarefa não é tentada de novo"""
+
+
+def job(kind):
+    """Registra a função como executora das tarefas do tipo ``kind``"""
+    def decorator(func):
+        JOB_HANDLERS[kind] = func
+        return func
+    return decorator
+
+
+class JobProgress:
+    """
+    Grava o andamento da tarefa, consultável pelo endpoint de status. Cada
+    gravação também renova a reserva do worker, então tarefas longas que
+    informam o andamento não são retomadas por outro worker.
+    """
+
+    def __init__(self, job):
+        self.job = job
+
+    def update(self, done, total=None):
+        self.job.progress = done
+        fields = {'progress': done}
+        if total is not None:
+            self.job.progress_total = fields['progress_total'] = total
+        now = timezone.now()
+        if self.job.locked_by:
+            self.job.locked_at = fields['locked_at'] = now
+        # Se outro worker retomou a tarefa, a reserva não é mais desta execução
+        Job.objects.filter(pk=self.job.pk, locked_by=self.job.locked_by).update(updated_at=now, **fields)
+
+    def advance(self, count=1):
+        self.update(self.job.progress + count)
+
+
+def worker_id():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def enqueue(kind, payload=None, user=None, key='', max_attempts=3, run_after=None):
+    """
+    Coloca a tarefa na fila, para executar a partir de ``run_after`` (por
+    padrão, já). Com ``key``, se já houver uma tarefa pendente do mesmo
+    tipo e chave, ela é retornada em vez de criar outra (garantido pela
+    restrição ``job_pending_key_uniq``).
+    """
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f'Tipo de tarefa desconhecido: {kind}')
+    existing = _pending_job(kind, key)
+    if existing:
+        return existing
+    try:
+        with transaction.atomic():
+            return Job.objects.create(
+                kind=kind, payload=payload or {}, user=user, key=key, max_attempts=max_attempts,
+                run_after=run_after or timezone.now(),
+            )
+    except IntegrityError:
+        # Outra requisição enfileirou a mesma tarefa ao mesmo tempo
+        existing = _pending_job(kind, key)
+        if existing is None:
+            raise
+        return existing
+
+
+def _pending_job(kind, key):
+    """Tarefa pendente do tipo e chave, se houver (sem chave, nunca há)"""
+    if not key:
+        return None
+    return Job.objects.filter(kind=kind, key=key, status__in=PENDING_STATUSES).first()
+
+
+def _claimable(now):
+    return Job.objects.filter(
+        Q(status='queued', run_after__lte=now)
+        | Q(status='running', locked_at__lt=now - JOB_LOCK_TIMEOUT)
+    ).order_by('run_after', 'id')
+
+
+def claim_job(worker=None):
+    """Marca a próxima tarefa disponível como em execução e a retorna"""
+    worker = worker or worker_id()
+    while True:
+        now = timezone.now()
+        with transaction.atomic():
+            queryset = _claimable(now)
+            if connection.features.has_select_for_update_skip_locked:
+                queryset = queryset.select_for_update(skip_locked=True)
+            claimed = queryset.first()
+            if claimed is None:
+                return None
+
+            if claimed.status == 'running' and claimed.attempts >= claimed.max_attempts:
+                # O worker morreu na última tentativa
+                claimed.status = 'failed'
+                claimed.error = claimed.error or 'Execução interrompida'
+                claimed.finished_at = now
+                claimed.save(update_fields=['status', 'error', 'finished_at', 'updated_at'])
+                continue
+
+            claimed.status = 'running'
+            claimed.attempts += 1
+            claimed.locked_by = worker
+            claimed.locked_at = now
+            claimed.started_at = claimed.started_at or now
+            claimed.save(update_fields=['status', 'attempts', 'locked_by', 'locked_at', 'started_at', 'updated_at'])
+            return claimed
+
+
+def run_job(claimed):
+    """
+    Executa uma tarefa já reservada por ``claim_job`` e grava o desfecho, a
+    menos que outro worker a tenha retomado nesse meio tempo.
+    """
+    worker = claimed.locked_by
+    handler = JOB_HANDLERS.get(claimed.kind)
+    try:
+        if handler is None:
+            raise JobError(f'Tipo de tarefa desconhecido: {claimed.kind}')
+        result = handler(JobProgress(claimed), **claimed.payload)
+    except Exception as exc:
+        logger.exception('Tarefa %s (%s) falhou', claimed.pk, claimed.kind)
+        claimed.error = f'{type(exc).__name__}: {exc}'
+        if not isinstance(exc, JobError) and claimed.attempts < claimed.max_attempts:
+            claimed.status = 'queued'
+            claimed.run_after = timezone.now() + JOB_RETRY_DELAY * 2 ** (claimed.attempts - 1)
+        else:
+            claimed.status = 'failed'
+            claimed.finished_at = timezone.now()
+    else:
+        claimed.status = 'succeeded'
+        claimed.result = result
+        claimed.error = ''
+        claimed.finished_at = timezone.now()
+        if claimed.progress_total is not None:
+            claimed.progress = claimed.progress_total
+
+    claimed.locked_by = ''
+    claimed.locked_at = None
+    claimed.updated_at = timezone.now()
+    fields = ('status', 'result', 'error', 'run_after', 'progress', 'locked_by', 'locked_at', 'finished_at', 'updated_at')
+    saved = Job.objects.filter(pk=claimed.pk, locked_by=worker).update(
+        **{field: getattr(claimed, field) for field in fields}
+    )
+    if not saved:
+        logger.warning('Tarefa %s (%s) foi retomada por outro worker; desfecho descartado', claimed.pk, claimed.kind)
+    return claimed
+
+
+def run_pending(limit=None, worker=None):
+    """Executa tarefas até a fila esvaziar (ou ``limit``); retorna quantas rodaram"""
+    worker = worker or worker_id()
+    count = 0
+    while limit is None or count < limit:
+        claimed = claim_job(worker)
+        if claimed is None:
+            break
+        run_job(claimed)
+        count += 1
+    return count
+
+
+# Tarefas
+
+@job('delete_user')
+def delete_user(progress, user_id):
+    """Apaga em lotes o histórico do usuário (ver deletion.py)"""
+    return purge_user(user_id, progress=progress)
+
+
+@job('delete_bank_account')
+def delete_bank_account(progress, bank_account_id):
+    """Apaga em lotes o histórico da conta (ver deletion.py)"""
+    return purge_bank_account(bank_account_id, progress=progress)
+
+
+@job('rebuild_ledger')
+def rebuild_ledger(progress, user_id=None):
+    """Recalcula saldos e consolidados mensais (de um usuário ou de todos)"""
+    users = User.objects.filter(pk=user_id) if user_id else None
+    accounts = BankAccount.objects.filter(user__in=users) if users is not None else None
+    progress.update(0, 2)
+    balances = rebuild_balances(accounts)
+    progress.update(1)
+    rollups = rebuild_rollups(users)
+    return {'balances_fixed': balances, 'rollups_rebuilt': rollups}
@@ -0,0 +1,305 @@
+"""
+Manutenção incremental dos dados derivados das transações.
+
+Os saldos ficam gravados em ``BankAccount.balance`` e os totais mensais em
+``MonthlyRollup``; ambos são ajustados a cada criação, alteração ou exclusão
+de ``BankTransaction`` (ver ``signals.py``). Operações em massa que não
+disparam sinais devem chamar ``apply_transactions`` ou as funções
+``rebuild_*`` para os registros afetados.
+"""
+from datetime import date
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, DecimalField, F, Q, Sum, When
+from django.db.models.functions import TruncMonth
+from django.dispatch import Signal
+from django.utils import timezone
+
+from .models import BankAccount, BankTransaction, MonthlyRollup
+
+ZERO = Decimal('0.00')
+
+# Enviado após alterações em lote que não disparam os sinais dos modelos,
+# com o argumento ``user_ids`` (usuários cujas transações mudaram)
+transactions_changed = Signal()
+
+# Campos de uma transação que alimentam saldos e consolidados
+LEDGER_FIELDS = (
+    'user_id', 'bank_account_id', 'category_group_id',
+    'transaction_type', 'amount', 'transaction_date',
+)
+
+
+def signed_amount(transaction_type, amount):
+    """Valor com sinal: positivo para receitas, negativo para despesas"""
+    if transaction_type == 'income':
+        return amount
+    return -amount
+
+
+def signed_amount_expression():
+    """Expressão SQL equivalente a ``signed_amount``"""
+    return Case(
+        When(transaction_type='income', then=F('amount')),
+        default=-F('amount'),
+        output_field=DecimalField(max_digits=14, decimal_places=2),
+    )
+
+
+def month_start(value):
+    """Primeiro dia do mês de uma data (aceita também 'YYYY-MM-DD')"""
+    value = BankTransaction._meta.get_field('transaction_date').to_python(value)
+    return date(value.year, value.month, 1)
+
+
+def ledger_entry(instance):
+    """Extrai de uma transação os campos usados pelo livro-razão"""
+    return {field: getattr(instance, field) for field in LEDGER_FIELDS}
+
+
+def apply_balance_delta(bank_account_id, delta):
+    """Soma ``delta`` ao saldo gravado da conta com um único UPDATE"""
+    if bank_account_id and delta:
+        # updated_at também muda para invalidar os validadores ETag das contas
+        BankAccount.objects.filter(pk=bank_account_id).update(
+            balance=F('balance') + delta, updated_at=timezone.now()
+        )
+
+
+def apply_rollup_delta(user_id, bank_account_id, category_group_id, month,
+                       income=ZERO, expense=ZERO, count=0):
+    """Soma os valores ao consolidado do mês, criando-o se necessário"""
+    lookup = {
+        'bank_account_id': bank_account_id,
+        'category_group_id': category_group_id,
+        'month': month,
+    }
+    updated = MonthlyRollup.objects.filter(**lookup).update(
+        total_income=F('total_income') + income,
+        total_expense=F('total_expense') + expense,
+        transaction_count=F('transaction_count') + count,
+    )
+    if updated:
+        if count < 0:
+            MonthlyRollup.objects.filter(transaction_count=0, **lookup).delete()
+        return
+    if count <= 0:
+        return
+
+    try:
+        with transaction.atomic():
+            MonthlyRollup.objects.create(
+                user_id=user_id, total_income=income, total_expense=expense,
+                transaction_count=count, **lookup,
+            )
+    except IntegrityError:
+        # Outra requisição criou o consolidado ao mesmo tempo
+        apply_rollup_delta(user_id, bank_account_id, category_group_id, month, income, expense, count)
+
+
+def apply_transaction(entry, sign=1):
+    """
+    Aplica (sign=1) ou estorna (sign=-1) uma transação nos saldos e
+    consolidados. ``entry`` é um dicionário com os campos de ``LEDGER_FIELDS``.
+    """
+    amount = Decimal(str(entry['amount'])) * sign
+    apply_balance_delta(entry['bank_account_id'], signed_amount(entry['transaction_type'], amount))
+
+    is_income = entry['transaction_type'] == 'income'
+    apply_rollup_delta(
+        entry['user_id'],
+        entry['bank_account_id'],
+        entry['category_group_id'],
+        month_start(entry['transaction_date']),
+        income=amount if is_income else ZERO,
+        expense=ZERO if is_income else amount,
+        count=sign,
+    )
+
+
+class LedgerBatch:
+    """
+    Acumula transações e aplica saldos e consolidados de uma só vez: um
+    UPDATE por conta e um por consolidado, em vez de um por transação. A
+    memória usada depende do número de contas/categorias/meses envolvidos,
+    não do número de transações.
+    """
+
+    def __init__(self):
+        self.balances = {}
+        self.rollups = {}
+
+    def add(self, entry, sign=1):
+        amount = Decimal(str(entry['amount'])) * sign
+        account_id = entry['bank_account_id']
+        self.balances[account_id] = (
+            self.balances.get(account_id, ZERO) + signed_amount(entry['transaction_type'], amount)
+        )
+
+        key = (
+            entry['user_id'], account_id, entry['category_group_id'],
+            month_start(entry['transaction_date']),
+        )
+        income, expense, count = self.rollups.get(key, (ZERO, ZERO, 0))
+        if entry['transaction_type'] == 'income':
+            income += amount
+        else:
+            expense += amount
+        self.rollups[key] = (income, expense, count + sign)
+
+    def apply(self):
+        for account_id, delta in self.balances.items():
+            apply_balance_delta(account_id, delta)
+        for key, (income, expense, count) in self.rollups.items():
+            apply_rollup_delta(*key, income=income, expense=expense, count=count)
+
+        user_ids = {key[0] for key in self.rollups}
+        if user_ids:
+            transactions_changed.send(sender=BankTransaction, user_ids=user_ids)
+        self.balances = {}
+        self.rollups = {}
+
+
+def apply_transactions(entries, sign=1):
+    """Versão em lote de ``apply_transaction`` (ver ``LedgerBatch``)"""
+    batch = LedgerBatch()
+    for entry in entries:
+        batch.add(entry, sign)
+    batch.apply()
+
+
+def raw_delete(queryset):
+    """
+    Exclui as linhas do queryset com um único DELETE direto. Único ponto que
+    usa ``QuerySet._raw_delete`` (API interna do Django): não carrega os
+    objetos, não segue a cascata e não dispara ``pre_delete``/``post_delete``,
+    então os sinais deste app (saldos, consolidados, cache) não rodam e quem
+    chama responde pelo que eles fariam. Retorna a quantidade de linhas.
+    """
+    return queryset._raw_delete(queryset.db)
+
+
+def delete_transactions(queryset):
+    """
+    Exclui as transações com ``raw_delete``. Quem chama deve estornar saldos
+    e consolidados (ver ``LedgerBatch``). Retorna a quantidade de linhas excluídas.
+    """
+    return raw_delete(queryset)
+
+
+def expected_balances(accounts=None):
+    """Retorna {id da conta: saldo calculado a partir das transações}"""
+    transactions = BankTransaction.objects.all()
+    if accounts is not None:
+        transactions = transactions.filter(bank_account__in=accounts)
+
+    rows = (
+        transactions.order_by()
+        .values('bank_account')
+        .annotate(total=Sum(signed_amount_expression()))
+    )
+    return {row['bank_account']: row['total'] or ZERO for row in rows}
+
+
+def verify_balances(accounts=None):
+    """Lista (conta, saldo gravado, saldo esperado) das contas divergentes"""
+    if accounts is None:
+        accounts = BankAccount.objects.all()
+    expected = expected_balances(accounts)
+
+    mismatches = []
+    for account in accounts.only('id', 'user_id', 'balance').order_by('pk').iterator(chunk_size=2000):
+        balance = expected.get(account.pk, ZERO)
+        if account.balance != balance:
+            mismatches.append((account, account.balance, balance))
+    return mismatches
+
+
+def rebuild_balances(accounts=None, batch_size=500):
+    """
+    Regrava o saldo das contas divergentes e retorna quantas foram corrigidas.
+    As contas ficam bloqueadas do cálculo à gravação, então um
+    ``apply_balance_delta`` concorrente espera a correção em vez de ser
+    sobrescrito por ela.
+    """
+    if accounts is None:
+        accounts = BankAccount.objects.all()
+
+    with transaction.atomic():
+        list(accounts.select_for_update().order_by('pk').values_list('pk', flat=True))
+        mismatches = verify_balances(accounts)
+
+        # updated_at também muda para invalidar os validadores ETag das contas
+        now = timezone.now()
+        for account, _stored, balance in mismatches:
+            account.balance = balance
+            account.updated_at = now
+        BankAccount.objects.bulk_update(
+            [account for account, _stored, _balance in mismatches],
+            ['balance', 'updated_at'],
+            batch_size=batch_size,
+        )
+
+        user_ids = {account.user_id for account, _stored, _balance in mismatches}
+        if user_ids:
+            transactions_changed.send(sender=BankTransaction, user_ids=user_ids)
+    return len(mismatches)
+
+
+def expected_rollups(users=None):
+    """Consolidados mensais calculados diretamente a partir das transações"""
+    transactions = BankTransaction.objects.all()
+    if users is not None:
+        transactions = transactions.filter(user__in=users)
+
+    rows = (
+        transactions.order_by()
+        .annotate(month=TruncMonth('transaction_date'))
+        .values('user_id', 'bank_account_id', 'category_group_id', 'month')
+        .annotate(
+            total_income=Sum('amount', filter=Q(transaction_type='income'), default=ZERO),
+            total_expense=Sum('amount', filter=Q(transaction_type='expense'), default=ZERO),
+            transaction_count=Count('id'),
+        )
+    )
+    return {
+        (row['bank_account_id'], row['category_group_id'], row['month']): row
+        for row in rows
+    }
+
+
+def verify_rollups(users=None):
+    """Lista as chaves (conta, categoria, mês) cujo consolidado diverge"""
+    expected = expected_rollups(users)
+    stored = MonthlyRollup.objects.all()
+    if users is not None:
+        stored = stored.filter(user__in=users)
+
+    mismatches = []
+    for rollup in stored.values(
+        'bank_account_id', 'category_group_id', 'month',
+        'total_income', 'total_expense', 'transaction_count',
+    ).iterator(chunk_size=2000):
+        key = (rollup['bank_account_id'], rollup['category_group_id'], rollup['month'])
+        row = expected.pop(key, None)
+        if row is None or any(
+            rollup[field] != row[field]
+            for field in ('total_income', 'total_expense', 'transaction_count')
+        ):
+            mismatches.append(key)
+    mismatches.extend(expected.keys())
+    return mismatches
+
+
+@transaction.atomic
+def rebuild_rollups(users=None, batch_size=1000):
+    """Recria os consolidados mensais e retorna quantos foram gravados"""
+    stored = MonthlyRollup.objects.all()
+    if users is not None:
+        stored = stored.filter(user__in=users)
+    stored.delete()
+
+    rollups = [MonthlyRollup(**row) for row in expected_rollups(users).values()]
+    MonthlyRollup.objects.bulk_create(rollups, batch_size=batch_size)
+    return len(rollups)
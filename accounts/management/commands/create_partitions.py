@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.partitions import PARTITION_MONTHS_AHEAD, ensure_partitions, is_partitioned
+from accounts.periods import month_range
+
+
+class Command(BaseCommand):
+    help = 'Cria as partições mensais de transações que faltam (PostgreSQL)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--from',
+            dest='start',
+            help='Primeiro mês (YYYY-MM); o padrão é o mês atual',
+        )
+        parser.add_argument(
+            '--months-ahead',
+            type=int,
+            default=PARTITION_MONTHS_AHEAD,
+            help='Meses à frente do atual que já devem ter partição',
+        )
+
+    def handle(self, *args, **options):
+        if not is_partitioned():
+            self.stdout.write('A tabela de transações não é particionada neste banco; nada a fazer')
+            return
+
+        start = None
+        if options['start']:
+            try:
+                start = month_range(options['start'])[0]
+            except ValueError:
+                raise CommandError('Mês inválido. Use YYYY-MM')
+        if options['months_ahead'] < 0:
+            raise CommandError('--months-ahead não pode ser negativo')
+
+        created = ensure_partitions(start, options['months_ahead'])
+        for name in created:
+            self.stdout.write(f'{name} criada')
+        self.stdout.write(self.style.SUCCESS(f'{len(created)} partição(ões) criada(s)'))
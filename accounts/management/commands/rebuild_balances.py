@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.ledger import rebuild_balances, verify_balances
+from accounts.models import BankAccount
+
+
+class Command(BaseCommand):
+    help = 'Verifica e reconstrói o saldo gravado das contas bancárias a partir das transações'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Apenas verifica; termina com erro se houver saldos divergentes',
+        )
+        parser.add_argument(
+            '--user',
+            help='Restringe a verificação às contas de um usuário (username)',
+        )
+
+    def handle(self, *args, **options):
+        accounts = BankAccount.objects.all()
+        if options['user']:
+            accounts = accounts.filter(user__username=options['user'])
+
+        if options['check']:
+            mismatches = verify_balances(accounts)
+            for account, stored, expected in mismatches:
+                self.stdout.write(
+                    f"Conta {account.pk}: saldo gravado {stored}, esperado {expected}"
+                )
+            if mismatches:
+                raise CommandError(f"{len(mismatches)} conta(s) com saldo divergente")
+            self.stdout.write(self.style.SUCCESS('Todos os saldos estão consistentes'))
+            return
+
+        fixed = rebuild_balances(accounts)
+        self.stdout.write(self.style.SUCCESS(f"{fixed} saldo(s) corrigido(s)"))
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.ledger import rebuild_rollups, verify_rollups
+from accounts.models import User
+
+
+class Command(BaseCommand):
+    help = 'Verifica e reconstrói os consolidados mensais a partir das transações'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Apenas verifica; termina com erro se houver consolidados divergentes',
+        )
+        parser.add_argument(
+            '--user',
+            help='Restringe a verificação aos consolidados de um usuário (username)',
+        )
+
+    def handle(self, *args, **options):
+        users = None
+        if options['user']:
+            users = User.objects.filter(username=options['user'])
+
+        if options['check']:
+            mismatches = verify_rollups(users)
+            for bank_account_id, category_group_id, month in mismatches:
+                self.stdout.write(
+                    f"Conta {bank_account_id}, categoria {category_group_id}, mês {month:%Y-%m}: divergente"
+                )
+            if mismatches:
+                raise CommandError(f"{len(mismatches)} consolidado(s) divergente(s)")
+            self.stdout.write(self.style.SUCCESS('Todos os consolidados estão consistentes'))
+            return
+
+        total = rebuild_rollups(users)
+        self.stdout.write(self.style.SUCCESS(f"{total} consolidado(s) reconstruído(s)"))
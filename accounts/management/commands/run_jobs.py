@@ -0,0 +1,52 @@
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from accounts.jobs import claim_job, run_job, run_pending, worker_id
+
+
+class Command(BaseCommand):
+    help = 'Worker da fila de tarefas em segundo plano (exclusões, recálculos)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Executa as tarefas disponíveis e termina, em vez de aguardar novas',
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=1.0,
+            help='Segundos entre consultas à fila quando ela está vazia',
+        )
+
+    def handle(self, *args, **options):
+        worker = worker_id()
+        if options['once']:
+            count = run_pending(worker=worker)
+            self.stdout.write(self.style.SUCCESS(f'{count} tarefa(s) executada(s)'))
+            return
+
+        self.stopping = False
+
+        def stop(signum, frame):
+            # Termina a tarefa atual antes de sair
+            self.stopping = True
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+
+        self.stdout.write(f'Worker {worker} aguardando tarefas')
+        while not self.stopping:
+            # Descarta conexões vencidas (CONN_MAX_AGE), como ao fim de uma requisição
+            close_old_connections()
+            claimed = claim_job(worker)
+            if claimed is None:
+                time.sleep(options['sleep'])
+                continue
+            run_job(claimed)
+            self.stdout.write(f'Tarefa {claimed.pk} ({claimed.kind}): {claimed.status}')
+        self.stdout.write('Worker encerrado')
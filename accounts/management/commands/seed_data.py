@@ -0,0 +1,54 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.seeding import SEED_BATCH_SIZE, SEED_PASSWORD, SeedError, clear_seed_data, seed
+
+
+class Command(BaseCommand):
+    help = 'Gera usuários, contas, categorias e transações sintéticos para testes de carga'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10, help='Quantidade de usuários')
+        parser.add_argument('--accounts', type=int, default=3, help='Contas bancárias por usuário')
+        parser.add_argument('--categories', type=int, default=8, help='Categorias por usuário')
+        parser.add_argument('--years', type=int, default=2, help='Anos de histórico até o mês atual')
+        parser.add_argument(
+            '--transactions-per-month', type=int, default=60,
+            help='Média de despesas por usuário e mês (receitas são somadas a isso)',
+        )
+        parser.add_argument('--prefix', default='seed', help='Prefixo dos nomes de usuário gerados')
+        parser.add_argument('--seed', type=int, default=0, help='Semente do gerador (mesma semente, mesmos dados)')
+        parser.add_argument('--batch-size', type=int, default=SEED_BATCH_SIZE)
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            help='Remove antes os usuários gerados com o mesmo prefixo (<prefixo>00001...) e todos os seus dados',
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        try:
+            if options['clear']:
+                deleted = clear_seed_data(options['prefix'])
+                self.stdout.write(f"{deleted} transação(ões) removida(s)")
+
+            counts = seed(
+                users=options['users'],
+                accounts=options['accounts'],
+                categories=options['categories'],
+                years=options['years'],
+                transactions_per_month=options['transactions_per_month'],
+                prefix=options['prefix'],
+                random_seed=options['seed'],
+                batch_size=options['batch_size'],
+            )
+        except SeedError as exc:
+            raise CommandError(str(exc))
+
+        elapsed = time.perf_counter() - start
+        for name, count in counts.items():
+            self.stdout.write(f"{name}: {count}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Dados gerados em {elapsed:.1f}s (senha dos usuários: '{SEED_PASSWORD}')"
+        ))
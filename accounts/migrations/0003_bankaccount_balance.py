@@ -0,0 +1,39 @@
+# Generated by Django 5.0.2 on 2026-10-18 11:31
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Case, DecimalField, F, Sum, When
+
+
+def populate_balances(apps, schema_editor):
+    BankAccount = apps.get_model('accounts', 'BankAccount')
+    BankTransaction = apps.get_model('accounts', 'BankTransaction')
+
+    signed_amount = Case(
+        When(transaction_type='income', then=F('amount')),
+        default=-F('amount'),
+        output_field=DecimalField(max_digits=14, decimal_places=2),
+    )
+    totals = (
+        BankTransaction.objects.order_by()
+        .values('bank_account')
+        .annotate(total=Sum(signed_amount))
+    )
+    for row in totals.iterator():
+        BankAccount.objects.filter(pk=row['bank_account']).update(balance=row['total'] or Decimal('0.00'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_bankaccount_categorygroup_banktransaction'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bankaccount',
+            name='balance',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14, verbose_name='Saldo'),
+        ),
+        migrations.RunPython(populate_balances, migrations.RunPython.noop),
+    ]
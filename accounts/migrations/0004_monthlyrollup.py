@@ -0,0 +1,58 @@
+# Generated by Django 5.0.2 on 2026-10-18 11:32
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncMonth
+
+
+def populate_rollups(apps, schema_editor):
+    BankTransaction = apps.get_model('accounts', 'BankTransaction')
+    MonthlyRollup = apps.get_model('accounts', 'MonthlyRollup')
+
+    rows = (
+        BankTransaction.objects.order_by()
+        .annotate(month=TruncMonth('transaction_date'))
+        .values('user_id', 'bank_account_id', 'category_group_id', 'month')
+        .annotate(
+            total_income=Sum('amount', filter=Q(transaction_type='income'), default=Decimal('0.00')),
+            total_expense=Sum('amount', filter=Q(transaction_type='expense'), default=Decimal('0.00')),
+            transaction_count=Count('id'),
+        )
+    )
+    MonthlyRollup.objects.bulk_create(
+        (MonthlyRollup(**row) for row in rows.iterator()),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_bankaccount_balance'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(verbose_name='Mês')),
+                ('total_income', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14, verbose_name='Total de Receitas')),
+                ('total_expense', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14, verbose_name='Total de Despesas')),
+                ('transaction_count', models.PositiveIntegerField(default=0, verbose_name='Quantidade de Transações')),
+                ('bank_account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_rollups', to='accounts.bankaccount')),
+                ('category_group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_rollups', to='accounts.categorygroup')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Consolidado Mensal',
+                'verbose_name_plural': 'Consolidados Mensais',
+                'indexes': [models.Index(fields=['user', 'month'], name='rollup_user_month_idx')],
+                'unique_together': {('bank_account', 'category_group', 'month')},
+            },
+        ),
+        migrations.RunPython(populate_rollups, migrations.RunPython.noop),
+    ]
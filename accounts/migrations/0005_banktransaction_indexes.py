@@ -0,0 +1,21 @@
+# Generated by Django 5.0.2 on 2026-10-18 11:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_monthlyrollup'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='banktransaction',
+            index=models.Index(fields=['user', 'transaction_date', 'created_at', 'id'], name='txn_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='banktransaction',
+            index=models.Index(fields=['bank_account', 'transaction_type'], include=('amount',), name='txn_account_type_idx'),
+        ),
+    ]
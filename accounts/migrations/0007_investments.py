@@ -0,0 +1,71 @@
+# Generated by Django 5.0.2 on 2026-10-18 12:24
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_revokedtoken'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Investment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='Nome do Investimento')),
+                ('investment_type', models.CharField(choices=[('stock', 'Ações'), ('bond', 'Renda Fixa'), ('crypto', 'Criptomoedas'), ('real_estate', 'Imóveis'), ('other', 'Outros')], default='stock', max_length=20, verbose_name='Tipo')),
+                ('initial_value', models.DecimalField(decimal_places=2, max_digits=14, verbose_name='Valor Inicial')),
+                ('purchase_date', models.DateField(verbose_name='Data da Compra')),
+                ('description', models.TextField(blank=True, verbose_name='Descrição')),
+                ('status', models.CharField(choices=[('active', 'Ativo'), ('sold', 'Vendido'), ('closed', 'Encerrado')], default='active', max_length=10, verbose_name='Status')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='investments', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Investimento',
+                'verbose_name_plural': 'Investimentos',
+                'ordering': ['-purchase_date', '-id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Contribution',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=14, verbose_name='Valor')),
+                ('contribution_date', models.DateField(verbose_name='Data do Aporte')),
+                ('note', models.CharField(blank=True, max_length=200, verbose_name='Observação')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('investment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='contributions', to='accounts.investment')),
+            ],
+            options={
+                'verbose_name': 'Aporte',
+                'verbose_name_plural': 'Aportes',
+                'ordering': ['contribution_date', 'id'],
+                'indexes': [models.Index(fields=['investment', 'contribution_date'], name='contribution_inv_date_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='YieldEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('percentage', models.DecimalField(decimal_places=4, max_digits=9, verbose_name='Percentual')),
+                ('event_date', models.DateField(verbose_name='Data do Rendimento')),
+                ('note', models.CharField(blank=True, max_length=200, verbose_name='Observação')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('investment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='yield_events', to='accounts.investment')),
+            ],
+            options={
+                'verbose_name': 'Rendimento',
+                'verbose_name_plural': 'Rendimentos',
+                'ordering': ['event_date', 'id'],
+                'indexes': [models.Index(fields=['investment', 'event_date'], name='yield_inv_date_idx')],
+            },
+        ),
+    ]
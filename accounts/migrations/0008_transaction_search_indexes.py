@@ -0,0 +1,47 @@
+"""
+Índices GIN da busca em ``BankTransaction.description`` (ver accounts/search.py).
+
+Só existem no PostgreSQL, por isso são criados aqui e não em ``Meta.indexes``.
+O índice de trigramas depende da extensão ``pg_trgm`` e é omitido quando ela
+não está disponível no servidor; a busca usa então só o texto completo.
+"""
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+
+SEARCH_INDEX = GinIndex(SearchVector('description', config='portuguese'), name='txn_description_search_idx')
+TRIGRAM_INDEX = GinIndex(fields=['description'], opclasses=['gin_trgm_ops'], name='txn_description_trgm_idx')
+
+
+def _trigram_available(schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        return cursor.fetchone() is not None
+
+
+def create_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    model = apps.get_model('accounts', 'BankTransaction')
+    schema_editor.add_index(model, SEARCH_INDEX)
+    if _trigram_available(schema_editor):
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        schema_editor.add_index(model, TRIGRAM_INDEX)
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for index in (TRIGRAM_INDEX, SEARCH_INDEX):
+        schema_editor.execute(f'DROP INDEX IF EXISTS {schema_editor.quote_name(index.name)}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0007_investments'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
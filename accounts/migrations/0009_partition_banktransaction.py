@@ -0,0 +1,112 @@
+"""
+Particiona ``accounts_banktransaction`` por mês de ``transaction_date``
+(particionamento declarativo do PostgreSQL; ver accounts/partitions.py).
+
+A tabela atual é renomeada e os dados são copiados para a nova tabela
+particionada, que recebe uma partição por mês desde a transação mais antiga
+até ``MONTHS_AHEAD`` meses à frente, além da partição ``default`` para datas
+fora desse intervalo. Índices e chaves estrangeiras são recriados depois da
+cópia, com as mesmas definições. A chave primária passa a ser
+``(id, transaction_date)``, como o PostgreSQL exige; o Django continua
+usando só ``id``, que segue vindo da mesma sequência.
+
+Nos demais bancos a migração não faz nada.
+"""
+from datetime import date
+
+from django.db import migrations
+from django.utils import timezone
+
+TABLE = 'accounts_banktransaction'
+LEGACY_TABLE = f'{TABLE}_legacy'
+MONTHS_AHEAD = 12
+
+
+def _next_month(month):
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def _table_definition(cursor):
+    """Definições dos índices (exceto a chave primária) e das chaves estrangeiras"""
+    cursor.execute(
+        "SELECT indexdef FROM pg_indexes WHERE schemaname = current_schema() AND tablename = %s "
+        "AND indexname <> %s ORDER BY indexname",
+        [TABLE, f'{TABLE}_pkey'],
+    )
+    # Índices de tabelas particionadas aparecem como "ON ONLY"
+    indexes = [row[0].replace(' ON ONLY ', ' ON ') for row in cursor.fetchall()]
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = %s::regclass AND contype = 'f' ORDER BY conname",
+        [TABLE],
+    )
+    return indexes, cursor.fetchall()
+
+
+def _rebuild(schema_editor, partitioned):
+    quote = schema_editor.quote_name
+    with schema_editor.connection.cursor() as cursor:
+        indexes, foreign_keys = _table_definition(cursor)
+
+        schema_editor.execute(f'ALTER TABLE {quote(TABLE)} RENAME TO {quote(LEGACY_TABLE)}')
+        partition_clause = ' PARTITION BY RANGE (transaction_date)' if partitioned else ''
+        schema_editor.execute(
+            f'CREATE TABLE {quote(TABLE)} (LIKE {quote(LEGACY_TABLE)} INCLUDING DEFAULTS INCLUDING IDENTITY)'
+            f'{partition_clause}'
+        )
+
+        if partitioned:
+            cursor.execute(f'SELECT MIN(transaction_date) FROM {quote(LEGACY_TABLE)}')
+            oldest = cursor.fetchone()[0]
+            today = timezone.localdate()
+            month = (oldest or today).replace(day=1)
+            last = today.replace(day=1)
+            for _ in range(MONTHS_AHEAD):
+                last = _next_month(last)
+            while month <= last:
+                following = _next_month(month)
+                schema_editor.execute(
+                    f'CREATE TABLE {quote(f"{TABLE}_p{month:%Y_%m}")} PARTITION OF {quote(TABLE)} '
+                    f"FOR VALUES FROM ('{month.isoformat()}') TO ('{following.isoformat()}')"
+                )
+                month = following
+            schema_editor.execute(f'CREATE TABLE {quote(f"{TABLE}_default")} PARTITION OF {quote(TABLE)} DEFAULT')
+
+        schema_editor.execute(f'INSERT INTO {quote(TABLE)} SELECT * FROM {quote(LEGACY_TABLE)}')
+        schema_editor.execute(f'DROP TABLE {quote(LEGACY_TABLE)}')
+
+        # A sequência nova continua de onde a antiga parou e recebe o nome original
+        cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [TABLE])
+        sequence = cursor.fetchone()[0]
+        cursor.execute(f'SELECT setval(%s, COALESCE(MAX(id), 0) + 1, false) FROM {quote(TABLE)}', [sequence])
+        schema_editor.execute(f'ALTER SEQUENCE {sequence} RENAME TO {quote(f"{TABLE}_id_seq")}')
+
+        primary_key = 'id, transaction_date' if partitioned else 'id'
+        schema_editor.execute(
+            f'ALTER TABLE {quote(TABLE)} ADD CONSTRAINT {quote(f"{TABLE}_pkey")} PRIMARY KEY ({primary_key})'
+        )
+        for definition in indexes:
+            schema_editor.execute(definition)
+        for name, definition in foreign_keys:
+            schema_editor.execute(f'ALTER TABLE {quote(TABLE)} ADD CONSTRAINT {quote(name)} {definition}')
+
+
+def partition_transactions(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        _rebuild(schema_editor, partitioned=True)
+
+
+def unpartition_transactions(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        _rebuild(schema_editor, partitioned=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0008_transaction_search_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_transactions, unpartition_transactions),
+    ]
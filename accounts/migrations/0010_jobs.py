@@ -0,0 +1,46 @@
+# Generated by Django 5.0.2 on 2026-10-18 12:43
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0009_partition_banktransaction'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=50, verbose_name='Tipo')),
+                ('key', models.CharField(blank=True, max_length=100, verbose_name='Chave')),
+                ('payload', models.JSONField(blank=True, default=dict)),
+                ('status', models.CharField(choices=[('queued', 'Na fila'), ('running', 'Em execução'), ('succeeded', 'Concluída'), ('failed', 'Falhou')], default='queued', max_length=10, verbose_name='Status')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Tentativas')),
+                ('max_attempts', models.PositiveSmallIntegerField(default=3, verbose_name='Máximo de Tentativas')),
+                ('progress', models.PositiveIntegerField(default=0, verbose_name='Progresso')),
+                ('progress_total', models.PositiveIntegerField(blank=True, null=True, verbose_name='Total')),
+                ('result', models.JSONField(blank=True, null=True)),
+                ('error', models.TextField(blank=True, verbose_name='Erro')),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Executar a partir de')),
+                ('locked_by', models.CharField(blank=True, max_length=100)),
+                ('locked_at', models.DateTimeField(blank=True, null=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Tarefa',
+                'verbose_name_plural': 'Tarefas',
+                'ordering': ['-created_at', '-id'],
+                'indexes': [models.Index(condition=models.Q(('status__in', ['queued', 'running'])), fields=['run_after', 'id'], name='job_queue_idx'), models.Index(fields=['user', 'created_at'], name='job_user_idx'), models.Index(fields=['kind', 'key'], name='job_kind_key_idx')],
+            },
+        ),
+    ]
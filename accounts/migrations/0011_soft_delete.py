@@ -0,0 +1,35 @@
+# Generated by Django 5.0.2 on 2026-10-18 12:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0010_jobs'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='bankaccount',
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name='bankaccount',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Excluída em'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Excluído em'),
+        ),
+        migrations.AddIndex(
+            model_name='bankaccount',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', False)), fields=['deleted_at'], name='account_deleted_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='bankaccount',
+            constraint=models.UniqueConstraint(condition=models.Q(('deleted_at__isnull', True)), fields=('user', 'name'), name='bank_account_user_name_uniq'),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.0.2 on 2026-10-18 12:53
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0011_soft_delete'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecurringTransaction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('transaction_type', models.CharField(choices=[('income', 'Receita'), ('expense', 'Despesa')], max_length=10, verbose_name='Tipo')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Valor')),
+                ('description', models.CharField(max_length=200, verbose_name='Descrição')),
+                ('frequency', models.CharField(choices=[('daily', 'Diária'), ('weekly', 'Semanal'), ('monthly', 'Mensal'), ('yearly', 'Anual')], max_length=10, verbose_name='Frequência')),
+                ('interval', models.PositiveSmallIntegerField(default=1, verbose_name='Intervalo')),
+                ('start_date', models.DateField(verbose_name='Início')),
+                ('end_date', models.DateField(blank=True, null=True, verbose_name='Fim')),
+                ('max_occurrences', models.PositiveIntegerField(blank=True, null=True, verbose_name='Máximo de Ocorrências')),
+                ('occurrence_count', models.PositiveIntegerField(default=0, verbose_name='Ocorrências')),
+                ('next_run', models.DateField(blank=True, null=True, verbose_name='Próxima Ocorrência')),
+                ('is_active', models.BooleanField(default=True, verbose_name='Ativa')),
+                ('last_run_at', models.DateTimeField(blank=True, null=True, verbose_name='Última Execução')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('bank_account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recurring_transactions', to='accounts.bankaccount')),
+                ('category_group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recurring_transactions', to='accounts.categorygroup')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recurring_transactions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Transação Recorrente',
+                'verbose_name_plural': 'Transações Recorrentes',
+                'ordering': ['next_run', 'id'],
+            },
+        ),
+        migrations.AddField(
+            model_name='banktransaction',
+            name='recurring',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='transactions', to='accounts.recurringtransaction'),
+        ),
+        migrations.AddConstraint(
+            model_name='banktransaction',
+            constraint=models.UniqueConstraint(condition=models.Q(('recurring__isnull', False)), fields=('recurring', 'transaction_date'), name='txn_recurring_date_uniq'),
+        ),
+        migrations.AddIndex(
+            model_name='recurringtransaction',
+            index=models.Index(condition=models.Q(('is_active', True), ('next_run__isnull', False)), fields=['next_run', 'id'], name='recurring_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recurringtransaction',
+            index=models.Index(fields=['user', 'next_run'], name='recurring_user_idx'),
+        ),
+    ]
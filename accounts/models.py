@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import AbstractUser
 from django.utils import timezone
 from decimal import Decimal
@@ -10,6 +10,9 @@ class User(AbstractUser):
     )
 
     user_type = models.CharField(max_length=10, choices=USER_TYPE_CHOICES, default='user')
+    # Exclusão em andamento: o usuário fica inativo e some das listagens até
+    # o histórico ser apagado em segundo plano (ver deletion.py)
+    deleted_at = models.DateTimeField(null=True, blank=True, verbose_name='Excluído em')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -20,35 +23,45 @@ class User(AbstractUser):
     def __str__(self):
         return self.username
 
+class BankAccountManager(models.Manager):
+    """Esconde as contas com exclusão em andamento"""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
 class BankAccount(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='bank_accounts')
     name = models.CharField(max_length=100, verbose_name='Nome da Conta')
     color = models.CharField(max_length=7, default='#0066CC', verbose_name='Cor')
     is_active = models.BooleanField(default=True, verbose_name='Ativa')
+    balance = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'), verbose_name='Saldo')
+    deleted_at = models.DateTimeField(null=True, blank=True, verbose_name='Excluída em')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = BankAccountManager()
+    all_objects = models.Manager()
+
     class Meta:
         verbose_name = 'Conta Bancária'
         verbose_name_plural = 'Contas Bancárias'
-        unique_together = ['user', 'name']
+        constraints = [
+            # O nome fica livre assim que a exclusão começa
+            models.UniqueConstraint(
+                fields=['user', 'name'], condition=models.Q(deleted_at__isnull=True), name='bank_account_user_name_uniq',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['deleted_at'], name='account_deleted_idx', condition=models.Q(deleted_at__isnull=False)),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.name}"
 
     @property
     def current_balance(self):
-        """Calcula o saldo atual da conta"""
-        transactions = self.transactions.all()
-        balance = Decimal('0.00')
-        
-        for transaction in transactions:
-            if transaction.transaction_type == 'income':
-                balance += transaction.amount
-            else:
-                balance -= transaction.amount
-        
-        return balance
+        """Retorna o saldo atual da conta (mantido a cada alteração de transação)"""
+        return self.balance
 
 class CategoryGroup(models.Model):
     TRANSACTION_TYPE_CHOICES = (
@@ -72,6 +85,14 @@ class CategoryGroup(models.Model):
     def __str__(self):
         return f"{self.user.username} - {self.name} ({self.get_transaction_type_display()})"
 
+class BankAccountChildManager(models.Manager):
+    """Esconde os registros (transações, recorrências) de contas com exclusão em andamento"""
+
+    def get_queryset(self):
+        # Subconsulta pequena: o índice parcial só tem as contas sendo excluídas
+        deleted = BankAccount.all_objects.filter(deleted_at__isnull=False).values('pk')
+        return super().get_queryset().exclude(bank_account_id__in=deleted)
+
 class BankTransaction(models.Model):
     TRANSACTION_TYPE_CHOICES = (
         ('income', 'Receita'),
@@ -85,17 +106,49 @@ class BankTransaction(models.Model):
     amount = models.DecimalField(max_digits=10, decimal_places=2, verbose_name='Valor')
     description = models.CharField(max_length=200, verbose_name='Descrição')
     transaction_date = models.DateField(verbose_name='Data da Transação')
+    # Regra que gerou a transação; o índice único abaixo cobre as consultas por ela
+    recurring = models.ForeignKey(
+        'RecurringTransaction', on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='transactions', db_index=False,
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = BankAccountChildManager()
+    all_objects = models.Manager()
+
+    # No PostgreSQL a tabela é particionada por mês de transaction_date e a
+    # chave primária é (id, transaction_date) (migração 0009, partitions.py)
     class Meta:
         verbose_name = 'Transação Bancária'
         verbose_name_plural = 'Transações Bancárias'
         ordering = ['-transaction_date', '-created_at']
+        indexes = [
+            # Listagens por usuário e intervalo de datas, na ordem de Meta.ordering
+            models.Index(fields=['user', 'transaction_date', 'created_at', 'id'], name='txn_user_date_idx'),
+            # Cálculo de saldos por conta (cobre o valor para leituras só de índice)
+            models.Index(fields=['bank_account', 'transaction_type'], include=['amount'], name='txn_account_type_idx'),
+            # Os índices GIN da busca em description só existem no PostgreSQL
+            # e são criados na migração 0008 (ver search.py)
+        ]
+        constraints = [
+            # Chave de idempotência das recorrências: uma ocorrência por regra e data
+            models.UniqueConstraint(
+                fields=['recurring', 'transaction_date'], condition=models.Q(recurring__isnull=False),
+                name='txn_recurring_date_uniq',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.description} ({self.amount})"
 
+    def save(self, *args, **kwargs):
+        # Os sinais do livro-razão (signals.py) bloqueiam a linha gravada no
+        # pre_save e aplicam a diferença no post_save: os dois e o UPDATE
+        # precisam estar na mesma transação do banco
+        with transaction.atomic(using=kwargs.get('using'), savepoint=False):
+            super().save(*args, **kwargs)
+
     @property
     def month_year(self):
         """Retorna o mês/ano da transação para agrupamento"""
@@ -113,3 +166,210 @@ class BankTransaction(models.Model):
             return f"+R$ {self.amount:,.2f}"
         else:
             return f"-R$ {self.amount:,.2f}"
+
+class RecurringTransaction(models.Model):
+    """Regra que gera transações periodicamente (ver recurring.py)"""
+    TRANSACTION_TYPE_CHOICES = BankTransaction.TRANSACTION_TYPE_CHOICES
+    FREQUENCY_CHOICES = (
+        ('daily', 'Diária'),
+        ('weekly', 'Semanal'),
+        ('monthly', 'Mensal'),
+        ('yearly', 'Anual'),
+    )
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='recurring_transactions')
+    bank_account = models.ForeignKey(BankAccount, on_delete=models.CASCADE, related_name='recurring_transactions')
+    category_group = models.ForeignKey(CategoryGroup, on_delete=models.CASCADE, related_name='recurring_transactions')
+    transaction_type = models.CharField(max_length=10, choices=TRANSACTION_TYPE_CHOICES, verbose_name='Tipo')
+    amount = models.DecimalField(max_digits=10, decimal_places=2, verbose_name='Valor')
+    description = models.CharField(max_length=200, verbose_name='Descrição')
+    frequency = models.CharField(max_length=10, choices=FREQUENCY_CHOICES, verbose_name='Frequência')
+    interval = models.PositiveSmallIntegerField(default=1, verbose_name='Intervalo')
+    start_date = models.DateField(verbose_name='Início')
+    end_date = models.DateField(null=True, blank=True, verbose_name='Fim')
+    max_occurrences = models.PositiveIntegerField(null=True, blank=True, verbose_name='Máximo de Ocorrências')
+    # Posição (a partir de 0) e data da próxima ocorrência; sem data, a regra terminou
+    occurrence_count = models.PositiveIntegerField(default=0, verbose_name='Ocorrências')
+    next_run = models.DateField(null=True, blank=True, verbose_name='Próxima Ocorrência')
+    is_active = models.BooleanField(default=True, verbose_name='Ativa')
+    last_run_at = models.DateTimeField(null=True, blank=True, verbose_name='Última Execução')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = BankAccountChildManager()
+    all_objects = models.Manager()
+
+    class Meta:
+        verbose_name = 'Transação Recorrente'
+        verbose_name_plural = 'Transações Recorrentes'
+        ordering = ['next_run', 'id']
+        indexes = [
+            # Regras vencidas: só as ativas e não terminadas entram no índice
+            models.Index(
+                fields=['next_run', 'id'], name='recurring_due_idx',
+                condition=models.Q(is_active=True, next_run__isnull=False),
+            ),
+            models.Index(fields=['user', 'next_run'], name='recurring_user_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.description} ({self.get_frequency_display()})"
+
+class MonthlyRollup(models.Model):
+    """Totais pré-agregados por usuário, conta, categoria e mês"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='monthly_rollups')
+    bank_account = models.ForeignKey(BankAccount, on_delete=models.CASCADE, related_name='monthly_rollups')
+    category_group = models.ForeignKey(CategoryGroup, on_delete=models.CASCADE, related_name='monthly_rollups')
+    month = models.DateField(verbose_name='Mês')
+    total_income = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'), verbose_name='Total de Receitas')
+    total_expense = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'), verbose_name='Total de Despesas')
+    transaction_count = models.PositiveIntegerField(default=0, verbose_name='Quantidade de Transações')
+
+    class Meta:
+        verbose_name = 'Consolidado Mensal'
+        verbose_name_plural = 'Consolidados Mensais'
+        unique_together = ['bank_account', 'category_group', 'month']
+        indexes = [
+            models.Index(fields=['user', 'month'], name='rollup_user_month_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.month:%Y-%m} ({self.bank_account_id}/{self.category_group_id})"
+
+class RevokedToken(models.Model):
+    """Tokens JWT revogados antes de expirar (logout ou renovação)"""
+    jti = models.CharField(max_length=64, unique=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='revoked_tokens')
+    expires_at = models.DateTimeField(db_index=True, verbose_name='Expira em')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Token Revogado'
+        verbose_name_plural = 'Tokens Revogados'
+
+    def __str__(self):
+        return f"{self.user_id} - {self.jti}"
+
+class Investment(models.Model):
+    INVESTMENT_TYPE_CHOICES = (
+        ('stock', 'Ações'),
+        ('bond', 'Renda Fixa'),
+        ('crypto', 'Criptomoedas'),
+        ('real_estate', 'Imóveis'),
+        ('other', 'Outros'),
+    )
+    STATUS_CHOICES = (
+        ('active', 'Ativo'),
+        ('sold', 'Vendido'),
+        ('closed', 'Encerrado'),
+    )
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='investments')
+    name = models.CharField(max_length=100, verbose_name='Nome do Investimento')
+    investment_type = models.CharField(max_length=20, choices=INVESTMENT_TYPE_CHOICES, default='stock', verbose_name='Tipo')
+    initial_value = models.DecimalField(max_digits=14, decimal_places=2, verbose_name='Valor Inicial')
+    purchase_date = models.DateField(verbose_name='Data da Compra')
+    description = models.TextField(blank=True, verbose_name='Descrição')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='active', verbose_name='Status')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Investimento'
+        verbose_name_plural = 'Investimentos'
+        ordering = ['-purchase_date', '-id']
+
+    def __str__(self):
+        return f"{self.user.username} - {self.name}"
+
+class Contribution(models.Model):
+    """Aporte feito em um investimento depois da compra inicial"""
+    investment = models.ForeignKey(Investment, on_delete=models.CASCADE, related_name='contributions')
+    amount = models.DecimalField(max_digits=14, decimal_places=2, verbose_name='Valor')
+    contribution_date = models.DateField(verbose_name='Data do Aporte')
+    note = models.CharField(max_length=200, blank=True, verbose_name='Observação')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Aporte'
+        verbose_name_plural = 'Aportes'
+        ordering = ['contribution_date', 'id']
+        indexes = [
+            models.Index(fields=['investment', 'contribution_date'], name='contribution_inv_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.investment.name} - {self.contribution_date} ({self.amount})"
+
+class YieldEvent(models.Model):
+    """Rendimento (ou perda) percentual sobre o valor do investimento na data"""
+    investment = models.ForeignKey(Investment, on_delete=models.CASCADE, related_name='yield_events')
+    percentage = models.DecimalField(max_digits=9, decimal_places=4, verbose_name='Percentual')
+    event_date = models.DateField(verbose_name='Data do Rendimento')
+    note = models.CharField(max_length=200, blank=True, verbose_name='Observação')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Rendimento'
+        verbose_name_plural = 'Rendimentos'
+        ordering = ['event_date', 'id']
+        indexes = [
+            models.Index(fields=['investment', 'event_date'], name='yield_inv_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.investment.name} - {self.event_date} ({self.percentage}%)"
+
+class Job(models.Model):
+    """Tarefa executada em segundo plano pelos workers (ver jobs.py)"""
+    STATUS_CHOICES = (
+        ('queued', 'Na fila'),
+        ('running', 'Em execução'),
+        ('succeeded', 'Concluída'),
+        ('failed', 'Falhou'),
+    )
+
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs')
+    kind = models.CharField(max_length=50, verbose_name='Tipo')
+    # Identifica o alvo da tarefa (ex.: "bank_account:12"); evita duplicar tarefas pendentes
+    key = models.CharField(max_length=100, blank=True, verbose_name='Chave')
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued', verbose_name='Status')
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name='Tentativas')
+    max_attempts = models.PositiveSmallIntegerField(default=3, verbose_name='Máximo de Tentativas')
+    progress = models.PositiveIntegerField(default=0, verbose_name='Progresso')
+    progress_total = models.PositiveIntegerField(null=True, blank=True, verbose_name='Total')
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True, verbose_name='Erro')
+    run_after = models.DateTimeField(default=timezone.now, verbose_name='Executar a partir de')
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Tarefa'
+        verbose_name_plural = 'Tarefas'
+        ordering = ['-created_at', '-id']
+        constraints = [
+            # Uma só tarefa pendente por tipo e chave, mesmo com requisições simultâneas
+            models.UniqueConstraint(
+                fields=['kind', 'key'], condition=models.Q(status__in=['queued', 'running']) & ~models.Q(key=''),
+                name='job_pending_key_uniq',
+            ),
+        ]
+        indexes = [
+            # Próxima tarefa da fila: só as pendentes entram no índice
+            models.Index(
+                fields=['run_after', 'id'], name='job_queue_idx',
+                condition=models.Q(status__in=['queued', 'running']),
+            ),
+            models.Index(fields=['user', 'created_at'], name='job_user_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk} ({self.status})"
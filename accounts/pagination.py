@@ -0,0 +1,152 @@
+"""
+Paginação por chave (keyset) para a listagem de transações.
+
+Em vez de OFFSET, cada página filtra a partir da última linha da página
+anterior na ordenação ``(-transaction_date, -created_at, -id)``, de modo que
+o custo de buscar a página N não cresce com N. O filtro é uma comparação de
+linhas, ``(transaction_date, created_at, id) < (...)``, que o PostgreSQL usa
+como limite do índice ``txn_user_date_idx``; a forma equivalente com OR só
+serve de filtro e lê todas as linhas mais novas antes de chegar à página.
+"""
+from datetime import date, datetime
+from operator import attrgetter
+
+from django.conf import settings
+from django.core import signing
+from django.db.models import F, Field, Func, Value
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+TRANSACTION_ORDERING = ('-transaction_date', '-created_at', '-id')
+
+
+class RowValue(Func):
+    """Valor de linha ``(a, b, c)``; comparações seguem a ordem lexicográfica"""
+    function = ''
+    template = '(%(expressions)s)'
+    output_field = Field()
+
+
+class TransactionCursorPagination:
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    cursor_salt = 'accounts.transactions.cursor'
+
+    def __init__(self, cursor_key=attrgetter('transaction_date', 'created_at', 'pk')):
+        # Extrai (transaction_date, created_at, id) da linha; permite paginar
+        # tuplas de values_list além de instâncias
+        self.cursor_key = cursor_key
+
+    def get_page_size(self, request):
+        default = settings.TRANSACTIONS_PAGE_SIZE
+        value = request.query_params.get(self.page_size_query_param)
+        if not value:
+            return default
+        try:
+            page_size = int(value)
+        except ValueError:
+            raise ValidationError({'page_size': 'Tamanho de página inválido.'})
+        if page_size < 1:
+            raise ValidationError({'page_size': 'Tamanho de página inválido.'})
+        return min(page_size, settings.TRANSACTIONS_MAX_PAGE_SIZE)
+
+    def encode_cursor(self, row):
+        """Gera um cursor opaco a partir da última transação da página"""
+        transaction_date, created_at, pk = self.cursor_key(row)
+        return signing.dumps(
+            [transaction_date.isoformat(), created_at.isoformat(), pk],
+            salt=self.cursor_salt,
+            compress=True,
+        )
+
+    def decode_cursor(self, request):
+        value = request.query_params.get(self.cursor_query_param)
+        if not value:
+            return None
+        try:
+            transaction_date, created_at, pk = signing.loads(value, salt=self.cursor_salt)
+            return date.fromisoformat(transaction_date), datetime.fromisoformat(created_at), int(pk)
+        except (signing.BadSignature, TypeError, ValueError):
+            raise ValidationError({'cursor': 'Cursor inválido.'})
+
+    def _page_queryset(self, queryset, request):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        queryset = queryset.order_by(*TRANSACTION_ORDERING)
+
+        cursor = self.decode_cursor(request)
+        if cursor:
+            transaction_date, created_at, pk = cursor
+            queryset = queryset.alias(
+                cursor_key=RowValue(F('transaction_date'), F('created_at'), F('pk')),
+            ).filter(
+                cursor_key__lt=RowValue(Value(transaction_date), Value(created_at), Value(pk)),
+                # Redundante, mas permite descartar as partições mais novas
+                transaction_date__lte=transaction_date,
+            )
+
+        # Busca uma linha a mais para saber se existe próxima página
+        return queryset[:self.page_size + 1]
+
+    def _build_page(self, rows):
+        self.has_next = len(rows) > self.page_size
+        page = rows[:self.page_size]
+        self.next_cursor = self.encode_cursor(page[-1]) if self.has_next else None
+        return page
+
+    def paginate_queryset(self, queryset, request):
+        return self._build_page(list(self._page_queryset(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request):
+        """Versão assíncrona de ``paginate_queryset``"""
+        rows = [row async for row in self._page_queryset(queryset, request)]
+        return self._build_page(rows)
+
+    def get_next_link(self, url=None):
+        """Link da próxima página; ``url`` permite apontar para outro endpoint"""
+        if not self.next_cursor:
+            return None
+        url = url or self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+
+class SearchPagination(TransactionCursorPagination):
+    """
+    Paginação dos resultados da busca. A ordem por relevância não tem uma
+    chave estável para o keyset, então o cursor assinado guarda a posição
+    (OFFSET) da próxima página.
+    """
+    cursor_salt = 'accounts.search.cursor'
+
+    def encode_cursor(self, offset):
+        return signing.dumps(offset, salt=self.cursor_salt)
+
+    def decode_cursor(self, request):
+        value = request.query_params.get(self.cursor_query_param)
+        if not value:
+            return 0
+        try:
+            offset = int(signing.loads(value, salt=self.cursor_salt))
+        except (signing.BadSignature, TypeError, ValueError):
+            raise ValidationError({'cursor': 'Cursor inválido.'})
+        if offset < 0:
+            raise ValidationError({'cursor': 'Cursor inválido.'})
+        return offset
+
+    def _page_queryset(self, queryset, request):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.offset = self.decode_cursor(request)
+        return queryset[self.offset:self.offset + self.page_size + 1]
+
+    def _build_page(self, rows):
+        self.has_next = len(rows) > self.page_size
+        self.next_cursor = self.encode_cursor(self.offset + self.page_size) if self.has_next else None
+        return rows[:self.page_size]
@@ -0,0 +1,123 @@
+"""
+Partições mensais de ``BankTransaction`` no PostgreSQL.
+
+A tabela é particionada por intervalo de ``transaction_date`` (migração
+0009), uma partição por mês mais a partição ``default``, que recebe as datas
+sem partição própria. As consultas do mês (ou de poucos meses) leem só as
+partições do intervalo, e VACUUM e manutenção de índices trabalham partição
+por partição: meses antigos, que não mudam mais, não voltam a ser varridos.
+
+``ensure_partitions`` cria as partições que faltam até alguns meses à
+frente e também as dos meses que já têm linhas na ``default`` (importações
+de extratos antigos, por exemplo), movendo essas linhas para a partição
+nova. Roda depois de ``migrate`` e pelo comando ``create_partitions``, que
+deve ser agendado (uma vez por mês basta).
+"""
+from datetime import date
+
+from django.db import connections, transaction
+from django.utils import timezone
+
+from .models import BankTransaction
+
+PARTITION_MONTHS_AHEAD = 12
+
+TABLE = BankTransaction._meta.db_table
+DEFAULT_PARTITION = f'{TABLE}_default'
+
+
+def _next_month(month):
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f'{TABLE}_p{month:%Y_%m}'
+
+
+def is_partitioned(using='default'):
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)', [TABLE]
+        )
+        return cursor.fetchone() is not None
+
+
+def existing_partitions(using='default'):
+    """Nomes das partições ligadas à tabela"""
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            'SELECT child.relname FROM pg_inherits '
+            'JOIN pg_class child ON child.oid = pg_inherits.inhrelid '
+            'WHERE pg_inherits.inhparent = to_regclass(%s)',
+            [TABLE],
+        )
+        return {row[0] for row in cursor.fetchall()}
+
+
+def _default_months(cursor, quote):
+    cursor.execute(
+        f"SELECT DISTINCT date_trunc('month', transaction_date)::date FROM {quote(DEFAULT_PARTITION)}"
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+
+def create_partition(month, using='default'):
+    """
+    Cria a partição do mês. Se a ``default`` já tem linhas do mês, a
+    partição é criada separada, recebe essas linhas e só então é ligada à
+    tabela (o PostgreSQL não cria a partição com linhas dela na ``default``).
+    """
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    name, following = partition_name(month), _next_month(month)
+    bounds = f"FOR VALUES FROM ('{month.isoformat()}') TO ('{following.isoformat()}')"
+    in_month = 'transaction_date >= %s AND transaction_date < %s'
+
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        cursor.execute(f'SELECT 1 FROM {quote(DEFAULT_PARTITION)} WHERE {in_month} LIMIT 1', [month, following])
+        if cursor.fetchone() is None:
+            cursor.execute(f'CREATE TABLE {quote(name)} PARTITION OF {quote(TABLE)} {bounds}')
+            return
+
+        cursor.execute(f'CREATE TABLE {quote(name)} (LIKE {quote(TABLE)} INCLUDING DEFAULTS)')
+        cursor.execute(
+            f'WITH moved AS (DELETE FROM {quote(DEFAULT_PARTITION)} WHERE {in_month} RETURNING *) '
+            f'INSERT INTO {quote(name)} SELECT * FROM moved',
+            [month, following],
+        )
+        cursor.execute(f'ALTER TABLE {quote(TABLE)} ATTACH PARTITION {quote(name)} {bounds}')
+
+
+def ensure_partitions(start=None, months_ahead=PARTITION_MONTHS_AHEAD, using='default'):
+    """
+    Cria as partições mensais do mês de ``start`` (por padrão o atual) até
+    ``months_ahead`` meses à frente do atual e as dos meses com linhas na
+    ``default``. Retorna os nomes das partições criadas.
+    """
+    if not is_partitioned(using):
+        return []
+
+    today = timezone.localdate()
+    start = (start or today).replace(day=1)
+    end = today.replace(day=1)
+    for _ in range(months_ahead):
+        end = _next_month(end)
+
+    months = []
+    month = start
+    while month <= end:
+        months.append(month)
+        month = _next_month(month)
+    with connections[using].cursor() as cursor:
+        months.extend(_default_months(cursor, connections[using].ops.quote_name))
+
+    existing = existing_partitions(using)
+    created = []
+    for month in sorted(set(months)):
+        if partition_name(month) not in existing:
+            create_partition(month, using)
+            created.append(partition_name(month))
+    return created
@@ -0,0 +1,73 @@
+"""
+Conversão dos parâmetros de período (YYYY-MM) aceitos pela API.
+"""
+from calendar import monthrange
+from datetime import date, datetime, timedelta
+
+from django.utils import timezone
+
+# Janela padrão da listagem de transações quando nenhum mês é informado
+DEFAULT_TRANSACTIONS_WINDOW = timedelta(days=180)
+# Meses do resumo e das análises quando o início não é informado, incluindo o final
+DEFAULT_SUMMARY_MONTHS = 12
+
+
+def add_months(day, months):
+    """Soma meses à data, limitando o dia ao último dia do mês"""
+    index = day.month - 1 + months
+    year, month = day.year + index // 12, index % 12 + 1
+    return date(year, month, min(day.day, monthrange(year, month)[1]))
+
+
+def default_start(end_date):
+    """Primeiro dia do intervalo padrão que termina no mês de ``end_date``"""
+    return add_months(end_date.replace(day=1), 1 - DEFAULT_SUMMARY_MONTHS)
+
+
+def parse_month(month_year):
+    """Converte 'YYYY-MM' no primeiro dia do mês (ValueError se inválido)"""
+    year, month = month_year.split('-')
+    return datetime(int(year), int(month), 1).date()
+
+
+def month_range(month_year):
+    """Primeiro e último dia de 'YYYY-MM' (ValueError se inválido)"""
+    start_date = parse_month(month_year)
+    if start_date.month == 12:
+        end_date = start_date.replace(year=start_date.year + 1, month=1) - timedelta(days=1)
+    else:
+        end_date = start_date.replace(month=start_date.month + 1) - timedelta(days=1)
+    return start_date, end_date
+
+
+def parse_date(value, end=False):
+    """
+    Converte 'YYYY-MM-DD' ou 'YYYY-MM' em data; para meses, o primeiro dia
+    ou, com ``end``, o último (ValueError se inválido)
+    """
+    if len(value) == 7:
+        return month_range(value)[1] if end else parse_month(value)
+    return date.fromisoformat(value)
+
+
+def transactions_period(month_year=None):
+    """Intervalo da listagem de transações: o mês informado ou os últimos 6 meses"""
+    if month_year:
+        return month_range(month_year)
+    end_date = timezone.now().date()
+    return end_date - DEFAULT_TRANSACTIONS_WINDOW, end_date
+
+
+def summary_range(start=None, end=None):
+    """
+    Primeiro e último mês do resumo por intervalo: ``end`` padrão é o mês
+    atual e ``start`` padrão é o início dos ``DEFAULT_SUMMARY_MONTHS`` meses
+    que terminam em ``end``.
+    """
+    end_month = parse_month(end or current_month())
+    start_month = parse_month(start) if start else default_start(end_month)
+    return start_month, end_month
+
+
+def current_month():
+    return timezone.now().strftime('%Y-%m')
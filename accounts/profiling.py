@@ -0,0 +1,148 @@
+"""
+Perfil das requisições da API (opcional, ``ACCOUNTS_PROFILING_ENABLED``).
+
+O middleware mede, por requisição, o tempo total, a quantidade e o tempo das
+consultas SQL, o tempo de serialização e de renderização e o tamanho da
+resposta. As medidas vão no cabeçalho ``Server-Timing`` e para um buffer
+circular em memória, por processo, resumido por nome de URL em
+``GET /api/accounts/profiling/`` (apenas admin).
+"""
+import threading
+import time
+from collections import deque
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+_current = ContextVar('accounts_profile', default=None)
+
+_buffer = deque(maxlen=settings.ACCOUNTS_PROFILING_BUFFER_SIZE)
+_buffer_lock = threading.Lock()
+
+# Métricas resumidas por percentil no endpoint de perfil
+METRICS = ('total_ms', 'db_ms', 'queries', 'serialize_ms', 'render_ms', 'size')
+PERCENTILES = (50, 95, 99)
+
+
+class RequestProfile:
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.sections = {}
+
+    def add(self, section, seconds):
+        self.sections[section] = self.sections.get(section, 0.0) + seconds
+
+    def __call__(self, execute, sql, params, many, context):
+        # Usado como execute_wrapper das conexões
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.queries += 1
+
+
+@contextmanager
+def timed(section):
+    """Soma o tempo do bloco à seção do perfil da requisição atual, se houver"""
+    profile = _current.get()
+    if profile is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.add(section, time.perf_counter() - start)
+
+
+def profiled(section):
+    """Decorador equivalente a ``timed`` para funções inteiras"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with timed(section):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        if not settings.ACCOUNTS_PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        profile = RequestProfile()
+        token = _current.set(profile)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(profile))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        total = time.perf_counter() - start
+
+        size = len(response.content) if not response.streaming else None
+        entry = {
+            'total_ms': total * 1000,
+            'db_ms': profile.db_time * 1000,
+            'queries': profile.queries,
+            'serialize_ms': profile.sections.get('serialize', 0.0) * 1000,
+            'render_ms': profile.sections.get('render', 0.0) * 1000,
+            'size': size,
+        }
+        response['Server-Timing'] = ', '.join([
+            f"total;dur={entry['total_ms']:.2f}",
+            f"db;dur={entry['db_ms']:.2f};desc=\"{profile.queries} queries\"",
+            f"serialize;dur={entry['serialize_ms']:.2f}",
+            f"render;dur={entry['render_ms']:.2f}",
+        ])
+
+        match = request.resolver_match
+        if match is not None and match.func.__module__.startswith('accounts.'):
+            entry.update(url_name=match.url_name, method=request.method, status=response.status_code)
+            with _buffer_lock:
+                _buffer.append(entry)
+        return response
+
+
+def _percentile(values, percentile):
+    # Método do posto mais próximo sobre valores já ordenados
+    index = max(0, -(-len(values) * percentile // 100) - 1)
+    return values[index]
+
+
+def profiling_stats():
+    """Percentis de cada métrica por nome de URL, sobre o buffer atual"""
+    with _buffer_lock:
+        entries = list(_buffer)
+
+    by_url = {}
+    for entry in entries:
+        by_url.setdefault(entry['url_name'], []).append(entry)
+
+    stats = {}
+    for url_name, url_entries in sorted(by_url.items()):
+        summary = {'count': len(url_entries)}
+        for metric in METRICS:
+            values = sorted(entry[metric] for entry in url_entries if entry[metric] is not None)
+            if values:
+                summary[metric] = {
+                    f'p{percentile}': round(_percentile(values, percentile), 3) for percentile in PERCENTILES
+                }
+        stats[url_name] = summary
+    return stats
+
+
+def clear():
+    with _buffer_lock:
+        _buffer.clear()
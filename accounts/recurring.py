@@ -0,0 +1,239 @@
+"""
+Transações recorrentes: regras (``RecurringTransaction``) que geram
+transações de aluguel, salário, assinaturas etc. sem digitação manual.
+
+Cada regra tem frequência (diária, semanal, mensal ou anual), intervalo,
+data de início e, opcionalmente, data final e número máximo de ocorrências,
+como uma RRULE (``parse_rrule`` aceita ``FREQ``, ``INTERVAL``, ``COUNT`` e
+``UNTIL``). A ocorrência de posição ``n`` é calculada a partir do início,
+então regras mensais do dia 31 caem no último dia dos meses mais curtos sem
+mudar de dia nos meses seguintes.
+
+``materialize_due`` gera de uma vez as ocorrências vencidas de todas as
+regras: pega as regras pelo índice parcial de ``next_run`` em lotes de
+``RECURRING_BATCH_SIZE`` (com ``SKIP LOCKED`` no PostgreSQL, de modo que
+vários processos podem dividir o trabalho), cria as transações com
+``bulk_create``, aplica saldos e consolidados com ``LedgerBatch`` e avança
+as regras com um único UPDATE, tudo na mesma transação do banco. A chave
+(regra, data) das transações geradas é única, e as que já existem são
+puladas, então rodar de novo nunca duplica. Deve ser agendado uma vez por
+dia (comando ``materialize_recurring``).
+"""
+from datetime import datetime, timedelta
+
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .ledger import LedgerBatch, ledger_entry
+from .models import BankTransaction, RecurringTransaction
+from .periods import add_months
+
+RECURRING_BATCH_SIZE = 500
+# Limite de ocorrências geradas por regra em cada lote (regras antigas
+# recuperam o atraso nos lotes seguintes da mesma execução)
+MAX_OCCURRENCES_PER_BATCH = 100
+# Até quantos anos atrás a regra pode começar: as ocorrências vencidas são
+# geradas na própria requisição que cria a regra (ver ``earliest_start``)
+MAX_BACKFILL_YEARS = 5
+
+# Campos que mudam as datas das ocorrências
+SCHEDULE_FIELDS = ('frequency', 'interval', 'start_date', 'end_date', 'max_occurrences')
+
+RRULE_FREQUENCIES = {
+    'DAILY': 'daily',
+    'WEEKLY': 'weekly',
+    'MONTHLY': 'monthly',
+    'YEARLY': 'yearly',
+}
+
+
+class RecurrenceError(ValueError):
+    """Regra de recorrência inválida"""
+
+
+def earliest_start(today=None):
+    """Data de início mais antiga aceita para uma regra"""
+    return add_months(today or timezone.localdate(), -12 * MAX_BACKFILL_YEARS)
+
+
+def occurrence_date(rule, index):
+    """Data da ocorrência de posição ``index`` (a partir de 0), ignorando os limites"""
+    step = rule.interval * index
+    if rule.frequency == 'daily':
+        return rule.start_date + timedelta(days=step)
+    if rule.frequency == 'weekly':
+        return rule.start_date + timedelta(weeks=step)
+    if rule.frequency == 'monthly':
+        return add_months(rule.start_date, step)
+    return add_months(rule.start_date, 12 * step)
+
+
+def scheduled_date(rule, index):
+    """Data da ocorrência ``index``, ou None se ela passa do fim da regra"""
+    if rule.max_occurrences is not None and index >= rule.max_occurrences:
+        return None
+    day = occurrence_date(rule, index)
+    if rule.end_date and day > rule.end_date:
+        return None
+    return day
+
+
+def schedule(rule):
+    """
+    Posiciona a regra na primeira ocorrência depois da última transação que
+    ela já gerou (ou no início, se ainda não gerou nenhuma). Usado ao criar
+    a regra e ao mudar os campos de ``SCHEDULE_FIELDS``.
+    """
+    last = None
+    if rule.pk:
+        last = BankTransaction.all_objects.filter(recurring=rule).aggregate(last=Max('transaction_date'))['last']
+
+    index = 0
+    day = scheduled_date(rule, index)
+    while day is not None and last is not None and day <= last:
+        index += 1
+        day = scheduled_date(rule, index)
+    rule.occurrence_count, rule.next_run = index, day
+
+
+def parse_rrule(value):
+    """
+    Converte uma RRULE (ex.: ``FREQ=MONTHLY;INTERVAL=2;COUNT=12``) nos campos
+    da regra. Aceita ``FREQ``, ``INTERVAL``, ``COUNT`` e ``UNTIL`` (AAAAMMDD).
+    """
+    value = value.strip()
+    if value.upper().startswith('RRULE:'):
+        value = value[len('RRULE:'):]
+
+    parts = {}
+    for item in filter(None, value.split(';')):
+        key, sep, part = item.partition('=')
+        if not sep or not part:
+            raise RecurrenceError(f"Parte inválida na regra: {item}")
+        parts[key.strip().upper()] = part.strip().upper()
+
+    unsupported = sorted(set(parts) - {'FREQ', 'INTERVAL', 'COUNT', 'UNTIL'})
+    if unsupported:
+        raise RecurrenceError(f"Partes da regra não suportadas: {', '.join(unsupported)}")
+    if parts.get('FREQ') not in RRULE_FREQUENCIES:
+        raise RecurrenceError(f"FREQ deve ser um de: {', '.join(RRULE_FREQUENCIES)}")
+
+    fields = {'frequency': RRULE_FREQUENCIES[parts['FREQ']], 'interval': 1, 'max_occurrences': None, 'end_date': None}
+    for key, field in (('INTERVAL', 'interval'), ('COUNT', 'max_occurrences')):
+        if key in parts:
+            if not parts[key].isdigit() or int(parts[key]) < 1:
+                raise RecurrenceError(f"{key} deve ser um número inteiro positivo")
+            fields[field] = int(parts[key])
+    if 'UNTIL' in parts:
+        try:
+            fields['end_date'] = datetime.strptime(parts['UNTIL'][:8], '%Y%m%d').date()
+        except ValueError:
+            raise RecurrenceError("UNTIL deve estar no formato AAAAMMDD")
+    return fields
+
+
+def format_rrule(rule):
+    """RRULE equivalente à regra"""
+    frequency = next(key for key, name in RRULE_FREQUENCIES.items() if name == rule.frequency)
+    parts = [f'FREQ={frequency}', f'INTERVAL={rule.interval}']
+    if rule.max_occurrences is not None:
+        parts.append(f'COUNT={rule.max_occurrences}')
+    if rule.end_date:
+        parts.append(f'UNTIL={rule.end_date:%Y%m%d}')
+    return ';'.join(parts)
+
+
+def _materialize_batch(rules, today, now):
+    """Gera as ocorrências vencidas das regras e as avança; retorna quantas transações criou"""
+    pending = []
+    for rule in rules:
+        index, day = rule.occurrence_count, rule.next_run
+        generated = 0
+        while day is not None and day <= today and generated < MAX_OCCURRENCES_PER_BATCH:
+            pending.append((rule, day))
+            index += 1
+            generated += 1
+            day = scheduled_date(rule, index)
+        rule.occurrence_count, rule.next_run = index, day
+        rule.last_run_at = rule.updated_at = now
+
+    # Ocorrências já geradas (regra reposicionada, por exemplo) não se repetem
+    existing = set()
+    if pending:
+        existing = set(
+            BankTransaction.all_objects.filter(
+                recurring__in=rules,
+                transaction_date__range=[min(day for _rule, day in pending), today],
+            ).values_list('recurring_id', 'transaction_date')
+        )
+
+    created = [
+        BankTransaction(
+            user_id=rule.user_id, bank_account_id=rule.bank_account_id, category_group_id=rule.category_group_id,
+            transaction_type=rule.transaction_type, amount=rule.amount, description=rule.description,
+            transaction_date=day, recurring=rule,
+        )
+        for rule, day in pending
+        if (rule.pk, day) not in existing
+    ]
+    BankTransaction.objects.bulk_create(created)
+
+    ledger = LedgerBatch()
+    for instance in created:
+        ledger.add(ledger_entry(instance))
+    ledger.apply()
+
+    _advance(rules, now)
+    return len(created)
+
+
+def _advance(rules, now):
+    """
+    Grava a nova posição das regras. No PostgreSQL é um único UPDATE com as
+    posições numa lista VALUES: o ``bulk_update`` do Django monta um
+    ``CASE WHEN id = ...`` por regra e campo, e o custo em Python de montar
+    essa expressão passa o da própria geração das transações.
+    """
+    if connection.vendor != 'postgresql':
+        RecurringTransaction.all_objects.bulk_update(
+            rules, ['occurrence_count', 'next_run', 'last_run_at', 'updated_at'],
+        )
+        return
+
+    quote = connection.ops.quote_name
+    rows = ', '.join(['(%s, %s, %s::date)'] * len(rules))
+    params = [value for rule in rules for value in (rule.pk, rule.occurrence_count, rule.next_run)]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'UPDATE {quote(RecurringTransaction._meta.db_table)} AS rule '
+            'SET occurrence_count = position.occurrence_count, next_run = position.next_run, '
+            'last_run_at = %s, updated_at = %s '
+            f'FROM (VALUES {rows}) AS position (id, occurrence_count, next_run) '
+            'WHERE rule.id = position.id',
+            [now, now, *params],
+        )
+
+
+def materialize_due(today=None, rules=None, batch_size=RECURRING_BATCH_SIZE):
+    """
+    Gera as transações de todas as ocorrências com data até ``today`` (por
+    padrão, hoje) das regras ativas (ou só das de ``rules``, um queryset).
+    Retorna ``{'rules': regras colocadas em dia, 'transactions': transações criadas}``.
+    """
+    today = today or timezone.localdate()
+    rules = RecurringTransaction.objects.all() if rules is None else rules
+    due = rules.filter(is_active=True, next_run__lte=today).order_by('next_run', 'id')
+
+    totals = {'rules': 0, 'transactions': 0}
+    while True:
+        with transaction.atomic():
+            batch = due
+            if connection.features.has_select_for_update_skip_locked:
+                batch = batch.select_for_update(skip_locked=True)
+            batch = list(batch[:batch_size])
+            if not batch:
+                return totals
+            totals['transactions'] += _materialize_batch(batch, today, timezone.now())
+        # Regras com mais atraso que o limite do lote voltam no próximo
+        totals['rules'] += sum(1 for rule in batch if rule.next_run is None or rule.next_run > today)
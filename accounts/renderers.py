@@ -0,0 +1,35 @@
+"""
+Renderer JSON da API baseado no orjson.
+
+Gera a mesma saída do ``JSONRenderer`` do DRF (datas, decimais e demais
+tipos passam pelo mesmo encoder), só que várias vezes mais rápido. Sem o
+orjson instalado, ou quando a resposta pede indentação, usa o renderer
+padrão.
+"""
+from rest_framework.renderers import JSONRenderer
+
+from .profiling import timed
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class ORJSONRenderer(JSONRenderer):
+    # Datas passam pelo encoder do DRF para manter o formato das respostas
+    orjson_options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS if orjson else 0
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with timed('render'):
+            return self._render(data, accepted_media_type, renderer_context)
+
+    def _render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(data, default=self.encoder_class().default, option=self.orjson_options)
+        # Como o JSONRenderer, escapa U+2028 e U+2029 para manter um subconjunto de JavaScript
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
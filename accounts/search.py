@@ -0,0 +1,86 @@
+"""
+Busca textual nas descrições das transações, combinada com filtros de
+valor, data, conta, categoria e tipo.
+
+No PostgreSQL a busca usa dois índices GIN sobre ``description`` (ver a
+migração 0008): o de texto completo (``to_tsvector`` em português, que
+encontra "mercados" buscando "mercado") e, quando a extensão ``pg_trgm``
+está instalada, o de trigramas, que tolera erros de digitação e trechos de
+palavras. As duas condições entram na mesma consulta, combinadas com OR, e
+os resultados são ordenados pela soma das duas relevâncias. Nos demais
+bancos (SQLite nos testes) cada palavra é buscada com ``icontains`` e os
+resultados saem do mais recente para o mais antigo.
+"""
+from django.contrib.postgres.lookups import TrigramWordSimilar
+from django.contrib.postgres.search import (
+    SearchQuery, SearchRank, SearchVector, TrigramWordSimilarity,
+)
+from django.db import connections
+from django.db.models import F, Q, Value
+from django.db.models.functions import Coalesce
+
+from .models import BankTransaction
+
+# Configuração do índice de texto completo; a consulta precisa usar a mesma
+SEARCH_CONFIG = 'portuguese'
+MIN_QUERY_LENGTH = 2
+MAX_QUERY_LENGTH = 100
+
+SEARCH_ORDERING = ('-rank', '-transaction_date', '-created_at', '-id')
+
+_trigram_support = {}
+
+
+class SearchError(ValueError):
+    """Termo de busca inválido"""
+
+
+def description_vector():
+    return SearchVector('description', config=SEARCH_CONFIG)
+
+
+def has_trigram(using='default'):
+    """Se a extensão ``pg_trgm`` está instalada no banco (verificado uma vez)"""
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return False
+    key = (using, connection.settings_dict['NAME'])
+    if key not in _trigram_support:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+            _trigram_support[key] = cursor.fetchone() is not None
+    return _trigram_support[key]
+
+
+def clean_query(value):
+    value = ' '.join((value or '').split())
+    if len(value) < MIN_QUERY_LENGTH:
+        raise SearchError(f"Informe ao menos {MIN_QUERY_LENGTH} caracteres para a busca")
+    if len(value) > MAX_QUERY_LENGTH:
+        raise SearchError(f"A busca deve ter no máximo {MAX_QUERY_LENGTH} caracteres")
+    return value
+
+
+def search_transactions(user, text, filters=None, using='default'):
+    """
+    Transações do usuário que correspondem a ``text`` e aos ``filters``
+    (argumentos de ``filter``), anotadas com ``rank`` e na ordem de
+    ``SEARCH_ORDERING``.
+    """
+    queryset = BankTransaction.objects.using(using).filter(user=user, **(filters or {}))
+
+    if connections[using].vendor != 'postgresql':
+        for word in text.split():
+            queryset = queryset.filter(description__icontains=word)
+        return queryset.annotate(rank=Value(0.0)).order_by(*SEARCH_ORDERING)
+
+    query = SearchQuery(text, config=SEARCH_CONFIG, search_type='websearch')
+    # Mesma expressão do índice de texto completo
+    queryset = queryset.annotate(document=description_vector())
+    match = Q(document=query)
+    rank = SearchRank(F('document'), query)
+    if has_trigram(using):
+        # ``%>`` (similaridade com alguma palavra da descrição) usa o índice de trigramas
+        match |= Q(TrigramWordSimilar(F('description'), Value(text)))
+        rank = rank + Coalesce(TrigramWordSimilarity(Value(text), 'description'), 0.0)
+    return queryset.filter(match).annotate(rank=rank).order_by(*SEARCH_ORDERING)
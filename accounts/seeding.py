@@ -0,0 +1,283 @@
+"""
+Geração de dados sintéticos para testes de carga e benchmarks.
+
+Cria usuários com contas, categorias e alguns anos de transações com
+distribuições próximas às reais: um salário fixo por mês, receitas extras
+ocasionais e despesas em quantidade variável por mês, concentradas em poucas
+categorias (pesos de Zipf) e com valores log-normais. A geração usa uma
+semente, então a mesma chamada produz sempre os mesmos dados.
+
+As transações são gravadas em lotes, sem disparar sinais: no PostgreSQL com
+``COPY`` e nos demais bancos com ``bulk_create``. Saldos e consolidados
+mensais são recalculados uma única vez no final.
+"""
+import itertools
+import math
+import random
+import re
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .ledger import delete_transactions, rebuild_balances, rebuild_rollups
+from .models import BankAccount, BankTransaction, CategoryGroup, MonthlyRollup, User
+from .partitions import ensure_partitions
+
+SEED_PASSWORD = 'seed'
+SEED_BATCH_SIZE = 5000
+# Os nomes gerados têm o prefixo e exatamente 5 dígitos
+MAX_SEED_USERS = 99999
+
+ACCOUNT_NAMES = (
+    'Conta Corrente', 'Cartão de Crédito', 'Poupança', 'Carteira',
+    'Conta Digital', 'Investimentos', 'Conta Conjunta', 'Vale Refeição',
+)
+ACCOUNT_COLORS = ('#0066CC', '#CC3300', '#009933', '#FF9900', '#6633CC', '#00999A', '#CC0066', '#666666')
+
+# (nome, valor mediano) em ordem de frequência
+INCOME_CATEGORIES = (
+    ('Salário', 5000), ('Freelance', 1200), ('Rendimentos', 150),
+    ('Reembolsos', 200), ('Vendas', 400), ('Presentes', 300),
+)
+EXPENSE_CATEGORIES = (
+    ('Mercado', 180), ('Alimentação', 45), ('Transporte', 30), ('Lazer', 90),
+    ('Saúde', 160), ('Contas de Casa', 250), ('Educação', 400), ('Vestuário', 150),
+    ('Assinaturas', 40), ('Viagens', 900), ('Pets', 120), ('Impostos', 700),
+)
+
+DESCRIPTIONS = {
+    'Mercado': ('Supermercado', 'Feira', 'Padaria', 'Hortifruti'),
+    'Alimentação': ('Restaurante', 'Lanche', 'Delivery', 'Café'),
+    'Transporte': ('Combustível', 'Aplicativo de transporte', 'Ônibus', 'Estacionamento'),
+    'Contas de Casa': ('Energia', 'Água', 'Internet', 'Condomínio', 'Gás'),
+}
+
+# Espalhamento dos valores em torno da mediana (desvio do logaritmo)
+AMOUNT_SIGMA = 0.6
+
+TRANSACTION_COLUMNS = (
+    'user_id', 'bank_account_id', 'category_group_id', 'transaction_type', 'amount',
+    'description', 'transaction_date', 'created_at', 'updated_at',
+)
+
+
+class SeedError(Exception):
+    """Parâmetros inválidos ou dados de uma geração anterior no caminho"""
+
+
+def _names(base, count, label):
+    """Os ``count`` primeiros nomes da lista, numerando os que faltarem"""
+    names = list(base[:count])
+    names.extend(f'{label} {number}' for number in range(len(names) + 1, count + 1))
+    return names
+
+
+def _zipf_weights(count):
+    return [1 / rank for rank in range(1, count + 1)]
+
+
+def _months(years, end):
+    """Primeiro dia de cada mês dos últimos ``years`` anos, até o mês de ``end``"""
+    year, month = end.year, end.month
+    months = []
+    for _ in range(years * 12):
+        months.append(date(year, month, 1))
+        year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+    return months[::-1]
+
+
+def _month_days(month):
+    following = (month.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return (following - month).days
+
+
+def _amount(rng, median):
+    value = rng.lognormvariate(math.log(median), AMOUNT_SIGMA)
+    return Decimal(f'{min(value, 99999999.99):.2f}')
+
+
+def _poisson(rng, mean):
+    # Aproximação normal, suficiente para as médias usadas aqui
+    if mean <= 0:
+        return 0
+    return max(0, round(rng.gauss(mean, math.sqrt(mean))))
+
+
+def generate_transactions(rng, user_id, accounts, incomes, expenses, months, per_month, today):
+    """
+    Tuplas com as colunas de ``TRANSACTION_COLUMNS`` para um usuário.
+
+    ``accounts`` é a lista de ids das contas (a primeira recebe o salário),
+    ``incomes`` e ``expenses`` listas de (id, nome, mediana) das categorias.
+    """
+    now = timezone.now()
+    account_weights = _zipf_weights(len(accounts))
+    expense_weights = _zipf_weights(len(expenses))
+    salary_id, salary_name, salary_median = incomes[0]
+    salary = _amount(rng, salary_median)
+
+    for month in months:
+        days = _month_days(month)
+        last_day = min(days, (today - month).days + 1)
+        if last_day <= 0:
+            continue
+
+        if last_day >= 5:
+            yield (
+                user_id, accounts[0], salary_id, 'income', salary,
+                salary_name, month.replace(day=5), now, now,
+            )
+        for category_id, name, median in incomes[1:]:
+            if rng.random() < 0.3:
+                day = month + timedelta(days=rng.randrange(last_day))
+                yield (user_id, accounts[0], category_id, 'income', _amount(rng, median), name, day, now, now)
+
+        # Meses incompletos (o atual) recebem despesas proporcionais
+        count = _poisson(rng, per_month * last_day / days)
+        for category_id, name, median in rng.choices(expenses, expense_weights, k=count):
+            account_id = rng.choices(accounts, account_weights)[0]
+            day = month + timedelta(days=rng.randrange(last_day))
+            description = rng.choice(DESCRIPTIONS.get(name, (name,)))
+            yield (user_id, account_id, category_id, 'expense', _amount(rng, median), description, day, now, now)
+
+
+def _copy_rows(rows):
+    """Grava as tuplas com COPY (PostgreSQL) e retorna quantas foram gravadas"""
+    quote = connection.ops.quote_name
+    table = quote(BankTransaction._meta.db_table)
+    columns = ', '.join(quote(column) for column in TRANSACTION_COLUMNS)
+    total = 0
+    with connection.cursor() as cursor:
+        with cursor.cursor.copy(f'COPY {table} ({columns}) FROM STDIN') as copy:
+            for row in rows:
+                copy.write_row(row)
+                total += 1
+    return total
+
+
+def _bulk_create_rows(rows, batch_size):
+    total = 0
+    while batch := list(itertools.islice(rows, batch_size)):
+        BankTransaction.objects.bulk_create(
+            [BankTransaction(**dict(zip(TRANSACTION_COLUMNS, row))) for row in batch],
+            batch_size=batch_size,
+        )
+        total += len(batch)
+    return total
+
+
+def insert_transactions(rows, batch_size=SEED_BATCH_SIZE):
+    """Grava as tuplas de ``generate_transactions`` sem disparar sinais"""
+    if connection.vendor == 'postgresql':
+        return _copy_rows(rows)
+    return _bulk_create_rows(iter(rows), batch_size)
+
+
+def seed_users(prefix):
+    """Usuários gerados com o prefixo (``<prefix>00001``...), e não todo nome que comece com ele"""
+    return User.objects.filter(username__regex=rf'^{re.escape(prefix)}\d{{5}}$')
+
+
+def clear_seed_data(prefix):
+    """
+    Remove os usuários gerados com o prefixo e todos os seus dados. Recusa
+    (``SeedError``) se algum deles for da equipe ou administrador.
+    """
+    users = seed_users(prefix)
+    protected = users.filter(Q(is_staff=True) | Q(is_superuser=True) | Q(user_type='admin'))
+    if protected.exists():
+        names = ', '.join(protected.order_by('username').values_list('username', flat=True)[:5])
+        raise SeedError(f"Usuários administradores com o prefixo '{prefix}' não são removidos: {names}")
+    with transaction.atomic():
+        # Sem os sinais por transação, que ajustariam saldos um a um
+        deleted = delete_transactions(BankTransaction.all_objects.filter(user__in=users))
+        MonthlyRollup.objects.filter(user__in=users).delete()
+        users.delete()
+    return deleted
+
+
+@transaction.atomic
+def seed(users=10, accounts=3, categories=8, years=2, transactions_per_month=60,
+         prefix='seed', random_seed=0, batch_size=SEED_BATCH_SIZE, today=None):
+    """
+    Gera os dados e retorna a quantidade criada de cada tipo de registro.
+    Os usuários se chamam ``<prefix>00001``, ``<prefix>00002``... com a
+    senha ``SEED_PASSWORD``.
+    """
+    if users < 1 or accounts < 1 or years < 1 or transactions_per_month < 0:
+        raise SeedError("Informe ao menos um usuário, uma conta e um ano")
+    if users > MAX_SEED_USERS:
+        raise SeedError(f"Gere no máximo {MAX_SEED_USERS} usuários por prefixo")
+    if categories < 2:
+        raise SeedError("Informe ao menos duas categorias (uma de receita e uma de despesa)")
+    if seed_users(prefix).exists():
+        raise SeedError(f"Já existem usuários com o prefixo '{prefix}'")
+
+    rng = random.Random(random_seed)
+    today = today or timezone.localdate()
+    months = _months(years, today)
+
+    # Um único hash para todos: calcular um por usuário dominaria o tempo
+    password = make_password(SEED_PASSWORD)
+    User.objects.bulk_create([
+        User(username=f'{prefix}{number:05d}', password=password, email=f'{prefix}{number:05d}@example.com')
+        for number in range(1, users + 1)
+    ], batch_size=batch_size)
+    created_users = list(seed_users(prefix).order_by('username').values_list('id', flat=True))
+
+    account_names = _names(ACCOUNT_NAMES, accounts, 'Conta')
+    BankAccount.objects.bulk_create([
+        BankAccount(user_id=user_id, name=name, color=ACCOUNT_COLORS[index % len(ACCOUNT_COLORS)])
+        for user_id in created_users
+        for index, name in enumerate(account_names)
+    ], batch_size=batch_size)
+
+    income_count = max(1, categories // 4)
+    income_names = _names([name for name, _median in INCOME_CATEGORIES], income_count, 'Receita')
+    expense_names = _names([name for name, _median in EXPENSE_CATEGORIES], categories - income_count, 'Despesa')
+    CategoryGroup.objects.bulk_create([
+        CategoryGroup(user_id=user_id, name=name, transaction_type=transaction_type)
+        for user_id in created_users
+        for transaction_type, names in (('income', income_names), ('expense', expense_names))
+        for name in names
+    ], batch_size=batch_size)
+
+    medians = dict(INCOME_CATEGORIES + EXPENSE_CATEGORIES)
+    user_accounts, user_groups = {}, {}
+    for account_id, user_id in (
+        BankAccount.objects.filter(user_id__in=created_users).order_by('pk').values_list('id', 'user_id')
+    ):
+        user_accounts.setdefault(user_id, []).append(account_id)
+    for group_id, user_id, name, transaction_type in (
+        CategoryGroup.objects.filter(user_id__in=created_users).order_by('pk')
+        .values_list('id', 'user_id', 'name', 'transaction_type')
+    ):
+        user_groups.setdefault((user_id, transaction_type), []).append((group_id, name, medians.get(name, 100)))
+
+    rows = itertools.chain.from_iterable(
+        generate_transactions(
+            rng, user_id, user_accounts[user_id],
+            user_groups[(user_id, 'income')], user_groups[(user_id, 'expense')],
+            months, transactions_per_month, today,
+        )
+        for user_id in created_users
+    )
+    # Partições do histórico gerado, para as linhas não irem para a default
+    ensure_partitions(months[0])
+    transaction_count = insert_transactions(rows, batch_size)
+
+    created = seed_users(prefix)
+    rebuild_balances(BankAccount.objects.filter(user__in=created))
+    rollup_count = rebuild_rollups(created)
+
+    return {
+        'users': len(created_users),
+        'bank_accounts': len(created_users) * accounts,
+        'category_groups': len(created_users) * categories,
+        'transactions': transaction_count,
+        'monthly_rollups': rollup_count,
+    }
@@ -1,6 +1,14 @@
+from operator import itemgetter
+
 from rest_framework import serializers
+from django.conf import settings
 from django.contrib.auth import authenticate
-from .models import User, BankAccount, CategoryGroup, BankTransaction
+from django.utils import timezone
+from .models import (
+    User, BankAccount, CategoryGroup, BankTransaction, RecurringTransaction, Investment, Contribution, YieldEvent, Job,
+)
+from .profiling import profiled
+from .recurring import SCHEDULE_FIELDS, RecurrenceError, earliest_start, format_rrule, parse_rrule, schedule
 
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
@@ -106,12 +114,12 @@ class BankTransactionSerializer(serializers.ModelSerializer):
     def validate(self, attrs):
         # Validar se a conta bancária pertence ao usuário
         bank_account = attrs.get('bank_account')
-        if bank_account and bank_account.user != self.context['request'].user:
+        if bank_account and bank_account.user_id != self.context['request'].user.id:
             raise serializers.ValidationError("Conta bancária inválida.")
 
         # Validar se o grupo de categoria pertence ao usuário
         category_group = attrs.get('category_group')
-        if category_group and category_group.user != self.context['request'].user:
+        if category_group and category_group.user_id != self.context['request'].user.id:
             raise serializers.ValidationError("Grupo de categoria inválido.")
 
         # Validar se o tipo de transação corresponde ao grupo de categoria
@@ -121,6 +129,219 @@ class BankTransactionSerializer(serializers.ModelSerializer):
 
         return attrs
 
+# Serializer das transações recorrentes
+class RecurringTransactionSerializer(serializers.ModelSerializer):
+    bank_account_name = serializers.CharField(source='bank_account.name', read_only=True)
+    category_group_name = serializers.CharField(source='category_group.name', read_only=True)
+    frequency_display = serializers.CharField(source='get_frequency_display', read_only=True)
+    # Alternativa aos campos de frequência: FREQ, INTERVAL, COUNT e UNTIL
+    rrule = serializers.CharField(write_only=True, required=False)
+
+    class Meta:
+        model = RecurringTransaction
+        fields = (
+            'id', 'bank_account', 'bank_account_name', 'category_group', 'category_group_name',
+            'transaction_type', 'amount', 'description', 'frequency', 'frequency_display', 'interval',
+            'start_date', 'end_date', 'max_occurrences', 'rrule', 'occurrence_count', 'next_run',
+            'is_active', 'last_run_at', 'created_at', 'updated_at'
+        )
+        read_only_fields = ('id', 'occurrence_count', 'next_run', 'last_run_at', 'created_at', 'updated_at')
+        extra_kwargs = {'frequency': {'required': False}}
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        data['rrule'] = format_rrule(instance)
+        return data
+
+    def validate_start_date(self, value):
+        # Limita quantas ocorrências vencidas a requisição gera de uma vez
+        earliest = earliest_start()
+        if value < earliest:
+            raise serializers.ValidationError(
+                f"A data de início deve ser a partir de {earliest:%d/%m/%Y}."
+            )
+        return value
+
+    def validate(self, attrs):
+        if 'rrule' in attrs:
+            try:
+                attrs.update(parse_rrule(attrs.pop('rrule')))
+            except RecurrenceError as exc:
+                raise serializers.ValidationError({'rrule': str(exc)})
+
+        def current(field):
+            return attrs.get(field, getattr(self.instance, field, None))
+
+        user = self.context['request'].user
+        if current('frequency') is None:
+            raise serializers.ValidationError({'frequency': "Informe a frequência ou a rrule."})
+        if current('bank_account').user_id != user.id:
+            raise serializers.ValidationError("Conta bancária inválida.")
+        category_group = current('category_group')
+        if category_group.user_id != user.id:
+            raise serializers.ValidationError("Grupo de categoria inválido.")
+        if current('transaction_type') != category_group.transaction_type:
+            raise serializers.ValidationError("Tipo de transação deve corresponder ao grupo de categoria.")
+        if current('amount') <= 0:
+            raise serializers.ValidationError({'amount': "O valor deve ser maior que zero."})
+        if current('interval') is not None and current('interval') < 1:
+            raise serializers.ValidationError({'interval': "O intervalo deve ser de pelo menos 1."})
+        if current('end_date') and current('end_date') < current('start_date'):
+            raise serializers.ValidationError({'end_date': "A data final não pode ser anterior ao início."})
+        return attrs
+
+    def create(self, validated_data):
+        validated_data['user'] = self.context['request'].user
+        rule = RecurringTransaction(**validated_data)
+        schedule(rule)
+        rule.save()
+        return rule
+
+    def update(self, instance, validated_data):
+        rescheduled = any(
+            field in validated_data and validated_data[field] != getattr(instance, field)
+            for field in SCHEDULE_FIELDS
+        )
+        for field, value in validated_data.items():
+            setattr(instance, field, value)
+        if rescheduled:
+            schedule(instance)
+        instance.save()
+        return instance
+
+# Serializers para Investimentos
+class InvestmentSerializer(serializers.ModelSerializer):
+    investment_type_display = serializers.CharField(source='get_investment_type_display', read_only=True)
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+
+    class Meta:
+        model = Investment
+        fields = (
+            'id', 'name', 'investment_type', 'investment_type_display', 'initial_value', 'purchase_date',
+            'description', 'status', 'status_display', 'created_at', 'updated_at'
+        )
+        read_only_fields = ('id', 'created_at', 'updated_at')
+
+    def create(self, validated_data):
+        validated_data['user'] = self.context['request'].user
+        return super().create(validated_data)
+
+    def validate_initial_value(self, value):
+        if value <= 0:
+            raise serializers.ValidationError("O valor inicial deve ser maior que zero.")
+        return value
+
+class ContributionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Contribution
+        fields = ('id', 'amount', 'contribution_date', 'note', 'created_at', 'updated_at')
+        read_only_fields = ('id', 'created_at', 'updated_at')
+
+    def create(self, validated_data):
+        validated_data['investment'] = self.context['investment']
+        return super().create(validated_data)
+
+    def validate_amount(self, value):
+        if value <= 0:
+            raise serializers.ValidationError("O valor do aporte deve ser maior que zero.")
+        return value
+
+    def validate_contribution_date(self, value):
+        if value < self.context['investment'].purchase_date:
+            raise serializers.ValidationError("O aporte não pode ser anterior à compra do investimento.")
+        return value
+
+class YieldEventSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = YieldEvent
+        fields = ('id', 'percentage', 'event_date', 'note', 'created_at', 'updated_at')
+        read_only_fields = ('id', 'created_at', 'updated_at')
+
+    def create(self, validated_data):
+        validated_data['investment'] = self.context['investment']
+        return super().create(validated_data)
+
+    def validate_percentage(self, value):
+        if value == 0:
+            raise serializers.ValidationError("O percentual de rendimento deve ser diferente de zero.")
+        if value <= -100:
+            raise serializers.ValidationError("A perda não pode ser maior que 100%.")
+        return value
+
+    def validate_event_date(self, value):
+        if value < self.context['investment'].purchase_date:
+            raise serializers.ValidationError("O rendimento não pode ser anterior à compra do investimento.")
+        return value
+
+# Serializer das tarefas em segundo plano
+class JobSerializer(serializers.ModelSerializer):
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+    percent = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Job
+        fields = (
+            'id', 'kind', 'status', 'status_display', 'progress', 'progress_total', 'percent', 'attempts',
+            'result', 'error', 'created_at', 'started_at', 'finished_at'
+        )
+        read_only_fields = fields
+
+    def get_percent(self, obj):
+        if obj.status == 'succeeded':
+            return 100
+        if not obj.progress_total:
+            return None
+        return min(100, obj.progress * 100 // obj.progress_total)
+
+# Leitura rápida da listagem de transações: tuplas de ``values_list`` em vez
+# de instâncias e do ModelSerializer, com a mesma saída do
+# BankTransactionSerializer
+TRANSACTION_LIST_COLUMNS = (
+    'id', 'bank_account_id', 'bank_account__name', 'category_group_id', 'category_group__name',
+    'transaction_type', 'amount', 'description', 'transaction_date', 'created_at', 'updated_at',
+)
+
+# (transaction_date, created_at, id) de cada tupla, usado no cursor da paginação
+transaction_row_cursor = itemgetter(8, 9, 0)
+
+
+def transaction_list_rows(queryset):
+    return queryset.values_list(*TRANSACTION_LIST_COLUMNS)
+
+
+def _datetime_representation(value, tz):
+    # Mesmo formato do DateTimeField do DRF: horário local em ISO 8601
+    value = value.astimezone(tz).isoformat() if tz else value.isoformat()
+    return value[:-6] + 'Z' if value.endswith('+00:00') else value
+
+
+@profiled('serialize')
+def serialize_transaction_rows(rows):
+    """Converte as tuplas de ``transaction_list_rows`` nos dicionários da API"""
+    tz = timezone.get_current_timezone() if settings.USE_TZ else None
+    data = []
+    append = data.append
+    for (pk, bank_account, bank_account_name, category_group, category_group_name, transaction_type,
+         amount, description, transaction_date, created_at, updated_at) in rows:
+        sign = '+' if transaction_type == 'income' else '-'
+        append({
+            'id': pk,
+            'bank_account': bank_account,
+            'bank_account_name': bank_account_name,
+            'category_group': category_group,
+            'category_group_name': category_group_name,
+            'transaction_type': transaction_type,
+            'amount': f'{amount:.2f}',
+            'description': description,
+            'transaction_date': transaction_date.isoformat(),
+            'formatted_amount': f'{sign}R$ {amount:,.2f}',
+            'formatted_date': f'{transaction_date.day:02d}/{transaction_date.month:02d}/{transaction_date.year}',
+            'month_year': f'{transaction_date.year}-{transaction_date.month:02d}',
+            'created_at': _datetime_representation(created_at, tz),
+            'updated_at': _datetime_representation(updated_at, tz),
+        })
+    return data
+
 # Serializer para resumo financeiro
 class FinancialSummarySerializer(serializers.Serializer):
     month_year = serializers.CharField()
@@ -128,3 +349,32 @@ class FinancialSummarySerializer(serializers.Serializer):
     total_expense = serializers.DecimalField(max_digits=10, decimal_places=2)
     balance = serializers.DecimalField(max_digits=10, decimal_places=2)
     transaction_count = serializers.IntegerField()
+
+# Serializer para operações em lote de transações
+class BankTransactionBatchItemSerializer(serializers.Serializer):
+    """Valida uma transação do lote contra contas e categorias pré-carregadas (sem consultas)"""
+    bank_account = serializers.IntegerField()
+    category_group = serializers.IntegerField()
+    transaction_type = serializers.ChoiceField(choices=BankTransaction.TRANSACTION_TYPE_CHOICES)
+    amount = serializers.DecimalField(max_digits=10, decimal_places=2)
+    description = serializers.CharField(max_length=200)
+    transaction_date = serializers.DateField()
+
+    def validate(self, attrs):
+        instance = self.instance
+        bank_account = attrs.get('bank_account', instance.bank_account_id if instance else None)
+        category_group = attrs.get('category_group', instance.category_group_id if instance else None)
+        transaction_type = attrs.get('transaction_type', instance.transaction_type if instance else None)
+
+        # Validar se a conta bancária e o grupo de categoria pertencem ao usuário
+        if bank_account not in self.context['bank_accounts']:
+            raise serializers.ValidationError("Conta bancária inválida.")
+        group = self.context['category_groups'].get(category_group)
+        if group is None:
+            raise serializers.ValidationError("Grupo de categoria inválido.")
+
+        # Validar se o tipo de transação corresponde ao grupo de categoria
+        if transaction_type != group.transaction_type:
+            raise serializers.ValidationError("Tipo de transação deve corresponder ao grupo de categoria.")
+
+        return attrs
@@ -0,0 +1,92 @@
+"""
+Sinais que mantêm os dados derivados das transações consistentes.
+"""
+from django.db.models.signals import post_delete, post_migrate, post_save, pre_save
+from django.dispatch import receiver
+
+from . import cache
+from .investments import invalidate_asset
+from .ledger import LEDGER_FIELDS, apply_transaction, ledger_entry, transactions_changed
+from .models import BankAccount, BankTransaction, CategoryGroup, Contribution, Investment, YieldEvent
+from .partitions import ensure_partitions
+
+
+@receiver(pre_save, sender=BankTransaction)
+def remember_previous_transaction(sender, instance, raw=False, **kwargs):
+    """
+    Guarda o estado gravado da transação antes de uma alteração. A linha fica
+    bloqueada até o fim do ``save`` (atômico, ver ``BankTransaction.save``):
+    uma alteração concorrente espera, em vez de estornar o mesmo estado
+    anterior duas vezes.
+    """
+    instance._ledger_previous = None
+    if raw or instance.pk is None or instance._state.adding:
+        return
+    instance._ledger_previous = (
+        BankTransaction.objects.select_for_update().filter(pk=instance.pk)
+        .values(*LEDGER_FIELDS)
+        .first()
+    )
+
+
+@receiver(post_save, sender=BankTransaction)
+def update_ledger_on_save(sender, instance, created, raw=False, **kwargs):
+    """Estorna o estado anterior da transação e aplica o novo"""
+    if raw:
+        return
+
+    previous = getattr(instance, '_ledger_previous', None)
+    if previous:
+        apply_transaction(previous, sign=-1)
+    apply_transaction(ledger_entry(instance))
+    instance._ledger_previous = None
+
+
+@receiver(post_delete, sender=BankTransaction)
+def update_ledger_on_delete(sender, instance, **kwargs):
+    """Estorna a transação excluída dos saldos e consolidados"""
+    apply_transaction(ledger_entry(instance), sign=-1)
+
+
+@receiver(post_save, sender=BankAccount)
+@receiver(post_delete, sender=BankAccount)
+@receiver(post_save, sender=CategoryGroup)
+@receiver(post_delete, sender=CategoryGroup)
+@receiver(post_save, sender=BankTransaction)
+@receiver(post_delete, sender=BankTransaction)
+def invalidate_cached_responses(sender, instance, raw=False, **kwargs):
+    """Descarta as respostas cacheadas do dono do registro alterado"""
+    if not raw:
+        cache.invalidate_for_model(sender.__name__, instance.user_id)
+
+
+@receiver(transactions_changed)
+def invalidate_cached_responses_in_bulk(sender, user_ids, **kwargs):
+    """Descarta as respostas cacheadas após importações e lotes"""
+    for user_id in user_ids:
+        cache.invalidate_for_model('BankTransaction', user_id)
+
+
+@receiver(post_save, sender=Investment)
+@receiver(post_delete, sender=Investment)
+def invalidate_investment_metrics(sender, instance, raw=False, **kwargs):
+    """Recalcula as métricas do investimento na próxima leitura"""
+    if not raw:
+        invalidate_asset(instance.pk)
+
+
+@receiver(post_save, sender=Contribution)
+@receiver(post_delete, sender=Contribution)
+@receiver(post_save, sender=YieldEvent)
+@receiver(post_delete, sender=YieldEvent)
+def invalidate_investment_metrics_on_event(sender, instance, raw=False, **kwargs):
+    """Aportes e rendimentos alterados mudam todo o histórico do investimento"""
+    if not raw:
+        invalidate_asset(instance.investment_id)
+
+
+@receiver(post_migrate)
+def create_transaction_partitions(sender, using='default', **kwargs):
+    """Garante as partições de transações dos próximos meses a cada ``migrate``"""
+    if sender.name == 'accounts':
+        ensure_partitions(using=using)
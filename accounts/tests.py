@@ -1,3 +1,1860 @@
-from django.test import TestCase
+import json
+import os
+import re
+import shutil
+import socket
+import subprocess
+import tempfile
+import threading
+import unittest
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from contextlib import contextmanager
+from unittest import mock
+from datetime import date, timedelta
+from io import StringIO
+from urllib.parse import parse_qs, urlsplit
+from decimal import Decimal
 
-# Create your tests here.
+from django.conf import settings
+from django.core import signing
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Sum
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+
+from . import async_views, cache, deletion, investments, jobs, partitions, periods, profiling, recurring, search, seeding, tokens, views
+from .cache import CATEGORY_GROUPS, get_cache
+from .importers import ImportRowError, TransactionImporter, iter_csv_rows, parse_amount
+from .ledger import (
+    rebuild_balances, rebuild_rollups, signed_amount_expression, transactions_changed, verify_balances, verify_rollups,
+)
+from .models import (
+    User, BankAccount, CategoryGroup, BankTransaction, Contribution, Investment, Job, MonthlyRollup,
+    RecurringTransaction, RevokedToken, YieldEvent,
+)
+from .pagination import TRANSACTION_ORDERING, TransactionCursorPagination
+from .renderers import ORJSONRenderer
+from .serializers import BankTransactionSerializer, serialize_transaction_rows, transaction_list_rows
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'EXPLAIN só é verificado no PostgreSQL')
+class TransactionQueryPlanTests(TransactionTestCase):
+    """
+    Garante que as consultas mais frequentes usam os índices criados para
+    elas. Fora de uma transação de teste para que o VACUUM preencha o mapa de
+    visibilidade, do qual depende o Index Only Scan.
+    """
+
+    def setUp(self):
+        # Partições mensais dos dados, como em produção (e não só a default)
+        partitions.ensure_partitions(start=date(2023, 1, 1))
+        self.users = [User.objects.create_user(f'user{i}', password='x') for i in range(4)]
+        transactions = []
+        for user in self.users:
+            account = BankAccount.objects.create(user=user, name='Conta')
+            group = CategoryGroup.objects.create(user=user, name='Mercado', transaction_type='expense')
+            for day in range(500):
+                transactions.append(BankTransaction(
+                    user=user, bank_account=account, category_group=group,
+                    transaction_type='expense', amount=Decimal('10.00'),
+                    description='Compra', transaction_date=date(2023, 1, 1) + timedelta(days=day),
+                ))
+        BankTransaction.objects.bulk_create(transactions)
+        self.user = self.users[0]
+        self.account = self.user.bank_accounts.get()
+        with connection.cursor() as cursor:
+            cursor.execute('VACUUM ANALYZE accounts_banktransaction')
+            cursor.execute('ANALYZE accounts_monthlyrollup')
+
+    def explain(self, queryset, disable=('seqscan', 'bitmapscan', 'sort')):
+        """
+        EXPLAIN da consulta. Em tabelas pequenas o planejador prefere Seq Scan
+        (ou um índice qualquer seguido de Sort) mesmo com o índice certo;
+        desabilitar esses planos faz o EXPLAIN revelar se existe um índice
+        que atende ao filtro e à ordenação.
+        """
+        with transaction.atomic(), connection.cursor() as cursor:
+            for plan in disable:
+                cursor.execute(f'SET LOCAL enable_{plan} = off')
+            return queryset.explain()
+
+    def used_indexes(self, plan, scan='Index Scan', table='accounts_banktransaction'):
+        """Índices da tabela usados pelo ``scan``; nas partições, o índice da tabela particionada"""
+        names = set(re.findall(rf'{scan}(?: Backward)? (?:using|on) (\S+)', plan))
+        indexes = set()
+        with connection.cursor() as cursor:
+            for name in names:
+                cursor.execute(
+                    'SELECT root::text, indrelid::regclass::text FROM pg_index, '
+                    'coalesce(pg_partition_root(%s::regclass), %s::regclass) AS root WHERE indexrelid = root',
+                    [name, name],
+                )
+                index, indexed_table = cursor.fetchone()
+                if indexed_table == table:
+                    indexes.add(index)
+        return indexes
+
+    def assertUsesIndex(self, queryset, index, scan='Index Scan', table='accounts_banktransaction'):
+        plan = self.explain(queryset)
+        self.assertEqual(self.used_indexes(plan, scan, table), {index}, plan)
+        self.assertNotIn('Seq Scan', plan, plan)
+        # Nós Sort/Incremental Sort; o "Sort Key" do Merge Append das partições já vem ordenado
+        self.assertNotRegex(plan, r'Sort  \(', plan)
+
+    def test_month_listing_uses_index(self):
+        queryset = BankTransaction.objects.filter(
+            user=self.user,
+            transaction_date__range=[date(2023, 3, 1), date(2023, 3, 31)],
+        ).order_by(*TRANSACTION_ORDERING)[:201]
+        self.assertUsesIndex(queryset, 'txn_user_date_idx')
+
+    def test_keyset_page_uses_index(self):
+        paginator = TransactionCursorPagination()
+        last = BankTransaction.objects.filter(user=self.user).order_by(*TRANSACTION_ORDERING)[100]
+        request = Request(APIRequestFactory().get('/', {'cursor': paginator.encode_cursor(last)}))
+        queryset = paginator._page_queryset(BankTransaction.objects.filter(user=self.user), request)
+        self.assertUsesIndex(queryset, 'txn_user_date_idx')
+        # O cursor limita a leitura do índice: páginas profundas não leem as linhas anteriores
+        plan = self.explain(queryset)
+        conditions = re.findall(r'Index Cond: (.*)', plan)
+        self.assertTrue(conditions, plan)
+        for condition in conditions:
+            self.assertIn('ROW(transaction_date, created_at, id) <', condition, plan)
+        # O único Filter é o das contas excluídas (manager), nunca o cursor
+        for condition in re.findall(r'Filter: (.*)', plan):
+            self.assertNotIn('created_at', condition, plan)
+
+    def test_account_balance_uses_covering_index(self):
+        queryset = (
+            BankTransaction.objects.filter(bank_account=self.account)
+            .order_by()
+            .values('bank_account')
+            .annotate(total=Sum(signed_amount_expression()))
+        )
+        # O INCLUDE (amount) responde a soma sem ler a tabela
+        self.assertUsesIndex(queryset, 'txn_account_type_idx', scan='Index Only Scan')
+
+    def test_monthly_rollup_read_uses_index(self):
+        queryset = MonthlyRollup.objects.filter(user=self.user, month=date(2023, 3, 1))
+        self.assertUsesIndex(queryset, 'rollup_user_month_idx', table='accounts_monthlyrollup')
+
+    def test_search_uses_description_index(self):
+        # Termo seletivo: nenhuma das descrições ("Compra") corresponde
+        queryset = search.search_transactions(self.user, 'farmácia', {'amount__gte': Decimal('5.00')})[:51]
+        # Índices GIN só são lidos por Bitmap Index Scan
+        plan = self.explain(queryset, disable=('seqscan',))
+        self.assertIn('txn_description_search_idx', self.used_indexes(plan, 'Bitmap Index Scan'), plan)
+
+
+class QueryBudgetMixin:
+    """Asserções sobre o número de consultas SQL executadas por um trecho"""
+
+    @contextmanager
+    def assertQueryBudget(self, budget):
+        """Falha se o bloco executar mais do que ``budget`` consultas"""
+        with CaptureQueriesContext(connection) as context:
+            yield context
+        executed = len(context.captured_queries)
+        if executed > budget:
+            queries = '\n'.join(
+                f'{index}. {query["sql"]}'
+                for index, query in enumerate(context.captured_queries, start=1)
+            )
+            self.fail(f'{executed} consultas executadas, orçamento de {budget}:\n{queries}')
+
+    def count_queries(self, func, *args, **kwargs):
+        """Executa ``func`` e retorna quantas consultas ela fez"""
+        with CaptureQueriesContext(connection) as context:
+            func(*args, **kwargs)
+        return len(context.captured_queries)
+
+
+class AccountsAPITestCase(TestCase):
+    """Base dos testes da API: cliente autenticado como ``self.user`` e cache limpo"""
+
+    def setUp(self):
+        get_cache().clear()
+        cache.clear_stats()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+
+class LedgerTests(QueryBudgetMixin, TestCase):
+    """Saldos e consolidados mantidos pelos sinais a cada criação, alteração e exclusão"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('ledger', password='x')
+        cls.checking = BankAccount.objects.create(user=cls.user, name='Corrente')
+        cls.savings = BankAccount.objects.create(user=cls.user, name='Poupança')
+        cls.market = CategoryGroup.objects.create(user=cls.user, name='Mercado', transaction_type='expense')
+
+    def create(self, amount='100.00', **fields):
+        fields = {
+            'bank_account': self.checking, 'category_group': self.market, 'transaction_type': 'expense',
+            'transaction_date': date(2024, 5, 10), **fields,
+        }
+        return BankTransaction.objects.create(
+            user=self.user, amount=Decimal(amount), description='Compra', **fields
+        )
+
+    def balance(self, account):
+        return BankAccount.objects.get(pk=account.pk).balance
+
+    def rollup(self, account, month=date(2024, 5, 1)):
+        return (
+            MonthlyRollup.objects.filter(bank_account=account, category_group=self.market, month=month)
+            .values_list('total_income', 'total_expense', 'transaction_count')
+            .first()
+        )
+
+    def assertLedgerConsistent(self):
+        self.assertEqual(verify_balances(), [])
+        self.assertEqual(verify_rollups(), [])
+
+    def test_create_applies_balance_and_rollup(self):
+        self.create('100.00')
+        self.create('40.00', transaction_type='income')
+        self.assertEqual(self.balance(self.checking), Decimal('-60.00'))
+        self.assertEqual(self.rollup(self.checking), (Decimal('40.00'), Decimal('100.00'), 2))
+        self.assertLedgerConsistent()
+
+    def test_update_moving_account_type_and_month(self):
+        transaction = self.create('100.00')
+        transaction.bank_account = self.savings
+        transaction.save()
+        self.assertEqual((self.balance(self.checking), self.balance(self.savings)), (0, Decimal('-100.00')))
+        self.assertIsNone(self.rollup(self.checking))
+        self.assertEqual(self.rollup(self.savings), (0, Decimal('100.00'), 1))
+
+        transaction.transaction_type = 'income'
+        transaction.amount = Decimal('30.00')
+        transaction.save()
+        self.assertEqual(self.balance(self.savings), Decimal('30.00'))
+        self.assertEqual(self.rollup(self.savings), (Decimal('30.00'), 0, 1))
+
+        transaction.transaction_date = date(2024, 6, 1)
+        transaction.save()
+        self.assertIsNone(self.rollup(self.savings))
+        self.assertEqual(self.rollup(self.savings, date(2024, 6, 1)), (Decimal('30.00'), 0, 1))
+        self.assertLedgerConsistent()
+
+    def test_delete_reverses_balance_and_rollup(self):
+        kept = self.create('25.00')
+        self.create('100.00').delete()
+        self.assertEqual(self.balance(self.checking), Decimal('-25.00'))
+        self.assertEqual(self.rollup(self.checking), (0, Decimal('25.00'), 1))
+        kept.delete()
+        self.assertEqual(self.balance(self.checking), 0)
+        self.assertIsNone(self.rollup(self.checking))
+        self.assertLedgerConsistent()
+
+    @unittest.skipUnless(connection.features.has_select_for_update, 'Sem SELECT ... FOR UPDATE')
+    def test_update_locks_the_previous_row(self):
+        transaction = self.create('100.00')
+        transaction.amount = Decimal('80.00')
+        with CaptureQueriesContext(connection) as context:
+            transaction.save()
+        previous = [query['sql'] for query in context.captured_queries if 'FOR UPDATE' in query['sql']]
+        self.assertEqual(len(previous), 1, previous)
+        self.assertEqual(self.balance(self.checking), Decimal('-80.00'))
+
+    def test_verify_and_rebuild(self):
+        self.create('100.00')
+        self.create('50.00', bank_account=self.savings)
+        BankAccount.objects.filter(pk=self.checking.pk).update(balance=Decimal('999.00'))
+        MonthlyRollup.objects.filter(bank_account=self.savings).update(transaction_count=7)
+
+        mismatches = verify_balances()
+        self.assertEqual(
+            [(account.pk, stored, expected) for account, stored, expected in mismatches],
+            [(self.checking.pk, Decimal('999.00'), Decimal('-100.00'))],
+        )
+        self.assertEqual(verify_rollups(), [(self.savings.pk, self.market.pk, date(2024, 5, 1))])
+
+        changed = mock.Mock()
+        transactions_changed.connect(changed, weak=False)
+        self.addCleanup(transactions_changed.disconnect, changed)
+        updated_at = BankAccount.objects.get(pk=self.checking.pk).updated_at
+        self.assertEqual(rebuild_balances(), 1)
+        # A correção muda o ETag das contas e descarta as respostas cacheadas do dono
+        self.assertGreater(BankAccount.objects.get(pk=self.checking.pk).updated_at, updated_at)
+        changed.assert_called_once_with(signal=transactions_changed, sender=BankTransaction, user_ids={self.user.pk})
+        rebuild_rollups()
+        self.assertEqual(self.balance(self.checking), Decimal('-100.00'))
+        self.assertEqual(self.rollup(self.savings), (0, Decimal('50.00'), 1))
+        self.assertLedgerConsistent()
+        # Nada a corrigir na segunda vez
+        self.assertEqual(rebuild_balances(), 0)
+        changed.assert_called_once()
+
+    @unittest.skipUnless(connection.features.has_select_for_update, 'Sem SELECT ... FOR UPDATE')
+    def test_rebuild_locks_the_accounts(self):
+        self.create('100.00')
+        with CaptureQueriesContext(connection) as context:
+            rebuild_balances(BankAccount.objects.filter(user=self.user))
+        locks = [query['sql'] for query in context.captured_queries if 'FOR UPDATE' in query['sql']]
+        self.assertEqual(len(locks), 1, locks)
+        self.assertIn('accounts_bankaccount', locks[0])
+
+
+@override_settings(ACCOUNTS_CACHE_ENABLED=False)
+class TransactionPaginationTests(AccountsAPITestCase):
+    """Paginação por chave da listagem de transações"""
+
+    url = '/api/accounts/transactions/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('pager', password='x')
+        account = BankAccount.objects.create(user=cls.user, name='Corrente')
+        group = CategoryGroup.objects.create(user=cls.user, name='Mercado', transaction_type='expense')
+        BankTransaction.objects.bulk_create([
+            BankTransaction(
+                user=cls.user, bank_account=account, category_group=group, transaction_type='expense',
+                amount=Decimal('10.00'), description=f'Compra {index}',
+                transaction_date=date(2024, 5, 10 if index % 2 else 20),
+            )
+            for index in range(25)
+        ])
+        # Empates em transaction_date e created_at: só o id desempata
+        BankTransaction.objects.filter(user=cls.user).update(created_at=timezone.now())
+        cls.expected = list(
+            BankTransaction.objects.filter(user=cls.user).order_by(*TRANSACTION_ORDERING).values_list('id', flat=True)
+        )
+
+    def walk(self, **params):
+        ids, pages = [], 0
+        response = self.client.get(self.url, {'month_year': '2024-05', **params})
+        while True:
+            self.assertEqual(response.status_code, 200, response.data)
+            ids.extend(row['id'] for row in response.data['results'])
+            pages += 1
+            if not response.data['next']:
+                return ids, pages
+            response = self.client.get(response.data['next'])
+
+    def test_walks_every_page_without_duplicates_or_gaps(self):
+        ids, pages = self.walk(page_size=4)
+        self.assertEqual(ids, self.expected)
+        self.assertEqual(pages, 7)
+
+    def test_tampered_cursor_is_rejected(self):
+        response = self.client.get(self.url, {'month_year': '2024-05', 'page_size': 4})
+        cursor = parse_qs(urlsplit(response.data['next']).query)['cursor'][0]
+        tampered = cursor[:-1] + ('A' if cursor[-1] != 'A' else 'B')
+        for value in (tampered, 'x', signing.dumps(['2024-05-10'], salt='accounts.transactions.cursor')):
+            response = self.client.get(self.url, {'month_year': '2024-05', 'cursor': value})
+            self.assertEqual(response.status_code, 400, value)
+            self.assertIn('cursor', response.data)
+
+    @override_settings(TRANSACTIONS_MAX_PAGE_SIZE=10)
+    def test_page_size_is_clamped(self):
+        response = self.client.get(self.url, {'month_year': '2024-05', 'page_size': 10 ** 6})
+        self.assertEqual(len(response.data['results']), 10)
+        ids, pages = self.walk(page_size=10 ** 6)
+        self.assertEqual((ids, pages), (self.expected, 3))
+        for value in ('0', '-1', 'muitas'):
+            response = self.client.get(self.url, {'month_year': '2024-05', 'page_size': value})
+            self.assertEqual(response.status_code, 400, value)
+
+
+@override_settings(ACCOUNTS_CACHE_ENABLED=False)
+class EndpointQueryBudgetTests(QueryBudgetMixin, AccountsAPITestCase):
+    """
+    Cada endpoint executa um número fixo de consultas, independente do volume.
+    Os orçamentos incluem as agregações do ETag, já que o cache está desligado.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('budget', password='x')
+        cls.accounts = [
+            BankAccount.objects.create(user=cls.user, name=f'Conta {i}') for i in range(3)
+        ]
+        cls.income = CategoryGroup.objects.create(user=cls.user, name='Salário', transaction_type='income')
+        cls.expense = CategoryGroup.objects.create(user=cls.user, name='Mercado', transaction_type='expense')
+        cls.transaction = cls.create_transactions(1)[0]
+
+    @classmethod
+    def create_transactions(cls, count, transaction_date=date(2024, 5, 10)):
+        return [
+            BankTransaction.objects.create(
+                user=cls.user,
+                bank_account=cls.accounts[i % len(cls.accounts)],
+                category_group=cls.expense if i % 2 else cls.income,
+                transaction_type='expense' if i % 2 else 'income',
+                amount=Decimal('12.34'),
+                description=f'Transação {i}',
+                transaction_date=transaction_date,
+            )
+            for i in range(count)
+        ]
+
+
+    def assertConstantQueries(self, url, budget):
+        """Compara a contagem de consultas com poucos e com muitos registros"""
+        few = self.count_queries(self.client.get, url)
+        self.create_transactions(40)
+        with self.assertQueryBudget(budget):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        many = self.count_queries(self.client.get, url)
+        self.assertEqual(few, many)
+        return response
+
+    def test_transactions_list(self):
+        response = self.assertConstantQueries('/api/accounts/transactions/?month_year=2024-05', 4)
+        self.assertEqual(len(response.data['results']), 41)
+
+    def test_transaction_detail(self):
+        with self.assertQueryBudget(1):
+            response = self.client.get(f'/api/accounts/transactions/{self.transaction.id}/')
+        self.assertEqual(response.data['bank_account_name'], 'Conta 0')
+
+    def test_transaction_create(self):
+        payload = {
+            'bank_account': self.accounts[1].id,
+            'category_group': self.expense.id,
+            'transaction_type': 'expense',
+            'amount': '50.00',
+            'description': 'Farmácia',
+            'transaction_date': '2024-05-11',
+        }
+        # Conta, categoria, INSERT, saldo e consolidado (criado dentro de um savepoint)
+        with self.assertQueryBudget(8):
+            response = self.client.post('/api/accounts/transactions/', payload, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['category_group_name'], 'Mercado')
+
+    def test_bank_accounts_list(self):
+        response = self.assertConstantQueries('/api/accounts/bank-accounts/', 2)
+        self.assertEqual(len(response.data), 3)
+
+    def test_category_groups_list(self):
+        self.assertConstantQueries('/api/accounts/category-groups/', 2)
+
+    def test_financial_summary(self):
+        response = self.assertConstantQueries('/api/accounts/financial-summary/?month_year=2024-05', 2)
+        self.assertEqual(response.data['transaction_count'], 41)
+
+    def test_financial_summary_range(self):
+        self.assertConstantQueries(
+            '/api/accounts/financial-summary/range/?start=2023-01&end=2024-12', 2
+        )
+
+    def test_financial_summary_range_defaults_to_twelve_months(self):
+        response = self.client.get('/api/accounts/financial-summary/range/?end=2024-03')
+        months = [row['month_year'] for row in response.data]
+        self.assertEqual(len(months), 12)
+        self.assertEqual((months[0], months[-1]), ('2023-04', '2024-03'))
+
+        with mock.patch.object(periods, 'current_month', return_value='2024-03'):
+            response = self.client.get('/api/accounts/financial-summary/range/')
+        self.assertEqual(len(response.data), 12)
+        self.assertEqual(response.data[0]['month_year'], '2023-04')
+
+    def test_dashboard(self):
+        # ETag (contas, categorias e transações), resumo e as três listagens
+        response = self.assertConstantQueries('/api/accounts/dashboard/?month_year=2024-05&page_size=10', 7)
+        self.assertEqual(len(response.data['bank_accounts']), 3)
+        self.assertEqual(len(response.data['category_groups']), 2)
+        self.assertEqual(response.data['financial_summary']['transaction_count'], 41)
+        self.assertEqual(len(response.data['transactions']['results']), 10)
+
+        # O link da próxima página aponta para a listagem de transações do mês
+        next_url = response.data['transactions']['next']
+        self.assertIn('/api/accounts/transactions/?', next_url)
+        self.assertIn('month_year=2024-05', next_url)
+        page = self.client.get(next_url)
+        self.assertEqual(len(page.data['results']), 10)
+
+
+class TransactionImportTests(AccountsAPITestCase):
+    """Importação em lote de extratos CSV e OFX"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('importer', password='x')
+        cls.other = User.objects.create_user('other', password='x')
+        cls.account = BankAccount.objects.create(user=cls.user, name='Corrente')
+        cls.other_account = BankAccount.objects.create(user=cls.other, name='Alheia')
+        cls.salary = CategoryGroup.objects.create(user=cls.user, name='Salário', transaction_type='income')
+        cls.market = CategoryGroup.objects.create(user=cls.user, name='Mercado', transaction_type='expense')
+
+
+    def upload(self, name, content, **data):
+        upload = SimpleUploadedFile(name, content.encode(data.pop('encoding', 'utf-8')))
+        return self.client.post('/api/accounts/transactions/import/', {'file': upload, **data}, format='multipart')
+
+    def test_csv_import_reports_row_errors(self):
+        content = (
+            'transaction_date;description;amount;category_group\n'
+            '2024-05-01;Salário maio;5.000,00;Salário\n'
+            '02/05/2024;Supermercado;-123,45;Mercado\n'
+            '2024-05-03;Sem categoria;-10,00;Inexistente\n'
+            'ontem;Data ruim;-1,00;Mercado\n'
+        )
+        response = self.upload('extrato.csv', content, bank_account=self.account.id)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual(response.data['error_count'], 2)
+        self.assertEqual([error['row'] for error in response.data['errors']], [4, 5])
+
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, Decimal('4876.55'))
+        self.assertEqual(verify_balances(), [])
+        self.assertEqual(verify_rollups(), [])
+
+    def test_csv_import_in_small_batches(self):
+        rows = ''.join(f'2024-06-{day:02d},Compra {day},-{day}.00\n' for day in range(1, 29))
+        importer = TransactionImporter(
+            self.user, bank_account=self.account.id, expense_category=self.market.id, batch_size=5
+        )
+        upload = SimpleUploadedFile('extrato.csv', ('transaction_date,description,amount\n' + rows).encode())
+        report = importer.run(iter_csv_rows(upload))
+
+        self.assertEqual(report['created'], 28)
+        self.assertEqual(BankTransaction.objects.filter(user=self.user).count(), 28)
+        self.assertEqual(verify_rollups(), [])
+
+    def test_ofx_import(self):
+        content = (
+            'OFXHEADER:100\nDATA:OFXSGML\nCHARSET:1252\n\n'
+            '<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>\n'
+            '<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20240510120000[-3:BRT]<TRNAMT>-45.90<FITID>1<MEMO>Padaria São João\n'
+            '</STMTTRN>\n'
+            '<STMTTRN>\n<TRNTYPE>CREDIT\n<DTPOSTED>20240511\n<TRNAMT>100.00\n<FITID>2\n<NAME>PIX recebido\n</STMTTRN>\n'
+            '</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>\n'
+        )
+        response = self.upload(
+            'extrato.ofx', content, encoding='cp1252', bank_account=self.account.id,
+            income_category=self.salary.id, expense_category='Mercado',
+        )
+
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(response.data['created'], 2)
+        bakery = BankTransaction.objects.get(transaction_type='expense')
+        self.assertEqual(bakery.description, 'Padaria São João')
+        self.assertEqual(bakery.amount, Decimal('45.90'))
+        self.assertEqual(bakery.transaction_date, date(2024, 5, 10))
+
+    def test_parse_amount_separators(self):
+        for value, expected in (
+            ('1.234,56', '1234.56'), ('1,234.56', '1234.56'), ('-1.234,56', '-1234.56'),
+            ('R$ 10,00', '10.00'), ('1234.5', '1234.50'), ('1.234.567', '1234567.00'), ('42', '42.00'),
+        ):
+            self.assertEqual(parse_amount(value), Decimal(expected), value)
+        # Ambíguos ou com centavos demais: recusados, nunca arredondados
+        for value in ('1.234', '10.999', '1,234', 'abc', 'NaN'):
+            with self.assertRaises(ImportRowError, msg=value):
+                parse_amount(value)
+
+    def test_rejects_accounts_of_other_users(self):
+        content = 'transaction_date,description,amount\n2024-05-01,Teste,10.00\n'
+        response = self.upload('extrato.csv', content, bank_account=self.other_account.id)
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(BankTransaction.objects.exists())
+
+
+class TransactionBatchTests(QueryBudgetMixin, AccountsAPITestCase):
+    """Criação, alteração e exclusão de transações em lote"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('batch', password='x')
+        cls.account = BankAccount.objects.create(user=cls.user, name='Corrente')
+        cls.savings = BankAccount.objects.create(user=cls.user, name='Poupança')
+        cls.market = CategoryGroup.objects.create(user=cls.user, name='Mercado', transaction_type='expense')
+        cls.leisure = CategoryGroup.objects.create(user=cls.user, name='Lazer', transaction_type='expense')
+        cls.foreign_group = CategoryGroup.objects.create(
+            user=User.objects.create_user('outsider', password='x'), name='Mercado', transaction_type='expense'
+        )
+
+    def setUp(self):
+        super().setUp()
+        self.transactions = [
+            BankTransaction.objects.create(
+                user=self.user, bank_account=self.account, category_group=self.market,
+                transaction_type='expense', amount=Decimal('10.00'), description=f'Compra {i}',
+                transaction_date=date(2024, 5, i + 1),
+            )
+            for i in range(20)
+        ]
+
+    def post(self, operations):
+        return self.client.post('/api/accounts/transactions/batch/', {'operations': operations}, format='json')
+
+    def test_recategorize_in_one_request(self):
+        operations = [
+            {'op': 'update', 'id': transaction.id, 'data': {'category_group': self.leisure.id}}
+            for transaction in self.transactions
+        ]
+        # Número fixo de consultas, independente da quantidade de itens do lote
+        with self.assertQueryBudget(12):
+            response = self.post(operations)
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertTrue(all(result['status'] == 'ok' for result in response.data['results']))
+        self.assertEqual(response.data['results'][0]['data']['category_group_name'], 'Lazer')
+        self.assertEqual(BankTransaction.objects.filter(category_group=self.leisure).count(), 20)
+        self.assertEqual(verify_rollups(), [])
+
+    def test_mixed_operations(self):
+        response = self.post([
+            {'op': 'create', 'data': {
+                'bank_account': self.savings.id, 'category_group': self.market.id,
+                'transaction_type': 'expense', 'amount': '7.50', 'description': 'Feira',
+                'transaction_date': '2024-06-01',
+            }},
+            {'op': 'update', 'id': self.transactions[0].id, 'data': {'bank_account': self.savings.id}},
+            {'op': 'delete', 'id': self.transactions[1].id},
+        ])
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertIsNotNone(response.data['results'][0]['id'])
+        self.assertFalse(BankTransaction.objects.filter(pk=self.transactions[1].id).exists())
+        self.savings.refresh_from_db()
+        self.account.refresh_from_db()
+        self.assertEqual(self.savings.balance, Decimal('-17.50'))
+        self.assertEqual(self.account.balance, Decimal('-180.00'))
+        self.assertEqual(verify_balances(), [])
+        self.assertEqual(verify_rollups(), [])
+
+    def test_invalid_item_rolls_back_everything(self):
+        response = self.post([
+            {'op': 'delete', 'id': self.transactions[0].id},
+            {'op': 'update', 'id': self.transactions[1].id, 'data': {'category_group': self.foreign_group.id}},
+            {'op': 'delete', 'id': 999999},
+        ])
+
+        self.assertEqual(response.status_code, 400)
+        statuses = [result['status'] for result in response.data['results']]
+        self.assertEqual(statuses, ['skipped', 'error', 'error'])
+        self.assertEqual(BankTransaction.objects.filter(user=self.user).count(), 20)
+
+    def test_malformed_batch(self):
+        response = self.post([{'op': 'merge'}])
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('error', response.data)
+
+        # Corpo JSON que não é um objeto
+        response = self.client.post('/api/accounts/transactions/batch/', [{'op': 'delete'}], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('error', response.data)
+
+    @unittest.skipUnless(connection.features.has_select_for_update, 'Sem SELECT ... FOR UPDATE')
+    def test_targets_are_locked_in_the_batch_transaction(self):
+        with self.assertQueryBudget(12) as context:
+            response = self.post([{'op': 'delete', 'id': self.transactions[0].id}])
+        self.assertEqual(response.status_code, 200, response.data)
+        locked = [query['sql'] for query in context.captured_queries if 'FOR UPDATE' in query['sql']]
+        self.assertEqual(len(locked), 1, locked)
+        self.assertIn('accounts_banktransaction', locked[0])
+
+
+@override_settings(ACCOUNTS_CACHE_ENABLED=True)
+class ResponseCacheTests(QueryBudgetMixin, AccountsAPITestCase):
+    """Cache das respostas de leitura por usuário, invalidado pelos sinais"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('cached', password='x', user_type='admin')
+        cls.account = BankAccount.objects.create(user=cls.user, name='Corrente')
+        cls.market = CategoryGroup.objects.create(user=cls.user, name='Mercado', transaction_type='expense')
+
+    def create_transaction(self, amount='10.00'):
+        return BankTransaction.objects.create(
+            user=self.user, bank_account=self.account, category_group=self.market,
+            transaction_type='expense', amount=Decimal(amount), description='Compra',
+            transaction_date=date(2024, 5, 1),
+        )
+
+    def test_repeated_reads_hit_cache(self):
+        self.client.get('/api/accounts/category-groups/')
+        with self.assertQueryBudget(0):
+            response = self.client.get('/api/accounts/category-groups/')
+        self.assertEqual(response.data[0]['name'], 'Mercado')
+
+        stats = self.client.get('/api/accounts/cache-stats/').data
+        self.assertEqual(stats['category_groups']['hits'], 1)
+        self.assertEqual(stats['category_groups']['misses'], 1)
+
+    def test_stats_add_up_across_processes_and_threads(self):
+        with tempfile.TemporaryDirectory() as location, override_settings(CACHES={
+            'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': location},
+        }):
+            # Threads do mesmo worker: o incr do FileBasedCache perderia contagens
+            threads = [
+                threading.Thread(target=lambda: [cache._count(CATEGORY_GROUPS, 'hits') for _ in range(50)])
+                for _ in range(8)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            # Outro worker, com os próprios contadores e chave
+            with mock.patch.object(cache, '_stats', Counter()), \
+                    mock.patch.object(cache, '_worker_stats_key', return_value='accounts:stats:worker:outro:1'):
+                cache._count(CATEGORY_GROUPS, 'hits')
+                cache._count(CATEGORY_GROUPS, 'misses')
+
+            stats = cache.cache_stats()[CATEGORY_GROUPS]
+        self.assertEqual((stats['hits'], stats['misses']), (401, 1))
+
+    def test_transaction_changes_invalidate_dependent_resources(self):
+        summary_url = '/api/accounts/financial-summary/?month_year=2024-05'
+        self.client.get('/api/accounts/bank-accounts/')
+        self.client.get(summary_url)
+        self.client.get('/api/accounts/category-groups/')
+
+        # A invalidação acontece no commit da transação do banco
+        with self.captureOnCommitCallbacks(execute=True):
+            transaction = self.create_transaction()
+        self.assertEqual(self.client.get(summary_url).data['transaction_count'], 1)
+        self.assertEqual(self.client.get('/api/accounts/bank-accounts/').data[0]['current_balance'], -10.0)
+        with self.assertQueryBudget(0):
+            self.client.get('/api/accounts/category-groups/')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            transaction.delete()
+        self.assertEqual(self.client.get(summary_url).data['transaction_count'], 0)
+
+    def test_bulk_changes_invalidate(self):
+        transaction = self.create_transaction()
+        url = '/api/accounts/transactions/?month_year=2024-05'
+        self.assertEqual(len(self.client.get(url).data['results']), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                '/api/accounts/transactions/batch/',
+                {'operations': [{'op': 'delete', 'id': transaction.id}]},
+                format='json',
+            )
+        self.assertEqual(self.client.get(url).data['results'], [])
+
+    def test_invalidation_waits_for_commit(self):
+        url = '/api/accounts/bank-accounts/'
+        self.client.get(url)
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.create_transaction()
+            # Antes do commit a versão cacheada continua valendo
+            with self.assertQueryBudget(0):
+                self.assertEqual(self.client.get(url).data[0]['current_balance'], 0)
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.client.get(url).data[0]['current_balance'], -10.0)
+
+    def test_cache_is_per_user(self):
+        self.client.get('/api/accounts/bank-accounts/')
+        other = User.objects.create_user('other-cached', password='x')
+        self.client.force_authenticate(other)
+        self.assertEqual(self.client.get('/api/accounts/bank-accounts/').data, [])
+
+
+@override_settings(ACCOUNTS_CACHE_ENABLED=True)
+class ConditionalGetTests(QueryBudgetMixin, AccountsAPITestCase):
+    """Respostas 304 quando o If-None-Match corresponde ao estado atual"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('etag', password='x')
+        cls.account = BankAccount.objects.create(user=cls.user, name='Corrente')
+        cls.market = CategoryGroup.objects.create(user=cls.user, name='Mercado', transaction_type='expense')
+        cls.transaction = BankTransaction.objects.create(
+            user=cls.user, bank_account=cls.account, category_group=cls.market,
+            transaction_type='expense', amount=Decimal('10.00'), description='Compra',
+            transaction_date=date(2024, 5, 1),
+        )
+
+    def assertRevalidates(self, url):
+        response = self.client.get(url)
+        etag = response['ETag']
+        self.assertIn('no-cache', response['Cache-Control'])
+        # O ETag calculado na primeira requisição fica no cache
+        with self.assertQueryBudget(0):
+            not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified.content, b'')
+        return etag
+
+    def test_all_resources_support_conditional_get(self):
+        for url in (
+            '/api/accounts/bank-accounts/',
+            '/api/accounts/category-groups/',
+            '/api/accounts/transactions/?month_year=2024-05',
+            '/api/accounts/financial-summary/?month_year=2024-05',
+            '/api/accounts/financial-summary/range/?start=2024-01&end=2024-06',
+        ):
+            with self.subTest(url=url):
+                self.assertRevalidates(url)
+
+    def test_changes_produce_new_etag(self):
+        accounts_etag = self.assertRevalidates('/api/accounts/bank-accounts/')
+        transactions_url = '/api/accounts/transactions/?month_year=2024-05'
+        transactions_etag = self.assertRevalidates(transactions_url)
+
+        self.transaction.amount = Decimal('25.00')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.transaction.save()
+        response = self.client.get('/api/accounts/bank-accounts/', HTTP_IF_NONE_MATCH=accounts_etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data[0]['current_balance'], -25.0)
+
+        self.market.name = 'Supermercado'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.market.save()
+        response = self.client.get(transactions_url, HTTP_IF_NONE_MATCH=transactions_etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0]['category_group_name'], 'Supermercado')
+
+    def test_deletion_produces_new_etag(self):
+        url = '/api/accounts/financial-summary/?month_year=2024-05'
+        etag = self.assertRevalidates(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.transaction.delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['transaction_count'], 0)
+
+    @override_settings(ACCOUNTS_CACHE_ENABLED=False)
+    def test_validators_without_response_cache(self):
+        url = '/api/accounts/transactions/?month_year=2024-05'
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        BankTransaction.objects.create(
+            user=self.user, bank_account=self.account, category_group=self.market,
+            transaction_type='expense', amount=Decimal('1.00'), description='Café',
+            transaction_date=date(2024, 5, 2),
+        )
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+@override_settings(ACCOUNTS_CACHE_ENABLED=False)
+class JWTAuthenticationTests(QueryBudgetMixin, TestCase):
+    """Login com emissão de tokens, renovação, revogação e rotação de chaves"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('jwt', password='segredo123')
+        BankAccount.objects.create(user=cls.user, name='Corrente')
+
+    def setUp(self):
+        self.client = APIClient()
+        tokens = self.client.post(
+            '/api/accounts/login/', {'username': 'jwt', 'password': 'segredo123'}, format='json'
+        ).data
+        self.access, self.refresh = tokens['access'], tokens['refresh']
+        # Sem sessão: só o token autentica as próximas requisições
+        self.client = APIClient()
+
+    def get(self, url, token):
+        return self.client.get(url, HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_access_token_authenticates_without_user_query(self):
+        self.get('/api/accounts/bank-accounts/', self.access)
+        # ETag e listagem; nenhuma consulta ao usuário, sessão ou revogações
+        with self.assertQueryBudget(2):
+            response = self.get('/api/accounts/bank-accounts/', self.access)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 1)
+
+        self.assertEqual(self.get('/api/accounts/profile/', self.access).data['username'], 'jwt')
+        self.assertEqual(self.get('/api/accounts/bank-accounts/', 'lixo').status_code, 401)
+        self.assertEqual(self.get('/api/accounts/bank-accounts/', self.refresh).status_code, 401)
+
+    def test_refresh_rotates_and_revokes_the_used_token(self):
+        response = self.client.post('/api/accounts/token/refresh/', {'refresh': self.refresh}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.get('/api/accounts/bank-accounts/', response.data['access']).status_code, 200)
+
+        again = self.client.post('/api/accounts/token/refresh/', {'refresh': self.refresh}, format='json')
+        self.assertEqual(again.status_code, 401)
+
+    def test_refresh_token_cannot_be_replayed_in_another_process(self):
+        self.assertEqual(
+            self.client.post('/api/accounts/token/refresh/', {'refresh': self.refresh}, format='json').status_code,
+            200,
+        )
+        # Outro worker, com a lista em memória carregada antes da renovação
+        stale = tokens.RevocationList()
+        stale._loaded_at = time.monotonic()
+        with mock.patch.object(tokens, 'revoked_tokens', stale):
+            replay = self.client.post('/api/accounts/token/refresh/', {'refresh': self.refresh}, format='json')
+        self.assertEqual(replay.status_code, 401)
+        self.assertEqual(RevokedToken.objects.filter(user=self.user).count(), 1)
+
+    def test_logout_revokes_tokens(self):
+        response = self.client.post(
+            '/api/accounts/logout/', {'refresh': self.refresh}, format='json',
+            HTTP_AUTHORIZATION=f'Bearer {self.access}',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.get('/api/accounts/bank-accounts/', self.access).status_code, 401)
+        refresh = self.client.post('/api/accounts/token/refresh/', {'refresh': self.refresh}, format='json')
+        self.assertEqual(refresh.status_code, 401)
+
+    def test_deleting_the_user_revokes_its_tokens(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            purge_after = deletion.soft_delete_user(self.user)
+        self.addCleanup(tokens.revoked_tokens.reset)
+        self.assertEqual(self.get('/api/accounts/bank-accounts/', self.access).status_code, 401)
+        refresh = self.client.post('/api/accounts/token/refresh/', {'refresh': self.refresh}, format='json')
+        self.assertEqual(refresh.status_code, 401)
+        # A revogação dura até o último token de acesso expirar
+        revoked = RevokedToken.objects.get(jti=f'user:{self.user.pk}')
+        self.assertEqual(revoked.expires_at, purge_after)
+        self.assertGreaterEqual(
+            purge_after, timezone.now() + timedelta(seconds=settings.JWT_ACCESS_TOKEN_LIFETIME - 60),
+        )
+
+        # Os outros processos recusam o token ao recarregar a lista
+        other = tokens.RevocationList()
+        with mock.patch.object(tokens, 'revoked_tokens', other):
+            self.assertEqual(self.get('/api/accounts/bank-accounts/', self.access).status_code, 401)
+
+    def test_key_rotation(self):
+        with override_settings(JWT_SIGNING_KEYS=f'nova:outro-segredo,{settings.JWT_SIGNING_KEYS}'):
+            # Tokens da chave anterior continuam válidos e os novos usam a nova
+            self.assertEqual(self.get('/api/accounts/bank-accounts/', self.access).status_code, 200)
+            refreshed = self.client.post('/api/accounts/token/refresh/', {'refresh': self.refresh}, format='json')
+            new_access = refreshed.data['access']
+            self.assertEqual(self.get('/api/accounts/bank-accounts/', new_access).status_code, 200)
+
+        # Sem a chave nova o token emitido por ela deixa de valer
+        self.assertEqual(self.get('/api/accounts/bank-accounts/', new_access).status_code, 401)
+
+
+class DatabaseConnectionTests(AccountsAPITestCase):
+    """Conexões persistentes e pool de conexões do PostgreSQL"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('dba', password='x', user_type='admin')
+
+    def test_db_stats_requires_admin(self):
+        response = self.client.get('/api/accounts/db-stats/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.data['default']['pool'])
+
+        self.client.force_authenticate(User.objects.create_user('comum', password='x'))
+        self.assertEqual(self.client.get('/api/accounts/db-stats/').status_code, 403)
+
+    @unittest.skipUnless(connection.vendor == 'postgresql', 'Pool só existe no PostgreSQL')
+    def test_pool_reuses_connections(self):
+        from django.db.utils import load_backend
+        try:
+            import psycopg_pool  # noqa: F401
+        except ImportError:
+            self.skipTest('psycopg-pool não instalado')
+
+        settings_dict = {
+            **connection.settings_dict,
+            'ENGINE': 'backend.postgresql_pool',
+            'CONN_MAX_AGE': 0,
+            'OPTIONS': {'min_size': 1, 'max_size': 2},
+        }
+        wrapper = load_backend('backend.postgresql_pool').DatabaseWrapper(settings_dict, alias='pool_test')
+        try:
+            backend_pids = set()
+            for _ in range(3):
+                with wrapper.cursor() as cursor:
+                    cursor.execute('SELECT pg_backend_pid()')
+                    backend_pids.add(cursor.fetchone()[0])
+                wrapper.close()
+
+            # A mesma conexão física volta do pool a cada uso
+            self.assertEqual(len(backend_pids), 1)
+            stats = wrapper.pool_stats()
+            self.assertEqual(stats['requests_num'], 3)
+            self.assertEqual(stats['in_use'], 0)
+            self.assertEqual(stats['saturation'], 0)
+        finally:
+            wrapper.pool.close()
+            from backend.postgresql_pool.base import _pools
+            _pools.pop('pool_test', None)
+
+
+class AsyncViewTests(AccountsAPITestCase):
+    """As variantes assíncronas respondem igual às views síncronas"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('async', password='x')
+        account = BankAccount.objects.create(user=cls.user, name='Corrente')
+        group = CategoryGroup.objects.create(user=cls.user, name='Mercado', transaction_type='expense')
+        for day in range(1, 6):
+            BankTransaction.objects.create(
+                user=cls.user, bank_account=account, category_group=group, transaction_type='expense',
+                amount=Decimal('10.00'), description='Compra', transaction_date=date(2024, 5, day),
+            )
+
+    def call(self, view, url):
+        request = APIRequestFactory().get(url)
+        force_authenticate(request, self.user)
+        if iscoroutinefunction(view):
+            return async_to_sync(view)(request)
+        return view(request)
+
+    def test_async_views_match_sync_views(self):
+        cases = [
+            ('bank_accounts_view', '/api/accounts/bank-accounts/'),
+            ('transactions_view', '/api/accounts/transactions/?month_year=2024-05&page_size=2'),
+            ('financial_summary', '/api/accounts/financial-summary/?month_year=2024-05'),
+            ('dashboard_view', '/api/accounts/dashboard/?month_year=2024-05&page_size=2'),
+        ]
+        for name, url in cases:
+            with self.subTest(view=name):
+                get_cache().clear()
+                expected = self.call(getattr(views, name), url)
+                get_cache().clear()
+                response = self.call(getattr(async_views, name), url)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(self.without_cursor(response.data), self.without_cursor(expected.data))
+                self.assertEqual(response['ETag'], expected['ETag'])
+
+    def without_cursor(self, data):
+        # O cursor assinado carrega o horário da assinatura
+        data = json.loads(json.dumps(data, default=str))
+        page = data.get('transactions', data) if isinstance(data, dict) else {}
+        if page.get('next'):
+            page['next'] = page['next'].split('cursor=')[0]
+        return data
+
+    def test_async_view_invalid_month(self):
+        response = self.call(async_views.financial_summary, '/api/accounts/financial-summary/?month_year=maio')
+        self.assertEqual(response.status_code, 400)
+
+
+class FastSerializationTests(TestCase):
+    """A leitura rápida das transações e o renderer orjson mantêm o formato da API"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('fast', password='x')
+        account = BankAccount.objects.create(user=cls.user, name='Corrente')
+        salary = CategoryGroup.objects.create(user=cls.user, name='Salário', transaction_type='income')
+        market = CategoryGroup.objects.create(user=cls.user, name='Mercado', transaction_type='expense')
+        BankTransaction.objects.create(
+            user=cls.user, bank_account=account, category_group=salary, transaction_type='income',
+            amount=Decimal('1234567.89'), description='Salário', transaction_date=date(2024, 1, 5),
+        )
+        BankTransaction.objects.create(
+            user=cls.user, bank_account=account, category_group=market, transaction_type='expense',
+            amount=Decimal('0.50'), description='Pão', transaction_date=date(2024, 12, 31),
+        )
+
+    def test_rows_match_model_serializer(self):
+        transactions = BankTransaction.objects.filter(user=self.user).order_by('id')
+        expected = BankTransactionSerializer(transactions.select_related('bank_account', 'category_group'), many=True).data
+        self.assertEqual(serialize_transaction_rows(transaction_list_rows(transactions)), expected)
+
+    def test_orjson_renderer_matches_json_renderer(self):
+        data = {
+            'amount': Decimal('10.50'),
+            'date': date(2024, 5, 1),
+            'created_at': BankTransaction.objects.first().created_at,
+            'text': 'Café\u2028',
+            'items': [1, None, True],
+        }
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+
+
+@override_settings(ACCOUNTS_PROFILING_ENABLED=True, ACCOUNTS_CACHE_ENABLED=False)
+class ProfilingMiddlewareTests(AccountsAPITestCase):
+    """Server-Timing por requisição e percentis por endpoint"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('perfil', password='x', user_type='admin')
+        BankAccount.objects.create(user=cls.user, name='Corrente')
+
+    def setUp(self):
+        super().setUp()
+        profiling.clear()
+
+    def test_server_timing_and_stats(self):
+        for _ in range(3):
+            response = self.client.get('/api/accounts/bank-accounts/')
+        timing = response['Server-Timing']
+        self.assertIn('total;dur=', timing)
+        self.assertIn('db;dur=', timing)
+        self.assertIn('desc="2 queries"', timing)
+        self.assertIn('serialize;dur=', timing)
+
+        stats = self.client.get('/api/accounts/profiling/').data
+        self.assertEqual(stats['bank_accounts']['count'], 3)
+        self.assertEqual(stats['bank_accounts']['queries'], {'p50': 2, 'p95': 2, 'p99': 2})
+        self.assertEqual(stats['bank_accounts']['size']['p50'], len(response.content))
+        self.assertIn('p99', stats['bank_accounts']['total_ms'])
+
+    def test_stats_require_admin(self):
+        self.client.force_authenticate(User.objects.create_user('comum', password='x'))
+        self.assertEqual(self.client.get('/api/accounts/profiling/').status_code, 403)
+
+
+class SeedDataTests(TestCase):
+    def seed(self, prefix, **kwargs):
+        options = {'users': 2, 'accounts': 2, 'categories': 5, 'years': 1, 'transactions_per_month': 20}
+        return seeding.seed(prefix=prefix, today=date(2024, 6, 15), **{**options, **kwargs})
+
+    def test_seed_is_consistent_and_reproducible(self):
+        counts = self.seed('first')
+        self.seed('second')
+
+        self.assertEqual(counts['users'], 2)
+        self.assertEqual(BankAccount.objects.filter(user__username__startswith='first').count(), 4)
+        self.assertEqual(CategoryGroup.objects.filter(user__username__startswith='first').count(), 10)
+        self.assertEqual(
+            BankTransaction.objects.filter(user__username__startswith='first').count(), counts['transactions']
+        )
+        self.assertFalse(BankTransaction.objects.filter(transaction_date__gt=date(2024, 6, 15)).exists())
+        # Saldos e consolidados recalculados depois da carga sem sinais
+        self.assertEqual(verify_balances(), [])
+        self.assertEqual(verify_rollups(), [])
+
+        def amounts(prefix):
+            return list(
+                BankTransaction.objects.filter(user__username__startswith=prefix)
+                .order_by('user__username', 'pk').values_list('amount', 'transaction_date')
+            )
+        self.assertEqual(amounts('first'), amounts('second'))
+
+    def test_command_refuses_existing_prefix_unless_cleared(self):
+        options = {'users': 1, 'years': 1, 'transactions_per_month': 5, 'prefix': 'cmd', 'stdout': StringIO()}
+        call_command('seed_data', **options)
+        with self.assertRaises(CommandError):
+            call_command('seed_data', **options)
+
+        call_command('seed_data', clear=True, **options)
+        self.assertEqual(User.objects.filter(username__startswith='cmd').count(), 1)
+        self.assertEqual(verify_balances(), [])
+
+    def test_clear_only_removes_generated_users(self):
+        self.seed('demo', users=1)
+        real = [User.objects.create_user(name, password='x') for name in ('demo', 'demonstracao', 'demo123', 'demox00001')]
+        # O prefixo é literal: o ponto não casa com qualquer caractere
+        seeding.clear_seed_data('demo.')
+        seeding.clear_seed_data('demo')
+        self.assertEqual(
+            sorted(User.objects.filter(username__startswith='demo').values_list('username', flat=True)),
+            sorted(user.username for user in real),
+        )
+
+    def test_clear_refuses_admin_users(self):
+        self.seed('ops', users=1)
+        for fields in ({'is_staff': True}, {'user_type': 'admin'}):
+            with self.subTest(**fields):
+                admin = User.objects.create_user('ops99999', password='x', **fields)
+                with self.assertRaises(CommandError):
+                    call_command('seed_data', clear=True, prefix='ops', users=1, years=1, stdout=StringIO())
+                self.assertEqual(User.objects.filter(username__startswith='ops').count(), 2)
+                admin.delete()
+
+
+class InvestmentEngineTests(QueryBudgetMixin, AccountsAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('investor', password='x')
+        cls.investment = Investment.objects.create(
+            user=cls.user, name='CDB', investment_type='bond',
+            initial_value=Decimal('1000.00'), purchase_date=date(2024, 1, 1),
+        )
+        YieldEvent.objects.create(investment=cls.investment, percentage=Decimal('10'), event_date=date(2024, 2, 1))
+        cls.contribution = Contribution.objects.create(
+            investment=cls.investment, amount=Decimal('500.00'), contribution_date=date(2024, 3, 1),
+        )
+        YieldEvent.objects.create(investment=cls.investment, percentage=Decimal('-5'), event_date=date(2024, 4, 1))
+
+    def test_asset_metrics(self):
+        metrics = investments.asset_metrics([self.investment], as_of=date(2024, 12, 31))[0]
+
+        # ((1000 * 1,10) + 500) * 0,95
+        self.assertEqual(metrics['current_value'], 1520.0)
+        self.assertEqual(metrics['total_invested'], 1500.0)
+        self.assertEqual(metrics['total_contributions'], 500.0)
+        self.assertAlmostEqual(metrics['roi'], 1.3333, places=4)
+        self.assertAlmostEqual(metrics['time_weighted_return'], 4.5, places=4)
+        self.assertEqual(
+            [entry['value'] for entry in investments.asset_history(metrics)], [1000.0, 1100.0, 1600.0, 1520.0]
+        )
+
+        # A taxa do MWR leva os aportes exatamente ao valor final
+        rate = metrics['money_weighted_return'] / 100
+        grown = 1000 * (1 + rate) ** (365 / 365) + 500 * (1 + rate) ** (305 / 365)
+        self.assertAlmostEqual(grown, 1520.0, places=1)
+
+    def test_portfolio_combines_active_assets(self):
+        other = Investment.objects.create(
+            user=self.user, name='Ações', initial_value=Decimal('2000.00'), purchase_date=date(2024, 3, 1),
+        )
+        Investment.objects.create(
+            user=self.user, name='Vendido', initial_value=Decimal('9999.00'),
+            purchase_date=date(2024, 1, 1), status='sold',
+        )
+        assets = investments.asset_metrics(Investment.objects.filter(user=self.user).order_by('pk'))
+        portfolio = investments.portfolio_metrics(assets, as_of=date(2024, 12, 31))
+
+        self.assertEqual(portfolio['total_investments'], 2)
+        self.assertEqual(portfolio['total_invested'], 3500.0)
+        self.assertEqual(portfolio['current_value'], 3520.0)
+        # A compra do segundo ativo é um fluxo e não conta como retorno
+        self.assertAlmostEqual(portfolio['time_weighted_return'], (1.1 * (1 - 0.05 * 1600 / 3600) - 1) * 100, places=3)
+        self.assertEqual(portfolio['history'][-1], {'date': '2024-04-01', 'value': 3520.0, 'invested': 3500.0})
+        self.assertEqual(other.pk, assets[1]['id'])
+
+    @override_settings(ACCOUNTS_CACHE_ENABLED=True)
+    def test_editing_contribution_invalidates_cached_metrics(self):
+        url = f'/api/accounts/investments/{self.investment.id}/'
+        self.assertEqual(self.client.get(url).data['current_value'], 1520.0)
+
+        # Métricas do ativo vêm do cache: só a consulta do investimento
+        with self.assertQueryBudget(1):
+            self.client.get('/api/accounts/investments/')
+
+        response = self.client.put(
+            f'{url}contributions/{self.contribution.id}/', {'amount': '1000.00'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        data = self.client.get(url).data
+        self.assertEqual(data['current_value'], 1995.0)
+        self.assertEqual(data['total_invested'], 2000.0)
+
+    def test_validation_and_ownership(self):
+        url = f'/api/accounts/investments/{self.investment.id}/yields/'
+        response = self.client.post(url, {'percentage': '-100', 'event_date': '2024-05-01'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(url, {'percentage': '1.5', 'event_date': '2023-12-31'}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+        self.client.force_authenticate(User.objects.create_user('intruder', password='x'))
+        self.assertEqual(self.client.get(f'/api/accounts/investments/{self.investment.id}/').status_code, 404)
+        self.assertEqual(self.client.get('/api/accounts/investments/portfolio/').data['total_investments'], 0)
+
+
+@override_settings(ACCOUNTS_CACHE_ENABLED=False)
+class AnalyticsTests(QueryBudgetMixin, AccountsAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('analyst', password='x')
+        cls.checking = BankAccount.objects.create(user=cls.user, name='Corrente')
+        cls.card = BankAccount.objects.create(user=cls.user, name='Cartão')
+        cls.salary = CategoryGroup.objects.create(user=cls.user, name='Salário', transaction_type='income')
+        cls.market = CategoryGroup.objects.create(user=cls.user, name='Mercado', transaction_type='expense')
+        for account, group, amount, day in (
+            (cls.checking, cls.salary, '5000.00', date(2024, 1, 5)),
+            (cls.checking, cls.market, '120.00', date(2024, 1, 10)),
+            (cls.card, cls.market, '80.00', date(2024, 1, 10)),
+            (cls.card, cls.market, '50.00', date(2024, 2, 20)),
+        ):
+            BankTransaction.objects.create(
+                user=cls.user, bank_account=account, category_group=group,
+                transaction_type=group.transaction_type, amount=Decimal(amount),
+                description='Teste', transaction_date=day,
+            )
+
+    def get(self, **params):
+        return self.client.get('/api/accounts/analytics/', params)
+
+    def test_one_group_by_query_per_dimension(self):
+        # 3 consultas do ETag e uma por agrupamento
+        with self.assertQueryBudget(3 + 6):
+            response = self.get(
+                start='2024-01', end='2024-02',
+                group_by='category_group,bank_account,transaction_type,day,week,month',
+            )
+        self.assertEqual(response.status_code, 200)
+        breakdowns = response.data['breakdowns']
+
+        self.assertEqual(breakdowns['category_group']['labels'], ['Salário', 'Mercado'])
+        self.assertEqual(breakdowns['category_group']['expense'], [0, Decimal('250.00')])
+        self.assertEqual(breakdowns['bank_account']['keys'], [self.checking.id, self.card.id])
+        self.assertEqual(breakdowns['bank_account']['count'], [2, 2])
+        self.assertEqual(breakdowns['transaction_type']['keys'], ['expense', 'income'])
+        self.assertEqual(breakdowns['month']['keys'], ['2024-01-01', '2024-02-01'])
+        self.assertEqual(breakdowns['month']['expense'], [Decimal('200.00'), Decimal('50.00')])
+
+        # Séries por período são contínuas, com os dias e semanas sem movimento zerados
+        self.assertEqual(len(breakdowns['day']['keys']), 60)
+        self.assertEqual(breakdowns['day']['count'][9], 2)
+        self.assertEqual(breakdowns['week']['keys'][0], '2024-01-01')
+        self.assertEqual(sum(breakdowns['week']['count']), 4)
+
+    def test_default_period_is_twelve_months(self):
+        response = self.get(end='2024-02', group_by='month')
+        keys = response.data['breakdowns']['month']['keys']
+        self.assertEqual(len(keys), 12)
+        self.assertEqual((keys[0], keys[-1]), ('2023-03-01', '2024-02-01'))
+
+    def test_partial_months_and_filters_read_transactions(self):
+        response = self.get(start='2024-01-06', end='2024-02-29', group_by='month', transaction_type='expense')
+        self.assertEqual(response.data['breakdowns']['month']['expense'], [Decimal('200.00'), Decimal('50.00')])
+        self.assertEqual(response.data['breakdowns']['month']['income'], [0, 0])
+
+        response = self.get(start='2024-01', end='2024-01', group_by='category_group', bank_account=self.card.id)
+        self.assertEqual(response.data['breakdowns']['category_group']['count'], [1])
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.get(group_by='year').status_code, 400)
+        self.assertEqual(self.get(start='2024-13').status_code, 400)
+        self.assertEqual(self.get(start='2024-03', end='2024-01').status_code, 400)
+        self.assertEqual(self.get(start='2000-01', end='2024-01').status_code, 400)
+
+
+class TransactionExportTests(QueryBudgetMixin, AccountsAPITestCase):
+    """Exportação em streaming do histórico de transações"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('exporter', password='x')
+        cls.account = BankAccount.objects.create(user=cls.user, name='Corrente')
+        cls.salary = CategoryGroup.objects.create(user=cls.user, name='Salário', transaction_type='income')
+        cls.market = CategoryGroup.objects.create(user=cls.user, name='Mercado', transaction_type='expense')
+        BankTransaction.objects.create(
+            user=cls.user, bank_account=cls.account, category_group=cls.salary, transaction_type='income',
+            amount=Decimal('5000.00'), description='Salário', transaction_date=date(2024, 5, 5),
+        )
+        for day in range(1, 8):
+            BankTransaction.objects.create(
+                user=cls.user, bank_account=cls.account, category_group=cls.market, transaction_type='expense',
+                amount=Decimal(f'{day}.50'), description=f'Compra "{day}", mercado',
+                transaction_date=date(2024, 6, day),
+            )
+
+    def export(self, export_format, **params):
+        response = self.client.get(f'/api/accounts/transactions/export/{export_format}/', params)
+        content = b''.join(response.streaming_content) if response.streaming else response.content
+        return response, content
+
+    def test_csv_export_round_trips_through_import(self):
+        with self.assertQueryBudget(1):
+            response, content = self.export('csv')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertIn('attachment; filename="transacoes-', response['Content-Disposition'])
+
+        BankTransaction.objects.filter(user=self.user).delete()
+        upload = SimpleUploadedFile('transacoes.csv', content)
+        report = TransactionImporter(self.user).run(iter_csv_rows(upload))
+        self.assertEqual(report['created'], 8)
+        self.assertEqual(report['error_count'], 0)
+        self.assertEqual(
+            BankTransaction.objects.get(transaction_date=date(2024, 6, 3)).description, 'Compra "3", mercado'
+        )
+        self.assertEqual(verify_rollups(), [])
+
+    def test_ndjson_export_in_chunks(self):
+        from . import exports
+
+        queryset = exports.export_queryset(self.user, date(2024, 6, 1), date(2024, 6, 30))
+        chunks = list(exports.stream_export(queryset, 'ndjson', chunk_size=3))
+        # Cabeçalho vazio e blocos de 3, 3 e 1 linhas
+        self.assertEqual([chunk.count(b'\n') for chunk in chunks], [0, 3, 3, 1])
+
+        response, content = self.export('ndjson', start='2024-06')
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(len(rows), 7)
+        self.assertEqual(rows[0]['amount'], '1.50')
+        self.assertEqual(rows[0]['category_group'], 'Mercado')
+
+    def test_async_export_streams_the_same_content(self):
+        async def read(response):
+            return b''.join([chunk async for chunk in response.streaming_content])
+
+        request = APIRequestFactory().get('/api/accounts/transactions/export/csv/?end=2024-05')
+        force_authenticate(request, self.user)
+        response = async_to_sync(async_views.export_transactions)(request, export_format='csv')
+        _, expected = self.export('csv', end='2024-05')
+        self.assertEqual(async_to_sync(read)(response), expected)
+
+    @unittest.skipUnless(shutil.which('gunicorn'), 'Gunicorn não instalado')
+    def test_default_wsgi_worker_streams_past_the_timeout(self):
+        # O worker sync corta com WORKER TIMEOUT respostas mais longas que o
+        # timeout; com a configuração padrão (gthread) o stream chega inteiro.
+        # O gthread avisa o arbiter a cada ~2 s, então o timeout fica acima disso
+        app = (
+            'import time\n'
+            'def application(environ, start_response):\n'
+            '    start_response("200 OK", [("Content-Type", "text/plain")])\n'
+            '    for index in range(5):\n'
+            '        yield f"{index}\\n".encode()\n'
+            '        time.sleep(1)\n'
+        )
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            port = sock.getsockname()[1]
+        env = {key: value for key, value in os.environ.items() if key not in ('SERVER_MODE', 'GUNICORN_THREADS')}
+        env.update(GUNICORN_TIMEOUT='3', WEB_CONCURRENCY='1', GUNICORN_ACCESS_LOG='')
+
+        with tempfile.TemporaryDirectory() as directory:
+            with open(os.path.join(directory, 'slow_stream.py'), 'w') as module:
+                module.write(app)
+            server = subprocess.Popen(
+                ['gunicorn', '-c', os.path.join(settings.BASE_DIR, 'gunicorn.conf.py'), '--chdir', directory,
+                 '-b', f'127.0.0.1:{port}', 'slow_stream:application'],
+                env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            )
+            try:
+                deadline = time.monotonic() + 10
+                while True:
+                    try:
+                        with urllib.request.urlopen(f'http://127.0.0.1:{port}/', timeout=15) as response:
+                            body = response.read()
+                        break
+                    except urllib.error.URLError:
+                        if time.monotonic() > deadline:
+                            raise
+                        time.sleep(0.1)
+            finally:
+                server.terminate()
+                server.wait(10)
+        self.assertEqual(body, b'0\n1\n2\n3\n4\n')
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.export('xlsx')[0].status_code, 404)
+        self.assertEqual(self.export('csv', start='ontem')[0].status_code, 400)
+
+
+class TransactionSearchTests(QueryBudgetMixin, AccountsAPITestCase):
+    """Busca no histórico pela descrição, com filtros e paginação"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('searcher', password='x')
+        cls.other = User.objects.create_user('nosy', password='x')
+        cls.checking = BankAccount.objects.create(user=cls.user, name='Corrente')
+        cls.card = BankAccount.objects.create(user=cls.user, name='Cartão')
+        cls.market = CategoryGroup.objects.create(user=cls.user, name='Mercado', transaction_type='expense')
+        for account, description, amount, day in (
+            (cls.checking, 'Supermercado Bom Preço', '230.00', date(2023, 2, 10)),
+            (cls.card, 'Supermercado Bom Preço', '45.00', date(2024, 3, 2)),
+            (cls.card, 'Restaurante Sabor Caseiro', '80.00', date(2024, 3, 5)),
+            (cls.checking, 'Posto de combustível', '200.00', date(2024, 4, 1)),
+        ):
+            BankTransaction.objects.create(
+                user=cls.user, bank_account=account, category_group=cls.market, transaction_type='expense',
+                amount=Decimal(amount), description=description, transaction_date=day,
+            )
+        other_account = BankAccount.objects.create(user=cls.other, name='Alheia')
+        other_group = CategoryGroup.objects.create(user=cls.other, name='Mercado', transaction_type='expense')
+        BankTransaction.objects.create(
+            user=cls.other, bank_account=other_account, category_group=other_group, transaction_type='expense',
+            amount=Decimal('10.00'), description='Supermercado', transaction_date=date(2024, 3, 2),
+        )
+
+    def get(self, **params):
+        return self.client.get('/api/accounts/transactions/search/', params)
+
+    def test_search_with_filters(self):
+        with self.assertQueryBudget(1):
+            response = self.get(q='supermercado')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['amount'] for row in response.data['results']], ['45.00', '230.00'])
+
+        response = self.get(q='supermercado', start='2024-01', bank_account=self.card.id, max_amount='100')
+        self.assertEqual([row['transaction_date'] for row in response.data['results']], ['2024-03-02'])
+        response = self.get(q='supermercado', min_amount='100')
+        self.assertEqual([row['amount'] for row in response.data['results']], ['230.00'])
+
+    def test_pagination(self):
+        response = self.get(q='supermercado', page_size=1)
+        self.assertEqual(len(response.data['results']), 1)
+        following = self.client.get(response.data['next'])
+        self.assertEqual(len(following.data['results']), 1)
+        self.assertIsNone(following.data['next'])
+        self.assertNotEqual(following.data['results'][0]['id'], response.data['results'][0]['id'])
+
+    @unittest.skipUnless(connection.vendor == 'postgresql', 'Texto completo só no PostgreSQL')
+    def test_full_text_matches_word_variants(self):
+        response = self.get(q='restaurantes')
+        self.assertEqual([row['description'] for row in response.data['results']], ['Restaurante Sabor Caseiro'])
+
+    def test_fuzzy_match_with_typo(self):
+        if not search.has_trigram():
+            self.skipTest('Extensão pg_trgm indisponível')
+        response = self.get(q='combustivel')
+        self.assertEqual([row['description'] for row in response.data['results']], ['Posto de combustível'])
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.get().status_code, 400)
+        self.assertEqual(self.get(q='a').status_code, 400)
+        self.assertEqual(self.get(q='mercado', min_amount='muito').status_code, 400)
+        for amount in ('NaN', 'sNaN', 'Infinity', '-inf'):
+            self.assertEqual(self.get(q='mercado', max_amount=amount).status_code, 400, amount)
+        for pk in (2 ** 63, -1, 0):
+            self.assertEqual(self.get(q='mercado', bank_account=pk).status_code, 400, pk)
+            self.assertEqual(self.get(q='mercado', category_group=pk).status_code, 400, pk)
+            self.assertEqual(
+                self.client.get('/api/accounts/financial-summary/range/', {'bank_account': pk}).status_code, 400, pk,
+            )
+        self.assertEqual(self.get(q='mercado', start='ontem').status_code, 400)
+        self.assertEqual(self.get(q='mercado', cursor='x').status_code, 400)
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'Particionamento só existe no PostgreSQL')
+class TransactionPartitionTests(TestCase):
+    """Partições mensais da tabela de transações"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('partitioned', password='x')
+        cls.account = BankAccount.objects.create(user=cls.user, name='Corrente')
+        cls.group = CategoryGroup.objects.create(user=cls.user, name='Mercado', transaction_type='expense')
+
+    def create(self, day):
+        return BankTransaction.objects.create(
+            user=self.user, bank_account=self.account, category_group=self.group, transaction_type='expense',
+            amount=Decimal('10.00'), description='Compra', transaction_date=day,
+        )
+
+    def partition_count(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) FROM {connection.ops.quote_name(name)}')
+            return cursor.fetchone()[0]
+
+    def test_table_is_partitioned_ahead(self):
+        self.assertTrue(partitions.is_partitioned())
+        month = timezone.localdate().replace(day=1)
+        self.assertIn(partitions.partition_name(month), partitions.existing_partitions())
+
+    def test_month_query_reads_one_partition(self):
+        partitions.ensure_partitions(date(2024, 1, 1))
+        for day in (date(2024, 2, 29), date(2024, 3, 1), date(2024, 3, 31), date(2024, 4, 1)):
+            self.create(day)
+
+        queryset = BankTransaction.objects.filter(
+            user=self.user, transaction_date__range=[date(2024, 3, 1), date(2024, 3, 31)]
+        ).order_by(*TRANSACTION_ORDERING)
+        self.assertEqual(queryset.count(), 2)
+        plan = queryset.explain()
+        self.assertIn('accounts_banktransaction_p2024_03', plan)
+        for other in ('p2024_02', 'p2024_04', 'default'):
+            self.assertNotIn(f'accounts_banktransaction_{other}', plan, plan)
+
+    def test_rows_in_default_partition_move_to_new_partition(self):
+        old = self.create(date(2019, 5, 20))
+        self.assertEqual(self.partition_count(partitions.DEFAULT_PARTITION), 1)
+
+        created = partitions.ensure_partitions()
+        self.assertIn('accounts_banktransaction_p2019_05', created)
+        self.assertEqual(self.partition_count(partitions.DEFAULT_PARTITION), 0)
+        self.assertEqual(self.partition_count('accounts_banktransaction_p2019_05'), 1)
+        self.assertEqual(BankTransaction.objects.get(pk=old.pk).transaction_date, date(2019, 5, 20))
+
+        # Mudar a data move a linha para a partição do novo mês
+        old.transaction_date = timezone.localdate()
+        old.save()
+        self.assertEqual(self.partition_count('accounts_banktransaction_p2019_05'), 0)
+        self.assertEqual(verify_balances(), [])
+        self.assertEqual(verify_rollups(), [])
+        self.assertEqual(partitions.ensure_partitions(), [])
+
+
+class JobQueueTests(AccountsAPITestCase):
+    """Fila de tarefas em segundo plano: 202, workers, novas tentativas e status"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('queued', password='x')
+        cls.admin = User.objects.create_user('boss', password='x', user_type='admin')
+        cls.account = BankAccount.objects.create(user=cls.user, name='Corrente')
+        group = CategoryGroup.objects.create(user=cls.user, name='Mercado', transaction_type='expense')
+        for day in range(1, 4):
+            BankTransaction.objects.create(
+                user=cls.user, bank_account=cls.account, category_group=group, transaction_type='expense',
+                amount=Decimal('10.00'), description='Compra', transaction_date=date(2024, 5, day),
+            )
+
+    def test_bank_account_delete_runs_in_background(self):
+        response = self.client.delete(f'/api/accounts/bank-accounts/{self.account.id}/')
+        self.assertEqual(response.status_code, 202)
+        job_id = response.data['job']['id']
+        self.assertEqual(response['Location'], f'/api/accounts/jobs/{job_id}/')
+
+        # A conta e as transações somem na hora, mas só são apagadas pela tarefa
+        self.assertFalse(BankAccount.objects.filter(pk=self.account.pk).exists())
+        self.assertFalse(BankTransaction.objects.filter(user=self.user).exists())
+        self.assertEqual(BankTransaction.all_objects.filter(user=self.user).count(), 3)
+        self.assertEqual(self.client.get('/api/accounts/bank-accounts/').data, [])
+        self.assertEqual(self.client.delete(f'/api/accounts/bank-accounts/{self.account.id}/').status_code, 404)
+        self.assertEqual(verify_rollups(), [])
+
+        # O nome fica livre para uma conta nova
+        created = self.client.post('/api/accounts/bank-accounts/', {'name': 'Corrente'}, format='json')
+        self.assertEqual(created.status_code, 201)
+
+        self.assertEqual(jobs.run_pending(), 1)
+        self.assertFalse(BankAccount.all_objects.filter(pk=self.account.pk).exists())
+        self.assertFalse(BankTransaction.all_objects.filter(user=self.user).exists())
+
+        status = self.client.get(f'/api/accounts/jobs/{job_id}/')
+        self.assertEqual(status.data['status'], 'succeeded')
+        self.assertEqual(status.data['percent'], 100)
+        self.assertEqual(status.data['result'], {'deleted': True, 'purged': 3})
+        self.assertEqual([job['id'] for job in self.client.get('/api/accounts/jobs/').data], [job_id])
+
+    def test_user_delete_and_ledger_rebuild_for_admin(self):
+        self.client.force_authenticate(self.admin)
+        response = self.client.post('/api/accounts/ledger/rebuild/', {'user': self.user.id}, format='json')
+        self.assertEqual(response.status_code, 202)
+        response = self.client.delete(f'/api/accounts/users/{self.user.id}/')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual([user['id'] for user in self.client.get('/api/accounts/users/').data], [self.admin.id])
+        self.assertEqual(self.client.get(f'/api/accounts/users/{self.user.id}/').status_code, 404)
+        self.assertFalse(User.objects.get(pk=self.user.pk).is_active)
+
+        # O usuário só é apagado depois que expiram os tokens revogados
+        purge = Job.objects.get(kind='delete_user')
+        self.assertEqual(purge.run_after, RevokedToken.objects.get(user=self.user).expires_at)
+        self.assertEqual(jobs.run_pending(), 1)
+        self.assertTrue(User.objects.filter(pk=self.user.pk).exists())
+        Job.objects.filter(pk=purge.pk).update(run_after=timezone.now())
+        self.assertEqual(jobs.run_pending(), 1)
+        self.assertFalse(User.objects.filter(pk=self.user.pk).exists())
+        rebuild = Job.objects.get(kind='rebuild_ledger')
+        self.assertEqual(rebuild.status, 'succeeded')
+        self.assertEqual((rebuild.progress, rebuild.progress_total), (2, 2))
+
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.post('/api/accounts/ledger/rebuild/').status_code, 403)
+
+    def test_purge_deletes_history_in_batches(self):
+        batches = []
+        purged = deletion.purge_in_batches(
+            BankTransaction.all_objects.filter(user=self.user), batch_size=2, on_batch=batches.append,
+        )
+        self.assertEqual((purged, batches), (3, [2, 1]))
+
+        job = jobs.enqueue('delete_user', {'user_id': self.user.id})
+        result = deletion.purge_user(self.user.id, batch_size=1, progress=jobs.JobProgress(job))
+        self.assertEqual(result, {'deleted': True, 'purged': 1})
+        job.refresh_from_db()
+        # Só restava o consolidado do mês
+        self.assertEqual((job.progress, job.progress_total), (1, 1))
+        self.assertFalse(MonthlyRollup.objects.filter(user=self.user).exists())
+
+    def test_retries_with_backoff_then_fails(self):
+        calls = []
+
+        def flaky(progress, fail_with):
+            calls.append(fail_with)
+            raise (jobs.JobError if fail_with == 'fatal' else RuntimeError)('falhou')
+
+        with mock.patch.dict(jobs.JOB_HANDLERS, {'flaky': flaky}):
+            retried = jobs.enqueue('flaky', {'fail_with': 'transient'}, max_attempts=2)
+            fatal = jobs.enqueue('flaky', {'fail_with': 'fatal'})
+
+            with self.assertLogs('accounts.jobs', 'ERROR'):
+                self.assertEqual(jobs.run_pending(), 2)
+            retried.refresh_from_db()
+            self.assertEqual((retried.status, retried.attempts), ('queued', 1))
+            self.assertGreater(retried.run_after, timezone.now())
+            fatal.refresh_from_db()
+            self.assertEqual((fatal.status, fatal.attempts), ('failed', 1))
+
+            # Ainda esperando: nenhuma tarefa disponível
+            self.assertEqual(jobs.run_pending(), 0)
+            Job.objects.filter(pk=retried.pk).update(run_after=timezone.now())
+            with self.assertLogs('accounts.jobs', 'ERROR'):
+                self.assertEqual(jobs.run_pending(), 1)
+            retried.refresh_from_db()
+            self.assertEqual((retried.status, retried.attempts), ('failed', 2))
+            self.assertIn('RuntimeError', retried.error)
+        self.assertEqual(len(calls), 3)
+
+    def test_jobs_of_dead_workers_are_reclaimed(self):
+        job = jobs.enqueue('rebuild_ledger')
+        self.assertEqual(jobs.claim_job('morto').pk, job.pk)
+        self.assertIsNone(jobs.claim_job('outro'))
+
+        Job.objects.filter(pk=job.pk).update(locked_at=timezone.now() - jobs.JOB_LOCK_TIMEOUT * 2)
+        self.assertEqual(jobs.run_pending(worker='outro'), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('succeeded', 2))
+
+    def test_progress_renews_the_reservation(self):
+        job = jobs.enqueue('rebuild_ledger')
+        claimed = jobs.claim_job('lento')
+        Job.objects.filter(pk=job.pk).update(locked_at=timezone.now() - jobs.JOB_LOCK_TIMEOUT * 2)
+        jobs.JobProgress(claimed).update(1, 2)
+        self.assertIsNone(jobs.claim_job('outro'))
+        job.refresh_from_db()
+        self.assertEqual((job.locked_by, job.progress), ('lento', 1))
+
+    def test_reclaimed_job_keeps_the_new_workers_outcome(self):
+        job = jobs.enqueue('rebuild_ledger')
+        stale = jobs.claim_job('morto')
+        Job.objects.filter(pk=job.pk).update(locked_at=timezone.now() - jobs.JOB_LOCK_TIMEOUT * 2)
+        current = jobs.claim_job('outro')
+        self.assertEqual((current.pk, current.attempts), (job.pk, 2))
+
+        # O worker antigo termina depois de perder a reserva: nada é gravado
+        with self.assertLogs('accounts.jobs', 'WARNING'):
+            jobs.run_job(stale)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.locked_by), ('running', 'outro'))
+
+        jobs.run_job(current)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.locked_by, job.progress), ('succeeded', '', 2))
+
+    def test_enqueue_keeps_one_pending_job_per_key(self):
+        job = jobs.enqueue('rebuild_ledger', key='ledger:1')
+        self.assertEqual(jobs.enqueue('rebuild_ledger', key='ledger:1').pk, job.pk)
+        # Duas requisições passam pela verificação ao mesmo tempo: o banco recusa a segunda
+        with mock.patch.object(jobs, '_pending_job', side_effect=[None, job]):
+            self.assertEqual(jobs.enqueue('rebuild_ledger', key='ledger:1').pk, job.pk)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Job.objects.create(kind='rebuild_ledger', key='ledger:1')
+        self.assertEqual(Job.objects.filter(key='ledger:1').count(), 1)
+
+        # Tarefas sem chave e tarefas já concluídas não impedem novas
+        self.assertNotEqual(jobs.enqueue('rebuild_ledger').pk, jobs.enqueue('rebuild_ledger').pk)
+        Job.objects.filter(pk=job.pk).update(status='succeeded')
+        self.assertNotEqual(jobs.enqueue('rebuild_ledger', key='ledger:1').pk, job.pk)
+
+    def test_job_status_is_private(self):
+        job = jobs.enqueue('rebuild_ledger', user=self.admin)
+        self.assertEqual(self.client.get(f'/api/accounts/jobs/{job.id}/').status_code, 404)
+        self.client.force_authenticate(self.admin)
+        self.assertEqual(self.client.get(f'/api/accounts/jobs/{job.id}/').status_code, 200)
+
+
+class RecurringTransactionTests(QueryBudgetMixin, AccountsAPITestCase):
+    """Regras recorrentes: datas, geração em lote, idempotência e API"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('recurring', password='x')
+        cls.account = BankAccount.objects.create(user=cls.user, name='Corrente')
+        cls.rent = CategoryGroup.objects.create(user=cls.user, name='Moradia', transaction_type='expense')
+
+    def create_rule(self, **fields):
+        fields = {
+            'user': self.user, 'bank_account': self.account, 'category_group': self.rent,
+            'transaction_type': 'expense', 'amount': Decimal('1500.00'), 'description': 'Aluguel',
+            'frequency': 'monthly', 'start_date': date(2024, 1, 31), **fields,
+        }
+        rule = RecurringTransaction(**fields)
+        recurring.schedule(rule)
+        rule.save()
+        return rule
+
+    def test_occurrence_dates_and_rrule(self):
+        rule = RecurringTransaction(frequency='monthly', interval=1, start_date=date(2024, 1, 31))
+        self.assertEqual(
+            [recurring.occurrence_date(rule, index) for index in range(4)],
+            [date(2024, 1, 31), date(2024, 2, 29), date(2024, 3, 31), date(2024, 4, 30)],
+        )
+        rule = RecurringTransaction(start_date=date(2024, 1, 1), **recurring.parse_rrule(
+            'RRULE:FREQ=WEEKLY;INTERVAL=2;COUNT=3;UNTIL=20241231'
+        ))
+        self.assertEqual(recurring.scheduled_date(rule, 1), date(2024, 1, 15))
+        self.assertIsNone(recurring.scheduled_date(rule, 3))
+        self.assertEqual(recurring.format_rrule(rule), 'FREQ=WEEKLY;INTERVAL=2;COUNT=3;UNTIL=20241231')
+
+        for value in ('FREQ=HOURLY', 'FREQ=DAILY;BYDAY=MO', 'FREQ=DAILY;INTERVAL=0', 'FREQ=DAILY;UNTIL=2024'):
+            with self.assertRaises(recurring.RecurrenceError):
+                recurring.parse_rrule(value)
+
+    def test_materialize_is_idempotent_and_keeps_ledger(self):
+        rule = self.create_rule(max_occurrences=12)
+        totals = recurring.materialize_due(today=date(2024, 6, 30))
+        self.assertEqual(totals, {'rules': 1, 'transactions': 6})
+        rule.refresh_from_db()
+        self.assertEqual((rule.occurrence_count, rule.next_run), (6, date(2024, 7, 31)))
+        self.assertEqual(
+            list(rule.transactions.order_by('transaction_date').values_list('transaction_date', flat=True)[:2]),
+            [date(2024, 1, 31), date(2024, 2, 29)],
+        )
+        self.assertEqual(verify_balances(), [])
+        self.assertEqual(verify_rollups(), [])
+
+        # Nada a gerar de novo, nem se a regra voltar para o início
+        self.assertEqual(recurring.materialize_due(today=date(2024, 6, 30))['transactions'], 0)
+        RecurringTransaction.objects.filter(pk=rule.pk).update(occurrence_count=0, next_run=rule.start_date)
+        self.assertEqual(recurring.materialize_due(today=date(2024, 6, 30))['transactions'], 0)
+        self.assertEqual(rule.transactions.count(), 6)
+
+        # Ao fim das ocorrências a regra sai do índice de vencidas
+        recurring.materialize_due(today=date(2025, 6, 30))
+        rule.refresh_from_db()
+        self.assertEqual((rule.occurrence_count, rule.next_run), (12, None))
+
+    def test_materialize_in_batches_with_fixed_queries(self):
+        for number in range(6):
+            self.create_rule(description=f'Assinatura {number}', frequency='daily', start_date=date(2024, 6, 1))
+        with mock.patch.object(recurring, 'MAX_OCCURRENCES_PER_BATCH', 4):
+            totals = recurring.materialize_due(today=date(2024, 6, 10), batch_size=4)
+        self.assertEqual(totals, {'rules': 6, 'transactions': 60})
+        self.assertEqual(verify_rollups(), [])
+
+        # Consultas por lote, não por regra nem por ocorrência
+        for number in range(6, 30):
+            self.create_rule(description=f'Assinatura {number}', frequency='daily', start_date=date(2024, 6, 1))
+        with self.assertQueryBudget(20):
+            recurring.materialize_due(today=date(2024, 6, 20), batch_size=100)
+        self.assertEqual(BankTransaction.objects.filter(user=self.user).count(), 60 + 30 * 10 + 24 * 10)
+
+    def test_rules_of_deleted_accounts_stop(self):
+        rule = self.create_rule()
+        self.client.delete(f'/api/accounts/bank-accounts/{self.account.id}/')
+        self.assertEqual(recurring.materialize_due(today=date(2024, 6, 30))['transactions'], 0)
+        self.assertEqual(self.client.get(f'/api/accounts/recurring-transactions/{rule.id}/').status_code, 404)
+
+    def test_api_creates_rule_and_generates_due_occurrences(self):
+        today = timezone.localdate()
+        data = {
+            'bank_account': self.account.id, 'category_group': self.rent.id, 'transaction_type': 'expense',
+            'amount': '39.90', 'description': 'Streaming', 'start_date': (today - timedelta(days=20)).isoformat(),
+            'rrule': 'FREQ=WEEKLY',
+        }
+        response = self.client.post('/api/accounts/recurring-transactions/', data, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['rrule'], 'FREQ=WEEKLY;INTERVAL=1')
+        self.assertEqual(response.data['occurrence_count'], 3)
+        self.assertEqual(response.data['next_run'], (today + timedelta(days=1)).isoformat())
+        self.assertEqual(BankTransaction.objects.filter(recurring=response.data['id']).count(), 3)
+
+        # A nova frequência continua depois da última ocorrência gerada (há 6 dias)
+        rule_url = f"/api/accounts/recurring-transactions/{response.data['id']}/"
+        updated = self.client.put(rule_url, {'frequency': 'daily', 'amount': '45.00'}, format='json')
+        self.assertEqual(updated.status_code, 200)
+        self.assertEqual(updated.data['next_run'], (today + timedelta(days=1)).isoformat())
+        generated = BankTransaction.objects.filter(recurring=response.data['id'])
+        self.assertEqual(generated.count(), 3 + 6)
+        self.assertEqual(generated.filter(amount=Decimal('45.00')).count(), 6)
+
+        invalid = self.client.post(
+            '/api/accounts/recurring-transactions/', {**data, 'transaction_type': 'income'}, format='json',
+        )
+        self.assertEqual(invalid.status_code, 400)
+        self.assertEqual(
+            self.client.post('/api/accounts/recurring-transactions/', {**data, 'rrule': 'FREQ=HOURLY'}, format='json').status_code,
+            400,
+        )
+        # Uma regra diária desde 1900 geraria dezenas de milhares de transações na requisição
+        too_old = self.client.post(
+            '/api/accounts/recurring-transactions/', {**data, 'start_date': '1900-01-01', 'rrule': 'FREQ=DAILY'},
+            format='json',
+        )
+        self.assertEqual(too_old.status_code, 400)
+        self.assertIn('start_date', too_old.data)
+        self.assertEqual(self.client.put(rule_url, {'start_date': '1900-01-01'}, format='json').status_code, 400)
+
+        self.assertEqual(len(self.client.get('/api/accounts/recurring-transactions/').data), 1)
+        self.assertEqual(self.client.delete(rule_url).status_code, 200)
+        # As transações geradas continuam, sem a regra
+        self.assertEqual(BankTransaction.objects.filter(user=self.user, description='Streaming').count(), 9)
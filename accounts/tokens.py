@@ -0,0 +1,219 @@
+"""
+Tokens JWT de acesso e renovação da API.
+
+O token de acesso carrega os dados do usuário necessários às views e é
+verificado só com HMAC, sem consultar o banco. Cada token traz no cabeçalho
+o ``kid`` da chave que o assinou: a primeira chave de ``JWT_SIGNING_KEYS``
+assina os novos tokens e as demais só verificam, o que permite rotacionar a
+chave sem derrubar as sessões em andamento.
+
+Tokens revogados (logout e renovação) ficam na tabela ``RevokedToken`` e cada
+processo mantém em memória o conjunto dos que ainda não expiraram,
+recarregado a cada ``JWT_REVOCATION_REFRESH_INTERVAL`` segundos. Revogações
+feitas em outro processo valem nesse prazo; no próprio processo, na hora.
+A renovação não depende desse conjunto: ela grava a revogação do token usado
+antes de emitir o novo par, e o ``jti`` único na tabela impede que o mesmo
+token seja trocado duas vezes, mesmo em processos ou requisições simultâneas.
+
+``revoke_user_tokens`` revoga de uma vez os tokens de acesso já emitidos para
+um usuário (exclusão): grava uma revogação com o ``jti`` ``user:<id>``, que
+vale até o último desses tokens expirar. Os de renovação já são recusados
+pela releitura do usuário inativo em ``refresh_tokens``.
+"""
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone as dt_timezone
+from functools import lru_cache
+
+import jwt
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+
+from .models import RevokedToken
+
+ALGORITHM = 'HS256'
+ACCESS = 'access'
+REFRESH = 'refresh'
+REQUIRED_CLAIMS = ['exp', 'iat', 'jti', 'sub', 'type']
+
+User = get_user_model()
+
+
+class InvalidToken(Exception):
+    """Token malformado, expirado, revogado ou assinado por chave desconhecida"""
+
+
+@lru_cache(maxsize=8)
+def _parse_keys(value):
+    keys = {}
+    for item in value.split(','):
+        kid, _, secret = item.strip().partition(':')
+        if not kid or not secret:
+            raise ValueError("JWT_SIGNING_KEYS deve ter o formato 'id:segredo,id:segredo'")
+        keys[kid] = secret
+    return keys
+
+
+def signing_keys():
+    """Chaves por ``kid``, na ordem configurada (a primeira é a ativa)"""
+    keys = settings.JWT_SIGNING_KEYS
+    if isinstance(keys, str):
+        keys = _parse_keys(keys)
+    if not keys:
+        raise ValueError("Configure ao menos uma chave em JWT_SIGNING_KEYS")
+    return keys
+
+
+def _encode(user, token_type, lifetime, **claims):
+    kid, secret = next(iter(signing_keys().items()))
+    now = datetime.now(dt_timezone.utc)
+    payload = {
+        'sub': str(user.pk),
+        'type': token_type,
+        'jti': uuid.uuid4().hex,
+        'iat': now,
+        'exp': now + timedelta(seconds=lifetime),
+        **claims,
+    }
+    return jwt.encode(payload, secret, algorithm=ALGORITHM, headers={'kid': kid})
+
+
+def issue_tokens(user):
+    """Par de tokens de acesso e renovação para o usuário"""
+    return {
+        'access': _encode(
+            user, ACCESS, settings.JWT_ACCESS_TOKEN_LIFETIME,
+            username=user.username,
+            user_type=user.user_type,
+            is_staff=user.is_staff,
+            is_superuser=user.is_superuser,
+        ),
+        'refresh': _encode(user, REFRESH, settings.JWT_REFRESH_TOKEN_LIFETIME),
+    }
+
+
+def decode_token(token, token_type=ACCESS):
+    """Valida assinatura, expiração, tipo e revogação; retorna as claims"""
+    try:
+        kid = jwt.get_unverified_header(token).get('kid')
+        secret = signing_keys().get(kid)
+        if secret is None:
+            raise InvalidToken("Chave de assinatura desconhecida")
+        claims = jwt.decode(token, secret, algorithms=[ALGORITHM], options={'require': REQUIRED_CLAIMS})
+    except jwt.PyJWTError as exc:
+        raise InvalidToken(str(exc))
+
+    if claims['type'] != token_type:
+        raise InvalidToken("Tipo de token inválido")
+    if claims['jti'] in revoked_tokens or _user_jti(claims['sub']) in revoked_tokens:
+        raise InvalidToken("Token revogado")
+    return claims
+
+
+def token_user(claims):
+    """
+    Usuário montado a partir das claims do token de acesso, sem consultar o
+    banco. Tem apenas os campos usados na autorização; não deve ser salvo.
+    """
+    user = User(
+        id=int(claims['sub']),
+        username=claims.get('username', ''),
+        user_type=claims.get('user_type', 'user'),
+        is_staff=claims.get('is_staff', False),
+        is_superuser=claims.get('is_superuser', False),
+        is_active=True,
+    )
+    user._state.adding = False
+    return user
+
+
+def refresh_tokens(token):
+    """
+    Troca um token de renovação válido por um novo par. O token usado é
+    revogado, e o usuário é relido do banco para refletir desativações e
+    mudanças de perfil.
+    """
+    claims = decode_token(token, REFRESH)
+    user = User.objects.filter(pk=int(claims['sub']), is_active=True).first()
+    if user is None:
+        raise InvalidToken("Usuário inativo ou inexistente")
+    with transaction.atomic():
+        # A lista em memória pode estar desatualizada: quem grava a revogação
+        # primeiro fica com a renovação
+        if not revoke_token(claims):
+            raise InvalidToken("Token revogado")
+        return issue_tokens(user)
+
+
+def revoke_token(claims):
+    """Revoga o token até a sua expiração; retorna False se ele já estava revogado"""
+    expires_at = datetime.fromtimestamp(claims['exp'], tz=dt_timezone.utc)
+    # Com outra revogação do mesmo jti em andamento, o INSERT espera por ela e
+    # get_or_create trata a violação do índice único devolvendo created=False
+    _revoked, created = RevokedToken.objects.get_or_create(
+        jti=claims['jti'],
+        defaults={'user_id': int(claims['sub']), 'expires_at': expires_at},
+    )
+    # Aproveita para descartar as revogações de tokens já expirados
+    RevokedToken.objects.filter(expires_at__lte=timezone.now()).delete()
+    revoked_tokens.add(claims['jti'])
+    return created
+
+
+def _user_jti(user_id):
+    """``jti`` da revogação de todos os tokens do usuário (não colide com os uuid)"""
+    return f'user:{user_id}'
+
+
+def revoke_user_tokens(user):
+    """
+    Revoga todos os tokens de acesso já emitidos para o usuário. Retorna
+    quando o último deles expira; até lá o usuário não deve ser apagado, ou
+    a revogação iria junto com ele.
+    """
+    expires_at = timezone.now() + timedelta(seconds=settings.JWT_ACCESS_TOKEN_LIFETIME)
+    jti = _user_jti(user.pk)
+    RevokedToken.objects.update_or_create(jti=jti, defaults={'user': user, 'expires_at': expires_at})
+    # Só depois do commit: desfeita a exclusão, o usuário continua com acesso
+    transaction.on_commit(lambda: revoked_tokens.add(jti))
+    return expires_at
+
+
+class RevocationList:
+    """Conjunto em memória dos ``jti`` revogados e ainda não expirados"""
+
+    def __init__(self):
+        self._jtis = frozenset()
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def _reload_if_stale(self):
+        now = time.monotonic()
+        if self._loaded_at is not None and now - self._loaded_at < settings.JWT_REVOCATION_REFRESH_INTERVAL:
+            return
+        with self._lock:
+            if self._loaded_at is not None and now - self._loaded_at < settings.JWT_REVOCATION_REFRESH_INTERVAL:
+                return
+            self._jtis = frozenset(
+                RevokedToken.objects.filter(expires_at__gt=timezone.now()).values_list('jti', flat=True)
+            )
+            self._loaded_at = now
+
+    def __contains__(self, jti):
+        self._reload_if_stale()
+        return jti in self._jtis
+
+    def add(self, jti):
+        with self._lock:
+            self._jtis = self._jtis | {jti}
+
+    def reset(self):
+        """Força a releitura na próxima verificação"""
+        with self._lock:
+            self._loaded_at = None
+
+
+revoked_tokens = RevocationList()
@@ -1,10 +1,15 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
+
+# Leituras frequentes: variantes assíncronas no modo ASGI (ver async_views.py)
+read_views = async_views if settings.ACCOUNTS_ASYNC_VIEWS else views
 
 urlpatterns = [
     path('register/', views.RegisterView.as_view(), name='register'),
     path('login/', views.LoginView.as_view(), name='login'),
     path('logout/', views.logout_view, name='logout'),
+    path('token/refresh/', views.refresh_token_view, name='token_refresh'),
     path('profile/', views.get_user_profile, name='profile'),
     path('csrf/', views.get_csrf_token, name='csrf'),
     
@@ -13,7 +18,7 @@ urlpatterns = [
     path('users/<int:user_id>/', views.manage_user, name='manage_user'),
     
     # URLs para contas bancárias
-    path('bank-accounts/', views.bank_accounts_view, name='bank_accounts'),
+    path('bank-accounts/', read_views.bank_accounts_view, name='bank_accounts'),
     path('bank-accounts/<int:account_id>/', views.bank_account_detail, name='bank_account_detail'),
     
     # URLs para grupos de categorias
@@ -21,9 +26,56 @@ urlpatterns = [
     path('category-groups/<int:group_id>/', views.category_group_detail, name='category_group_detail'),
     
     # URLs para transações bancárias
-    path('transactions/', views.transactions_view, name='transactions'),
+    path('transactions/', read_views.transactions_view, name='transactions'),
+    path('transactions/batch/', views.transactions_batch, name='transactions_batch'),
+    path('transactions/import/', views.import_transactions, name='transactions_import'),
+    path('transactions/search/', views.transactions_search, name='transactions_search'),
+    path('transactions/export/<str:export_format>/', read_views.export_transactions, name='transactions_export'),
     path('transactions/<int:transaction_id>/', views.transaction_detail, name='transaction_detail'),
+
+    # URLs para transações recorrentes
+    path('recurring-transactions/', views.recurring_transactions_view, name='recurring_transactions'),
+    path(
+        'recurring-transactions/<int:rule_id>/',
+        views.recurring_transaction_detail, name='recurring_transaction_detail',
+    ),
     
     # URL para resumo financeiro
-    path('financial-summary/', views.financial_summary, name='financial_summary'),
+    path('financial-summary/', read_views.financial_summary, name='financial_summary'),
+    path('financial-summary/range/', views.financial_summary_range, name='financial_summary_range'),
+
+    # URL para totais agrupados por categoria, conta, tipo e período
+    path('analytics/', views.analytics_view, name='analytics'),
+
+    # URLs para investimentos, aportes e rendimentos
+    path('investments/', views.investments_view, name='investments'),
+    path('investments/portfolio/', views.investment_portfolio, name='investment_portfolio'),
+    path('investments/<int:investment_id>/', views.investment_detail, name='investment_detail'),
+    path('investments/<int:investment_id>/contributions/', views.investment_contributions, name='investment_contributions'),
+    path(
+        'investments/<int:investment_id>/contributions/<int:contribution_id>/',
+        views.investment_contribution_detail, name='investment_contribution_detail',
+    ),
+    path('investments/<int:investment_id>/yields/', views.investment_yields, name='investment_yields'),
+    path(
+        'investments/<int:investment_id>/yields/<int:yield_id>/',
+        views.investment_yield_detail, name='investment_yield_detail',
+    ),
+
+    # URL de carga inicial da tela de transações
+    path('dashboard/', read_views.dashboard_view, name='dashboard'),
+
+    # URL para estatísticas do cache de respostas (apenas admin)
+    path('cache-stats/', views.cache_stats_view, name='cache_stats'),
+
+    # URL para configuração e métricas das conexões com o banco (apenas admin)
+    path('db-stats/', views.db_stats_view, name='db_stats'),
+
+    # URL para o perfil das requisições por endpoint (apenas admin)
+    path('profiling/', views.profiling_view, name='profiling'),
+
+    # URLs para tarefas em segundo plano (exclusões, recálculos)
+    path('jobs/', views.jobs_view, name='jobs'),
+    path('jobs/<int:job_id>/', views.job_detail, name='job_detail'),
+    path('ledger/rebuild/', views.ledger_rebuild_view, name='ledger_rebuild'),
 ]
@@ -1,24 +1,68 @@
 from django.shortcuts import render
 from rest_framework import status, generics
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, parser_classes
+from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth import get_user_model
 from django.middleware.csrf import get_token
 from django.http import JsonResponse
+from django.urls import reverse
+from django.db import connections, transaction as db_transaction
 from django.db.models import Sum, Count
 from django.utils import timezone
 from datetime import datetime, timedelta
+from decimal import Decimal, InvalidOperation
+import csv
 from .serializers import (
     UserSerializer, RegisterSerializer, LoginSerializer, UserUpdateSerializer,
     BankAccountSerializer, CategoryGroupSerializer, BankTransactionSerializer,
-    FinancialSummarySerializer
+    RecurringTransactionSerializer, FinancialSummarySerializer,
+    InvestmentSerializer, ContributionSerializer, YieldEventSerializer, JobSerializer,
+    serialize_transaction_rows, transaction_list_rows, transaction_row_cursor
 )
-from .models import User, BankAccount, CategoryGroup, BankTransaction
+from .models import (
+    User, BankAccount, CategoryGroup, BankTransaction, RecurringTransaction, MonthlyRollup,
+    Investment, Contribution, YieldEvent, Job,
+)
+from .pagination import SearchPagination, TransactionCursorPagination
+from .profiling import profiling_stats, timed
+from .periods import current_month, month_range, parse_date, parse_month, summary_range, transactions_period
+from . import cache
+from .cache import cached_response
+from .conditional import (
+    conditional_get, bank_accounts_etag, category_groups_etag, transactions_etag,
+    financial_summary_etag, financial_summary_range_etag, dashboard_etag, analytics_etag
+)
+from .analytics import AnalyticsError, analytics, analytics_period, parse_dimensions
+from .authentication import JWTAuthentication
+from .batch import BatchError, apply_batch
+from .exports import EXPORT_FORMATS, export_queryset, export_response, stream_export
+from .importers import ImportRowError, TransactionImporter, iter_csv_rows, iter_ofx_rows
+from .investments import asset_history, asset_metrics, portfolio_metrics
+from .deletion import soft_delete_bank_account, soft_delete_user
+from .jobs import enqueue
+from .recurring import materialize_due
+from .search import SearchError, clean_query, search_transactions
+from .tokens import REFRESH, InvalidToken, decode_token, issue_tokens, refresh_tokens, revoke_token
 
 User = get_user_model()
 
+# Limite de meses aceitos pelo resumo por intervalo
+MAX_SUMMARY_RANGE_MONTHS = 120
+# Maior id aceito nos filtros (BigAutoField); acima disso o banco recusa o parâmetro
+MAX_ID = 2 ** 63 - 1
+
+
+def _parse_id(value):
+    """Id de um filtro da query string (ValueError se não for um inteiro válido)"""
+    pk = int(value)
+    if not 0 < pk <= MAX_ID:
+        raise ValueError(f'Id fora do intervalo: {value}')
+    return pk
+
 class RegisterView(generics.CreateAPIView):
     queryset = User.objects.all()
     permission_classes = (AllowAny,)
@@ -37,9 +81,29 @@ class LoginView(generics.GenericAPIView):
 
         return Response({
             'user': UserSerializer(user).data,
-            'message': 'Login realizado com sucesso'
+            'message': 'Login realizado com sucesso',
+            **issue_tokens(user),
         })
 
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def refresh_token_view(request):
+    """Troca um token de renovação por um novo par de tokens"""
+    refresh = request.data.get('refresh')
+    if not refresh:
+        return Response(
+            {"error": "Informe o token de renovação em 'refresh'"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        return Response(refresh_tokens(refresh))
+    except InvalidToken:
+        return Response(
+            {"error": "Token de renovação inválido ou expirado"},
+            status=status.HTTP_401_UNAUTHORIZED
+        )
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def get_csrf_token(request):
@@ -49,12 +113,24 @@ def get_csrf_token(request):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_user_profile(request):
-    serializer = UserSerializer(request.user)
+    user = request.user
+    if isinstance(request.successful_authenticator, JWTAuthentication):
+        # Com JWT o usuário vem do token, só com os campos de autorização
+        user = User.objects.get(pk=user.pk)
+    serializer = UserSerializer(user)
     return Response(serializer.data)
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def logout_view(request):
+    if isinstance(request.successful_authenticator, JWTAuthentication):
+        revoke_token(request.auth)
+        refresh = request.data.get('refresh')
+        if refresh:
+            try:
+                revoke_token(decode_token(refresh, REFRESH))
+            except InvalidToken:
+                pass
     logout(request)
     return Response({"message": "Logout realizado com sucesso"})
 
@@ -69,7 +145,7 @@ def get_users_list(request):
             status=status.HTTP_403_FORBIDDEN
         )
 
-    users = User.objects.all().order_by('-created_at')
+    users = User.objects.filter(deleted_at__isnull=True).order_by('-created_at')
     serializer = UserSerializer(users, many=True)
     return Response(serializer.data)
 
@@ -84,7 +160,7 @@ def manage_user(request, user_id):
         )
 
     try:
-        user = User.objects.get(id=user_id)
+        user = User.objects.get(id=user_id, deleted_at__isnull=True)
     except User.DoesNotExist:
         return Response(
             {"error": "Usuário não encontrado"},
@@ -116,25 +192,43 @@ def manage_user(request, user_id):
                 {"error": "Não é possível excluir sua própria conta"},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        user.delete()
-        return Response({"message": "Usuário excluído com sucesso"})
+        # O usuário sai de cena na hora; o histórico é apagado em segundo plano,
+        # depois que expiram os tokens revogados (a revogação é apagada com ele)
+        with db_transaction.atomic():
+            purge_after = soft_delete_user(user)
+            job = enqueue(
+                'delete_user', {'user_id': user.id}, user=request.user, key=f'user:{user.id}',
+                run_after=purge_after,
+            )
+        return _job_accepted(job, "Exclusão do usuário agendada")
 
 # Views para Contas Bancárias
+def _bank_accounts_queryset(user):
+    return BankAccount.objects.filter(user=user, is_active=True).order_by('name')
+
+def _bank_accounts_data(request):
+    accounts = list(_bank_accounts_queryset(request.user))
+    with timed('serialize'):
+        return BankAccountSerializer(accounts, many=True, context={'request': request}).data
+
+def _create_bank_account(request):
+    serializer = BankAccountSerializer(data=request.data, context={'request': request})
+    if serializer.is_valid():
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
+@conditional_get(bank_accounts_etag, cache.BANK_ACCOUNTS)
+@cached_response(cache.BANK_ACCOUNTS)
 def bank_accounts_view(request):
     """Listar e criar contas bancárias do usuário"""
     if request.method == 'GET':
-        accounts = BankAccount.objects.filter(user=request.user, is_active=True).order_by('name')
-        serializer = BankAccountSerializer(accounts, many=True, context={'request': request})
-        return Response(serializer.data)
+        return Response(_bank_accounts_data(request))
 
     elif request.method == 'POST':
-        serializer = BankAccountSerializer(data=request.data, context={'request': request})
-        if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        return _create_bank_account(request)
 
 @api_view(['GET', 'PUT', 'DELETE'])
 @permission_classes([IsAuthenticated])
@@ -160,18 +254,32 @@ def bank_account_detail(request, account_id):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     elif request.method == 'DELETE':
-        account.delete()
-        return Response({"message": "Conta bancária excluída com sucesso"})
+        # A conta some na hora; o histórico é apagado em segundo plano
+        with db_transaction.atomic():
+            soft_delete_bank_account(account)
+            job = enqueue(
+                'delete_bank_account', {'bank_account_id': account.id},
+                user=request.user, key=f'bank_account:{account.id}',
+            )
+        return _job_accepted(job, "Exclusão da conta bancária agendada")
 
 # Views para Grupos de Categorias
+def _category_groups_queryset(user):
+    return CategoryGroup.objects.filter(user=user, is_active=True).order_by('transaction_type', 'name')
+
+def _category_groups_data(request):
+    groups = list(_category_groups_queryset(request.user))
+    with timed('serialize'):
+        return CategoryGroupSerializer(groups, many=True, context={'request': request}).data
+
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
+@conditional_get(category_groups_etag, cache.CATEGORY_GROUPS)
+@cached_response(cache.CATEGORY_GROUPS)
 def category_groups_view(request):
     """Listar e criar grupos de categorias do usuário"""
     if request.method == 'GET':
-        groups = CategoryGroup.objects.filter(user=request.user, is_active=True).order_by('transaction_type', 'name')
-        serializer = CategoryGroupSerializer(groups, many=True, context={'request': request})
-        return Response(serializer.data)
+        return Response(_category_groups_data(request))
 
     elif request.method == 'POST':
         serializer = CategoryGroupSerializer(data=request.data, context={'request': request})
@@ -208,57 +316,139 @@ def category_group_detail(request, group_id):
         return Response({"message": "Grupo de categoria excluído com sucesso"})
 
 # Views para Transações Bancárias
+def _transactions_queryset(user, start_date, end_date):
+    return BankTransaction.objects.filter(
+        user=user,
+        transaction_date__range=[start_date, end_date]
+    )
+
+def _transactions_page(request, start_date, end_date):
+    """Primeira página (ou a do cursor informado) das transações do período"""
+    rows = transaction_list_rows(_transactions_queryset(request.user, start_date, end_date))
+
+    # Paginação por cursor na ordenação (-transaction_date, -created_at, -id)
+    paginator = TransactionCursorPagination(cursor_key=transaction_row_cursor)
+    page = paginator.paginate_queryset(rows, request)
+    return paginator, serialize_transaction_rows(page)
+
+def _create_transaction(request):
+    serializer = BankTransactionSerializer(data=request.data, context={'request': request})
+    if serializer.is_valid():
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
+@conditional_get(transactions_etag, cache.TRANSACTIONS)
+@cached_response(cache.TRANSACTIONS)
 def transactions_view(request):
     """Listar e criar transações do usuário"""
     if request.method == 'GET':
-        # Filtrar por mês se especificado
-        month_year = request.GET.get('month_year')
-        if month_year:
-            try:
-                # Converter YYYY-MM para filtro de data
-                year, month = month_year.split('-')
-                start_date = datetime(int(year), int(month), 1).date()
-                if int(month) == 12:
-                    end_date = datetime(int(year) + 1, 1, 1).date() - timedelta(days=1)
-                else:
-                    end_date = datetime(int(year), int(month) + 1, 1).date() - timedelta(days=1)
-
-                transactions = BankTransaction.objects.filter(
-                    user=request.user,
-                    transaction_date__range=[start_date, end_date]
-                ).order_by('-transaction_date', '-created_at')
-            except ValueError:
-                return Response(
-                    {"error": "Formato de mês inválido. Use YYYY-MM"},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-        else:
-            # Últimos 6 meses por padrão
-            end_date = timezone.now().date()
-            start_date = end_date - timedelta(days=180)
-            transactions = BankTransaction.objects.filter(
-                user=request.user,
-                transaction_date__range=[start_date, end_date]
-            ).order_by('-transaction_date', '-created_at')
-
-        serializer = BankTransactionSerializer(transactions, many=True, context={'request': request})
-        return Response(serializer.data)
+        # Filtrar por mês se especificado (últimos 6 meses por padrão)
+        try:
+            start_date, end_date = transactions_period(request.GET.get('month_year'))
+        except ValueError:
+            return Response(
+                {"error": "Formato de mês inválido. Use YYYY-MM"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        paginator, data = _transactions_page(request, start_date, end_date)
+        return paginator.get_paginated_response(data)
 
     elif request.method == 'POST':
-        serializer = BankTransactionSerializer(data=request.data, context={'request': request})
-        if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        return _create_transaction(request)
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@parser_classes([MultiPartParser])
+def import_transactions(request):
+    """Importar extrato bancário (CSV ou OFX) em lote"""
+    upload = request.FILES.get('file')
+    if not upload:
+        return Response(
+            {"error": "Envie o arquivo do extrato no campo 'file'"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    file_format = (request.data.get('format') or upload.name.rsplit('.', 1)[-1]).lower()
+    if file_format not in ('csv', 'ofx'):
+        return Response(
+            {"error": "Formato não suportado. Use CSV ou OFX"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        importer = TransactionImporter(
+            request.user,
+            bank_account=request.data.get('bank_account'),
+            income_category=request.data.get('income_category'),
+            expense_category=request.data.get('expense_category'),
+        )
+    except ImportRowError as exc:
+        return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+    rows = iter_ofx_rows(upload) if file_format == 'ofx' else iter_csv_rows(upload)
+    try:
+        report = importer.run(rows)
+    except (UnicodeDecodeError, csv.Error):
+        return Response(
+            {"error": "Não foi possível ler o arquivo enviado"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    response_status = status.HTTP_201_CREATED if report['created'] else status.HTTP_400_BAD_REQUEST
+    return Response(report, status=response_status)
+
+def _export_queryset(request, export_format):
+    """Queryset da exportação, ou a resposta de erro dos parâmetros"""
+    if export_format not in EXPORT_FORMATS:
+        return None, Response(
+            {"error": "Formato não suportado. Use csv ou ndjson"},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    try:
+        start_date = parse_date(request.GET['start']) if request.GET.get('start') else None
+        end_date = parse_date(request.GET['end'], end=True) if request.GET.get('end') else None
+    except ValueError:
+        return None, Response(
+            {"error": "Data inválida. Use YYYY-MM-DD ou YYYY-MM"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    return export_queryset(request.user, start_date, end_date), None
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def export_transactions(request, export_format):
+    """Exportar o histórico de transações (CSV ou NDJSON) em streaming"""
+    queryset, error = _export_queryset(request, export_format)
+    if error:
+        return error
+    return export_response(stream_export(queryset, export_format), export_format)
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def transactions_batch(request):
+    """Criar, alterar e excluir várias transações em uma única requisição"""
+    # Corpo JSON que não é um objeto (uma lista, por exemplo) não tem 'operations'
+    operations = request.data.get('operations') if isinstance(request.data, dict) else None
+    try:
+        results, success = apply_batch(request.user, operations)
+    except BatchError as exc:
+        return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+    response_status = status.HTTP_200_OK if success else status.HTTP_400_BAD_REQUEST
+    return Response({'results': results}, status=response_status)
 
 @api_view(['GET', 'PUT', 'DELETE'])
 @permission_classes([IsAuthenticated])
 def transaction_detail(request, transaction_id):
     """Gerenciar transação específica"""
     try:
-        transaction = BankTransaction.objects.get(id=transaction_id, user=request.user)
+        transaction = BankTransaction.objects.select_related('bank_account', 'category_group').get(
+            id=transaction_id, user=request.user
+        )
     except BankTransaction.DoesNotExist:
         return Response(
             {"error": "Transação não encontrada"},
@@ -280,50 +470,566 @@ def transaction_detail(request, transaction_id):
         transaction.delete()
         return Response({"message": "Transação excluída com sucesso"})
 
+# Views para Transações Recorrentes
+def _save_recurring(serializer):
+    """Grava a regra e já gera as ocorrências vencidas, como faria o agendador"""
+    with db_transaction.atomic():
+        rule = serializer.save()
+        materialize_due(rules=RecurringTransaction.objects.filter(pk=rule.pk))
+    rule.refresh_from_db()
+    return RecurringTransactionSerializer(rule, context=serializer.context).data
+
+@api_view(['GET', 'POST'])
+@permission_classes([IsAuthenticated])
+def recurring_transactions_view(request):
+    """Listar e criar transações recorrentes do usuário"""
+    if request.method == 'GET':
+        rules = RecurringTransaction.objects.filter(user=request.user).select_related('bank_account', 'category_group')
+        serializer = RecurringTransactionSerializer(rules, many=True, context={'request': request})
+        return Response(serializer.data)
+
+    elif request.method == 'POST':
+        serializer = RecurringTransactionSerializer(data=request.data, context={'request': request})
+        if serializer.is_valid():
+            return Response(_save_recurring(serializer), status=status.HTTP_201_CREATED)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+@api_view(['GET', 'PUT', 'DELETE'])
+@permission_classes([IsAuthenticated])
+def recurring_transaction_detail(request, rule_id):
+    """Gerenciar transação recorrente específica; excluir a regra mantém as transações já geradas"""
+    try:
+        rule = RecurringTransaction.objects.get(id=rule_id, user=request.user)
+    except RecurringTransaction.DoesNotExist:
+        return Response(
+            {"error": "Transação recorrente não encontrada"},
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    if request.method == 'GET':
+        serializer = RecurringTransactionSerializer(rule, context={'request': request})
+        return Response(serializer.data)
+
+    elif request.method == 'PUT':
+        serializer = RecurringTransactionSerializer(rule, data=request.data, partial=True, context={'request': request})
+        if serializer.is_valid():
+            return Response(_save_recurring(serializer))
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    elif request.method == 'DELETE':
+        rule.delete()
+        return Response({"message": "Transação recorrente excluída com sucesso"})
+
 # View para resumo financeiro
+def _monthly_rollups(user, month_year):
+    """Consolidados do mês (ValueError se o mês for inválido)"""
+    return MonthlyRollup.objects.filter(user=user, month=parse_month(month_year))
+
+def _summary_totals():
+    return {
+        'total_income': Sum('total_income', default=0),
+        'total_expense': Sum('total_expense', default=0),
+        'transaction_count': Sum('transaction_count', default=0),
+    }
+
+def _monthly_summary_data(user, month_year):
+    """Resumo de um mês a partir dos consolidados (ValueError se o mês for inválido)"""
+    # Uma única leitura indexada nos consolidados mensais
+    totals = _monthly_rollups(user, month_year).aggregate(**_summary_totals())
+    return _summary_data(month_year, totals)
+
+def _summary_data(month_year, totals):
+    summary = {
+        'month_year': month_year,
+        'total_income': totals['total_income'],
+        'total_expense': totals['total_expense'],
+        'balance': totals['total_income'] - totals['total_expense'],
+        'transaction_count': totals['transaction_count']
+    }
+    return FinancialSummarySerializer(summary).data
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@conditional_get(financial_summary_etag, cache.FINANCIAL_SUMMARY)
+@cached_response(cache.FINANCIAL_SUMMARY)
 def financial_summary(request):
     """Resumo financeiro do usuário por mês"""
     month_year = request.GET.get('month_year')
 
     if not month_year:
         # Usar mês atual se não especificado
-        month_year = timezone.now().strftime('%Y-%m')
+        month_year = current_month()
+
+    try:
+        return Response(_monthly_summary_data(request.user, month_year))
+    except ValueError:
+        return Response(
+            {"error": "Formato de mês inválido. Use YYYY-MM"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@conditional_get(financial_summary_range_etag, cache.FINANCIAL_SUMMARY)
+@cached_response(cache.FINANCIAL_SUMMARY)
+def financial_summary_range(request):
+    """Resumo financeiro mês a mês em um intervalo (padrão: últimos 12 meses)"""
     try:
-        year, month = month_year.split('-')
-        start_date = datetime(int(year), int(month), 1).date()
-        if int(month) == 12:
-            end_date = datetime(int(year) + 1, 1, 1).date() - timedelta(days=1)
-        else:
-            end_date = datetime(int(year), int(month) + 1, 1).date() - timedelta(days=1)
-
-        transactions = BankTransaction.objects.filter(
-            user=request.user,
-            transaction_date__range=[start_date, end_date]
+        start_month, end_month = summary_range(request.GET.get('start'), request.GET.get('end'))
+    except ValueError:
+        return Response(
+            {"error": "Formato de mês inválido. Use YYYY-MM"},
+            status=status.HTTP_400_BAD_REQUEST
         )
 
-        total_income = transactions.filter(transaction_type='income').aggregate(
-            total=Sum('amount'))['total'] or 0
-        total_expense = transactions.filter(transaction_type='expense').aggregate(
-            total=Sum('amount'))['total'] or 0
-        transaction_count = transactions.count()
-        balance = total_income - total_expense
+    month_count = (end_month.year - start_month.year) * 12 + end_month.month - start_month.month + 1
+    if month_count < 1 or month_count > MAX_SUMMARY_RANGE_MONTHS:
+        return Response(
+            {"error": f"O intervalo deve ter entre 1 e {MAX_SUMMARY_RANGE_MONTHS} meses"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
 
-        summary = {
-            'month_year': month_year,
+    rollups = MonthlyRollup.objects.filter(
+        user=request.user,
+        month__range=[start_month, end_month]
+    )
+    try:
+        if request.GET.get('bank_account'):
+            rollups = rollups.filter(bank_account_id=_parse_id(request.GET['bank_account']))
+        if request.GET.get('category_group'):
+            rollups = rollups.filter(category_group_id=_parse_id(request.GET['category_group']))
+    except ValueError:
+        return Response(
+            {"error": "Filtro de conta ou categoria inválido"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    # Uma única consulta agrupada por mês para todo o intervalo
+    totals_by_month = {
+        row['month']: row
+        for row in rollups.values('month').annotate(
+            total_income=Sum('total_income'),
+            total_expense=Sum('total_expense'),
+            transaction_count=Sum('transaction_count'),
+        ).order_by('month')
+    }
+
+    summaries = []
+    year, month = start_month.year, start_month.month
+    for _ in range(month_count):
+        current = datetime(year, month, 1).date()
+        row = totals_by_month.get(current, {})
+        total_income = row.get('total_income') or 0
+        total_expense = row.get('total_expense') or 0
+        summaries.append({
+            'month_year': current.strftime('%Y-%m'),
             'total_income': total_income,
             'total_expense': total_expense,
-            'balance': balance,
-            'transaction_count': transaction_count
-        }
+            'balance': total_income - total_expense,
+            'transaction_count': row.get('transaction_count') or 0
+        })
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
 
-        serializer = FinancialSummarySerializer(summary)
-        return Response(serializer.data)
+    serializer = FinancialSummarySerializer(summaries, many=True)
+    return Response(serializer.data)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@conditional_get(analytics_etag, cache.ANALYTICS)
+@cached_response(cache.ANALYTICS)
+def analytics_view(request):
+    """
+    Receitas, despesas e quantidade por categoria, conta, tipo, dia, semana
+    ou mês (``group_by``, separados por vírgula) em um intervalo, em colunas
+    """
+    try:
+        start_date, end_date = analytics_period(request.GET.get('start'), request.GET.get('end'))
+        dimensions = parse_dimensions(request.GET.get('group_by'))
+    except AnalyticsError as exc:
+        return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+    filters, error = _transaction_filters(request)
+    if error:
+        return error
+
+    return Response(analytics(request.user, start_date, end_date, dimensions, filters))
 
+def _transaction_filters(request):
+    """Filtros de conta, categoria e tipo da query string, ou a resposta de erro"""
+    filters = {}
+    try:
+        if request.GET.get('bank_account'):
+            filters['bank_account_id'] = _parse_id(request.GET['bank_account'])
+        if request.GET.get('category_group'):
+            filters['category_group_id'] = _parse_id(request.GET['category_group'])
+    except ValueError:
+        return None, Response(
+            {"error": "Filtro de conta ou categoria inválido"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if request.GET.get('transaction_type'):
+        if request.GET['transaction_type'] not in ('income', 'expense'):
+            return None, Response(
+                {"error": "Tipo de transação inválido. Use income ou expense"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        filters['transaction_type'] = request.GET['transaction_type']
+    return filters, None
+
+def _search_filters(request):
+    """Filtros da busca: os de ``_transaction_filters``, datas e faixa de valor"""
+    filters, error = _transaction_filters(request)
+    if error:
+        return None, error
+    try:
+        if request.GET.get('start'):
+            filters['transaction_date__gte'] = parse_date(request.GET['start'])
+        if request.GET.get('end'):
+            filters['transaction_date__lte'] = parse_date(request.GET['end'], end=True)
+    except ValueError:
+        return None, Response(
+            {"error": "Data inválida. Use YYYY-MM-DD ou YYYY-MM"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    try:
+        for param, lookup in (('min_amount', 'amount__gte'), ('max_amount', 'amount__lte')):
+            if request.GET.get(param):
+                amount = Decimal(request.GET[param])
+                # NaN e Infinity são Decimals válidos, mas não valores comparáveis
+                if not amount.is_finite():
+                    raise InvalidOperation(request.GET[param])
+                filters[lookup] = amount
+    except InvalidOperation:
+        return None, Response(
+            {"error": "Valor inválido. Use números como 150.00"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    return filters, None
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def transactions_search(request):
+    """
+    Buscar no histórico completo pela descrição (``q``), com filtros de conta,
+    categoria, tipo, datas (``start``/``end``) e valor (``min_amount``/
+    ``max_amount``); resultados por relevância, paginados pelo link ``next``
+    """
+    try:
+        text = clean_query(request.GET.get('q'))
+    except SearchError as exc:
+        return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+    filters, error = _search_filters(request)
+    if error:
+        return error
+
+    paginator = SearchPagination()
+    results = search_transactions(request.user, text, filters)
+    rows = paginator.paginate_queryset(transaction_list_rows(results), request)
+    return paginator.get_paginated_response(serialize_transaction_rows(rows))
+
+# View de carga inicial da tela de transações
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@conditional_get(dashboard_etag, cache.DASHBOARD)
+@cached_response(cache.DASHBOARD)
+def dashboard_view(request):
+    """
+    Contas, categorias, primeira página de transações e resumo do mês em uma
+    única resposta. As páginas seguintes são buscadas no link ``next`` da
+    listagem de transações.
+    """
+    month_year = request.GET.get('month_year') or current_month()
+
+    try:
+        start_date, end_date = month_range(month_year)
+        summary = _monthly_summary_data(request.user, month_year)
     except ValueError:
         return Response(
             {"error": "Formato de mês inválido. Use YYYY-MM"},
             status=status.HTTP_400_BAD_REQUEST
         )
+
+    paginator, transactions = _transactions_page(request, start_date, end_date)
+    return Response(_dashboard_data(
+        request, month_year, _bank_accounts_data(request), _category_groups_data(request),
+        paginator, transactions, summary,
+    ))
+
+def _dashboard_data(request, month_year, bank_accounts, category_groups, paginator, transactions, summary):
+    # O link da próxima página aponta para a listagem de transações do mês
+    transactions_url = replace_query_param(
+        request.build_absolute_uri(reverse('transactions')), 'month_year', month_year
+    )
+    if request.GET.get(paginator.page_size_query_param):
+        transactions_url = replace_query_param(
+            transactions_url, paginator.page_size_query_param, request.GET[paginator.page_size_query_param]
+        )
+
+    return {
+        'month_year': month_year,
+        'bank_accounts': bank_accounts,
+        'category_groups': category_groups,
+        'transactions': {
+            'next': paginator.get_next_link(transactions_url),
+            'results': transactions,
+        },
+        'financial_summary': summary,
+    }
+
+# Views para Investimentos
+# Métricas calculadas (ver investments.py) incluídas em cada investimento
+INVESTMENT_METRICS = (
+    'total_contributions', 'total_invested', 'current_value', 'total_yield', 'roi', 'simple_roi',
+    'time_weighted_return', 'money_weighted_return', 'last_update',
+)
+
+def _investment_data(request, investment, metrics):
+    data = InvestmentSerializer(investment, context={'request': request}).data
+    data.update({field: metrics[field] for field in INVESTMENT_METRICS})
+    return data
+
+def _get_investment(request, investment_id):
+    try:
+        return Investment.objects.get(id=investment_id, user=request.user)
+    except Investment.DoesNotExist:
+        return None
+
+def _investment_not_found():
+    return Response(
+        {"error": "Investimento não encontrado"},
+        status=status.HTTP_404_NOT_FOUND
+    )
+
+@api_view(['GET', 'POST'])
+@permission_classes([IsAuthenticated])
+def investments_view(request):
+    """Listar (com ROI e retornos de cada ativo) e criar investimentos do usuário"""
+    if request.method == 'GET':
+        investments = Investment.objects.filter(user=request.user)
+        if request.GET.get('investment_type'):
+            investments = investments.filter(investment_type=request.GET['investment_type'])
+        if request.GET.get('status'):
+            investments = investments.filter(status=request.GET['status'])
+
+        investments = list(investments)
+        return Response([
+            _investment_data(request, investment, metrics)
+            for investment, metrics in zip(investments, asset_metrics(investments))
+        ])
+
+    elif request.method == 'POST':
+        serializer = InvestmentSerializer(data=request.data, context={'request': request})
+        if serializer.is_valid():
+            investment = serializer.save()
+            return Response(
+                _investment_data(request, investment, asset_metrics([investment])[0]),
+                status=status.HTTP_201_CREATED
+            )
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+@api_view(['GET', 'PUT', 'DELETE'])
+@permission_classes([IsAuthenticated])
+def investment_detail(request, investment_id):
+    """Gerenciar investimento específico; o GET inclui o histórico de valores"""
+    investment = _get_investment(request, investment_id)
+    if investment is None:
+        return _investment_not_found()
+
+    if request.method == 'GET':
+        metrics = asset_metrics([investment])[0]
+        data = _investment_data(request, investment, metrics)
+        data['history'] = asset_history(metrics)
+        return Response(data)
+
+    elif request.method == 'PUT':
+        serializer = InvestmentSerializer(investment, data=request.data, partial=True, context={'request': request})
+        if serializer.is_valid():
+            investment = serializer.save()
+            return Response(_investment_data(request, investment, asset_metrics([investment])[0]))
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    elif request.method == 'DELETE':
+        investment.delete()
+        return Response({"message": "Investimento excluído com sucesso"})
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def investment_portfolio(request):
+    """ROI, TWR, MWR e histórico da carteira de investimentos ativos"""
+    investments = list(Investment.objects.filter(user=request.user, status='active'))
+    return Response(portfolio_metrics(asset_metrics(investments)))
+
+def _investment_events_view(request, investment_id, model, serializer_class):
+    investment = _get_investment(request, investment_id)
+    if investment is None:
+        return _investment_not_found()
+
+    context = {'request': request, 'investment': investment}
+    if request.method == 'GET':
+        events = model.objects.filter(investment=investment)
+        return Response(serializer_class(events, many=True, context=context).data)
+
+    serializer = serializer_class(data=request.data, context=context)
+    if serializer.is_valid():
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+def _investment_event_detail(request, investment_id, event_id, model, serializer_class, label):
+    investment = _get_investment(request, investment_id)
+    if investment is None:
+        return _investment_not_found()
+
+    try:
+        event = model.objects.get(id=event_id, investment=investment)
+    except model.DoesNotExist:
+        return Response(
+            {"error": f"{label} não encontrado"},
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    context = {'request': request, 'investment': investment}
+    if request.method == 'GET':
+        return Response(serializer_class(event, context=context).data)
+
+    elif request.method == 'PUT':
+        serializer = serializer_class(event, data=request.data, partial=True, context=context)
+        if serializer.is_valid():
+            serializer.save()
+            return Response(serializer.data)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    elif request.method == 'DELETE':
+        event.delete()
+        return Response({"message": f"{label} excluído com sucesso"})
+
+@api_view(['GET', 'POST'])
+@permission_classes([IsAuthenticated])
+def investment_contributions(request, investment_id):
+    """Listar e registrar aportes de um investimento"""
+    return _investment_events_view(request, investment_id, Contribution, ContributionSerializer)
+
+@api_view(['GET', 'PUT', 'DELETE'])
+@permission_classes([IsAuthenticated])
+def investment_contribution_detail(request, investment_id, contribution_id):
+    """Gerenciar aporte específico (o investimento é recalculado ao alterar)"""
+    return _investment_event_detail(
+        request, investment_id, contribution_id, Contribution, ContributionSerializer, 'Aporte'
+    )
+
+@api_view(['GET', 'POST'])
+@permission_classes([IsAuthenticated])
+def investment_yields(request, investment_id):
+    """Listar e registrar rendimentos percentuais de um investimento"""
+    return _investment_events_view(request, investment_id, YieldEvent, YieldEventSerializer)
+
+@api_view(['GET', 'PUT', 'DELETE'])
+@permission_classes([IsAuthenticated])
+def investment_yield_detail(request, investment_id, yield_id):
+    """Gerenciar rendimento específico (o investimento é recalculado ao alterar)"""
+    return _investment_event_detail(
+        request, investment_id, yield_id, YieldEvent, YieldEventSerializer, 'Rendimento'
+    )
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def cache_stats_view(request):
+    """Contadores de acerto do cache de respostas (apenas para admin)"""
+    if request.user.user_type != 'admin':
+        return Response(
+            {"error": "Acesso negado. Apenas administradores podem ver estas estatísticas."},
+            status=status.HTTP_403_FORBIDDEN
+        )
+
+    return Response(cache.cache_stats())
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def db_stats_view(request):
+    """Configuração das conexões e métricas do pool deste processo (apenas para admin)"""
+    if request.user.user_type != 'admin':
+        return Response(
+            {"error": "Acesso negado. Apenas administradores podem ver estas estatísticas."},
+            status=status.HTTP_403_FORBIDDEN
+        )
+
+    stats = {}
+    for connection in connections.all():
+        pool_stats = getattr(connection, 'pool_stats', None)
+        stats[connection.alias] = {
+            'engine': connection.settings_dict['ENGINE'],
+            'conn_max_age': connection.settings_dict['CONN_MAX_AGE'],
+            'conn_health_checks': connection.settings_dict['CONN_HEALTH_CHECKS'],
+            'pool': pool_stats() if pool_stats else None,
+        }
+    return Response(stats)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def profiling_view(request):
+    """Percentis de tempo, consultas e tamanho por endpoint (apenas para admin)"""
+    if request.user.user_type != 'admin':
+        return Response(
+            {"error": "Acesso negado. Apenas administradores podem ver estas estatísticas."},
+            status=status.HTTP_403_FORBIDDEN
+        )
+
+    return Response(profiling_stats())
+
+# Views das tarefas em segundo plano
+# Quantidade de tarefas mais recentes listadas
+JOBS_LIST_LIMIT = 50
+
+def _job_accepted(job, message):
+    """Resposta 202 de uma operação enfileirada, com o link de acompanhamento"""
+    response = Response(
+        {"message": message, "job": JobSerializer(job).data},
+        status=status.HTTP_202_ACCEPTED
+    )
+    response['Location'] = reverse('job_detail', args=[job.id])
+    return response
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def jobs_view(request):
+    """Listar as tarefas mais recentes do usuário"""
+    jobs = Job.objects.filter(user=request.user)[:JOBS_LIST_LIMIT]
+    return Response(JobSerializer(jobs, many=True).data)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def job_detail(request, job_id):
+    """Status e progresso de uma tarefa (do usuário, ou qualquer uma para admin)"""
+    jobs = Job.objects.all() if request.user.user_type == 'admin' else Job.objects.filter(user=request.user)
+    try:
+        job = jobs.get(id=job_id)
+    except Job.DoesNotExist:
+        return Response(
+            {"error": "Tarefa não encontrada"},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    return Response(JobSerializer(job).data)
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def ledger_rebuild_view(request):
+    """Recalcular saldos e consolidados em segundo plano (apenas para admin)"""
+    if request.user.user_type != 'admin':
+        return Response(
+            {"error": "Acesso negado. Apenas administradores podem recalcular saldos."},
+            status=status.HTTP_403_FORBIDDEN
+        )
+
+    payload, key = {}, 'all'
+    if request.data.get('user'):
+        try:
+            payload['user_id'] = _parse_id(request.data['user'])
+        except (TypeError, ValueError):
+            return Response(
+                {"error": "Usuário inválido"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        key = f"user:{payload['user_id']}"
+    job = enqueue('rebuild_ledger', payload, user=request.user, key=key)
+    return _job_accepted(job, "Recálculo de saldos agendado")
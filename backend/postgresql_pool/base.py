@@ -0,0 +1,95 @@
+"""
+Backend PostgreSQL com pool de conexões no processo (psycopg 3 + psycopg_pool).
+
+Em vez de abrir uma conexão por requisição, o Django pega uma conexão do pool
+e a devolve ao fechar. O pool verifica a conexão antes de entregá-la e
+descarta as quebradas. Cada processo tem o seu pool, então o total de
+conexões no servidor é ``workers × DB_POOL_MAX_SIZE``.
+
+Ativado com ``DB_POOL_ENABLED=True`` (ver ``backend/settings.py``).
+"""
+import threading
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.postgresql import base
+from django.db.backends.postgresql.psycopg_any import IsolationLevel, is_psycopg3
+
+try:
+    from psycopg_pool import ConnectionPool, PoolTimeout
+except ImportError:
+    ConnectionPool = PoolTimeout = None
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    pool_options = ('min_size', 'max_size', 'timeout', 'max_idle', 'max_lifetime')
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        for option in self.pool_options:
+            params.pop(option, None)
+        return params
+
+    @property
+    def pool(self):
+        """Pool do processo para este alias, criado no primeiro uso"""
+        pool = _pools.get(self.alias)
+        if pool is not None:
+            return pool
+        if not is_psycopg3 or ConnectionPool is None:
+            raise ImproperlyConfigured("O pool de conexões requer os pacotes psycopg e psycopg-pool.")
+        with _pools_lock:
+            if self.alias not in _pools:
+                options = self.settings_dict['OPTIONS']
+                pool = ConnectionPool(
+                    kwargs=self.get_connection_params(),
+                    name=self.alias,
+                    min_size=options.get('min_size', 2),
+                    max_size=options.get('max_size', 10),
+                    timeout=options.get('timeout', 10),
+                    max_idle=options.get('max_idle', 600),
+                    max_lifetime=options.get('max_lifetime', 3600),
+                    check=ConnectionPool.check_connection,
+                    open=False,
+                )
+                # Abre já com as conexões mínimas prontas
+                pool.open(wait=True)
+                _pools[self.alias] = pool
+            return _pools[self.alias]
+
+    def get_new_connection(self, conn_params):
+        isolation_level = self.settings_dict['OPTIONS'].get('isolation_level')
+        try:
+            connection = self.pool.getconn()
+        except PoolTimeout as exc:
+            raise self.Database.OperationalError(f"Pool de conexões esgotado: {exc}") from exc
+
+        if isolation_level is None:
+            self.isolation_level = IsolationLevel.READ_COMMITTED
+        else:
+            self.isolation_level = IsolationLevel(isolation_level)
+            connection.isolation_level = self.isolation_level
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            # Devolve ao pool, que desfaz transações pendentes antes de reutilizar
+            with self.wrap_database_errors:
+                self.pool.putconn(self.connection)
+
+    def pool_stats(self):
+        """Contadores do pool deste processo, com espera média e saturação"""
+        pool = _pools.get(self.alias)
+        if pool is None:
+            return None
+        stats = pool.get_stats()
+        requests = stats.get('requests_num', 0)
+        in_use = stats.get('pool_size', 0) - stats.get('pool_available', 0)
+        return {
+            **stats,
+            'in_use': in_use,
+            'saturation': round(in_use / pool.max_size, 4),
+            'avg_wait_ms': round(stats.get('requests_wait_ms', 0) / requests, 3) if requests else None,
+        }
@@ -45,6 +45,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Só ativo com ACCOUNTS_PROFILING_ENABLED (ver accounts/profiling.py)
+    'accounts.profiling.ProfilingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -79,17 +81,63 @@ WSGI_APPLICATION = 'backend.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# Por padrão as conexões são persistentes: reaproveitadas por até
+# DB_CONN_MAX_AGE segundos e verificadas antes do reuso. No modo ASGI cada
+# requisição roda em uma thread diferente e as conexões persistentes se
+# acumulariam, então lá o padrão é fechar ao final. Com DB_POOL_ENABLED cada
+# processo mantém um pool de conexões (backend/postgresql_pool) e as devolve
+# ao pool no fim de cada requisição.
+DB_POOL_ENABLED = config('DB_POOL_ENABLED', default=False, cast=bool)
+SERVER_MODE = config('SERVER_MODE', default='wsgi')
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'backend.postgresql_pool' if DB_POOL_ENABLED else 'django.db.backends.postgresql',
         'NAME': 'finance_personal',
         'USER': 'admin',
         'PASSWORD': 'admin',
         'HOST': config('DB_HOST', default='db'),
         'PORT': '5432',
+        'CONN_MAX_AGE': 0 if DB_POOL_ENABLED else config('DB_CONN_MAX_AGE', default=0 if SERVER_MODE == 'asgi' else 60, cast=int),
+        'CONN_HEALTH_CHECKS': config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool),
+        'OPTIONS': {
+            'min_size': config('DB_POOL_MIN_SIZE', default=2, cast=int),
+            'max_size': config('DB_POOL_MAX_SIZE', default=10, cast=int),
+            'timeout': config('DB_POOL_TIMEOUT', default=10, cast=float),
+        } if DB_POOL_ENABLED else {},
+    }
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# Com vários processos de aplicação use um backend compartilhado, por exemplo
+# CACHE_BACKEND=django.core.cache.backends.filebased.FileBasedCache e
+# CACHE_LOCATION=/tmp/finance-personal-cache (padrão da imagem do backend)
+
+CACHE_BACKEND = config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache')
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': config('CACHE_LOCATION', default='finance-personal'),
     }
 }
 
+# Backends em memória de cada processo: com vários workers do Gunicorn cada
+# um só veria as próprias invalidações e serviria respostas antigas
+PROCESS_LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+# Cache das respostas de leitura da API de contas (ver accounts/cache.py);
+# por padrão só fica ligado com um backend compartilhado entre processos
+ACCOUNTS_CACHE_ENABLED = config(
+    'ACCOUNTS_CACHE_ENABLED', default=CACHE_BACKEND not in PROCESS_LOCAL_CACHE_BACKENDS, cast=bool,
+)
+ACCOUNTS_CACHE_ALIAS = 'default'
+ACCOUNTS_CACHE_TIMEOUT = config('ACCOUNTS_CACHE_TIMEOUT', default=300, cast=int)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -137,7 +185,12 @@ AUTH_USER_MODEL = 'accounts.User'
 
 # REST Framework settings
 REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': (
+        'accounts.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
     'DEFAULT_AUTHENTICATION_CLASSES': (
+        'accounts.authentication.JWTAuthentication',
         'rest_framework.authentication.SessionAuthentication',
         'rest_framework.authentication.BasicAuthentication',
     ),
@@ -146,6 +199,26 @@ REST_FRAMEWORK = {
     ),
 }
 
+# Perfil das requisições (Server-Timing e percentis por endpoint)
+ACCOUNTS_PROFILING_ENABLED = config('ACCOUNTS_PROFILING_ENABLED', default=False, cast=bool)
+ACCOUNTS_PROFILING_BUFFER_SIZE = config('ACCOUNTS_PROFILING_BUFFER_SIZE', default=5000, cast=int)
+
+# Tokens JWT da API (ver accounts/tokens.py). JWT_SIGNING_KEYS aceita pares
+# "id:segredo" separados por vírgula: o primeiro assina os novos tokens e os
+# demais continuam válidos para verificação durante a rotação de chaves.
+JWT_SIGNING_KEYS = config('JWT_SIGNING_KEYS', default=f'default:{SECRET_KEY}')
+JWT_ACCESS_TOKEN_LIFETIME = config('JWT_ACCESS_TOKEN_LIFETIME', default=15 * 60, cast=int)
+JWT_REFRESH_TOKEN_LIFETIME = config('JWT_REFRESH_TOKEN_LIFETIME', default=7 * 24 * 60 * 60, cast=int)
+JWT_REVOCATION_REFRESH_INTERVAL = config('JWT_REVOCATION_REFRESH_INTERVAL', default=30, cast=int)
+
+# Views assíncronas das leituras frequentes (accounts/async_views.py); ligadas
+# por padrão quando o servidor roda em modo ASGI (ver gunicorn.conf.py)
+ACCOUNTS_ASYNC_VIEWS = config('ACCOUNTS_ASYNC_VIEWS', default=SERVER_MODE == 'asgi', cast=bool)
+
+# Paginação por cursor da listagem de transações
+TRANSACTIONS_PAGE_SIZE = config('TRANSACTIONS_PAGE_SIZE', default=200, cast=int)
+TRANSACTIONS_MAX_PAGE_SIZE = config('TRANSACTIONS_MAX_PAGE_SIZE', default=1000, cast=int)
+
 # CORS settings
 CORS_ALLOWED_ORIGINS = config('CORS_ALLOWED_ORIGINS', default='http://localhost:3000,http://frontend:3000').split(',')
 CORS_ALLOW_CREDENTIALS = True
@@ -15,9 +15,14 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
+from django.contrib.staticfiles.urls import staticfiles_urlpatterns
 from django.urls import path, include
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/accounts/', include('accounts.urls')),
 ]
+
+# Arquivos estáticos do admin servidos pelo Django em desenvolvimento,
+# já que o Gunicorn não os serve (sem efeito com DEBUG=False)
+urlpatterns += staticfiles_urlpatterns()
@@ -0,0 +1,406 @@
+#!/usr/bin/env python
+"""
+Mede todos os endpoints de ``accounts/urls.py`` com o cliente de testes do Django.
+
+Para cada tamanho de dados cria um banco de testes novo, gera os dados com
+``accounts.seeding`` (mesma semente em todas as execuções) e repete cada
+requisição ``--repeat`` vezes, guardando mediana, p95, mínimo e quantidade
+de consultas SQL. O resultado vai para um JSON com o commit atual, para
+comparar execuções:
+
+    python benchmarks/api_benchmark.py --sizes 1000,10000,100000
+    python benchmarks/api_benchmark.py --compare benchmarks/results/<commit anterior>.json
+
+Os tamanhos são transações por usuário medido; ``--users`` usuários extras
+com o mesmo volume completam a tabela. O cache de respostas fica desligado,
+a menos que se use ``--cache``.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import date, datetime, timezone as dt_timezone
+from decimal import Decimal
+
+import django
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+
+YEARS = 2
+MONTHS = YEARS * 12
+# Despesas por mês são o grosso do volume; receitas somam cerca de 2 por mês
+INCOMES_PER_MONTH = 2
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'desconhecido'
+
+
+class Context:
+    """Usuários, tokens e ids usados para montar as requisições"""
+
+    def __init__(self, user, admin):
+        from accounts.models import BankAccount, BankTransaction, CategoryGroup, Job, RecurringTransaction
+        from accounts.tokens import issue_tokens
+
+        self.user = user
+        self.admin = admin
+        self.issue_tokens = issue_tokens
+        self.access = issue_tokens(user)['access']
+        self.admin_access = issue_tokens(admin)['access']
+        self.account = BankAccount.objects.filter(user=user).order_by('pk').first()
+        self.expense = CategoryGroup.objects.filter(user=user, transaction_type='expense').order_by('pk').first()
+        self.transaction = BankTransaction.objects.filter(user=user).order_by('-transaction_date', '-pk').first()
+        self.month_year = self.transaction.transaction_date.strftime('%Y-%m')
+        self.investment, self.contribution, self.yield_event = self.create_investment(user)
+        self.job = Job.objects.create(user=user, kind='rebuild_ledger', payload={'user_id': user.pk})
+        # Recorrência que ainda não venceu: as medidas não geram transações
+        start = date(date.today().year + 1, 1, 5)
+        self.recurring = RecurringTransaction.objects.create(
+            user=user, bank_account=self.account, category_group=self.expense, transaction_type='expense',
+            amount=Decimal('89.90'), description='Assinatura benchmark', frequency='monthly',
+            start_date=start, next_run=start,
+        )
+
+    @staticmethod
+    def create_investment(user):
+        """Investimento com cinco anos de aportes e rendimentos mensais"""
+        from accounts.models import Contribution, Investment, YieldEvent
+
+        investment = Investment.objects.create(
+            user=user, name='Benchmark', initial_value=Decimal('1000.00'), purchase_date=date(2021, 1, 1),
+        )
+        months = [date(2021 + month // 12, month % 12 + 1, 10) for month in range(60)]
+        Contribution.objects.bulk_create([
+            Contribution(investment=investment, amount=Decimal('500.00'), contribution_date=day) for day in months
+        ])
+        YieldEvent.objects.bulk_create([
+            YieldEvent(investment=investment, percentage=Decimal('0.8'), event_date=day) for day in months
+        ])
+        return investment, investment.contributions.first(), investment.yield_events.first()
+
+    def transaction_data(self, number):
+        transaction = self.transaction
+        return {
+            'bank_account': transaction.bank_account_id,
+            'category_group': transaction.category_group_id,
+            'transaction_type': transaction.transaction_type,
+            'amount': str(transaction.amount),
+            'description': f'Benchmark {number}',
+            'transaction_date': transaction.transaction_date.isoformat(),
+        }
+
+    def new_account(self, number):
+        from accounts.models import BankAccount
+        return BankAccount.objects.create(user=self.user, name=f'Conta removida {number}')
+
+    def new_transaction(self, number):
+        from accounts.models import BankTransaction
+        return BankTransaction.objects.create(
+            user=self.user, bank_account=self.account, category_group=self.expense, transaction_type='expense',
+            amount=Decimal('12.34'), description=f'Benchmark {number}',
+            transaction_date=self.transaction.transaction_date,
+        )
+
+
+def _csv_upload(ctx, number):
+    from django.core.files.uploadedfile import SimpleUploadedFile
+    lines = ['transaction_date,description,amount']
+    lines += [f'{ctx.month_year}-10,Importação {number}-{line},-{line + 1}.50' for line in range(50)]
+    return SimpleUploadedFile('extrato.csv', '\n'.join(lines).encode())
+
+
+# Cada cenário recebe o contexto e o número da repetição e devolve
+# (método, caminho, dados, formato, token). Leituras primeiro, exclusões por
+# último, para que as escritas afetem o mínimo as medidas seguintes.
+SCENARIOS = {
+    'csrf': lambda ctx, n: ('get', '/api/accounts/csrf/', None, None, None),
+    'profile': lambda ctx, n: ('get', '/api/accounts/profile/', None, None, ctx.access),
+    'users_list': lambda ctx, n: ('get', '/api/accounts/users/', None, None, ctx.admin_access),
+    'manage_user': lambda ctx, n: ('get', f'/api/accounts/users/{ctx.user.pk}/', None, None, ctx.admin_access),
+    'bank_accounts': lambda ctx, n: ('get', '/api/accounts/bank-accounts/', None, None, ctx.access),
+    'bank_account_detail': lambda ctx, n: (
+        'get', f'/api/accounts/bank-accounts/{ctx.account.pk}/', None, None, ctx.access,
+    ),
+    'category_groups': lambda ctx, n: ('get', '/api/accounts/category-groups/', None, None, ctx.access),
+    'category_group_detail': lambda ctx, n: (
+        'get', f'/api/accounts/category-groups/{ctx.expense.pk}/', None, None, ctx.access,
+    ),
+    'transactions': lambda ctx, n: (
+        'get', f'/api/accounts/transactions/?month_year={ctx.month_year}', None, None, ctx.access,
+    ),
+    'transaction_detail': lambda ctx, n: (
+        'get', f'/api/accounts/transactions/{ctx.transaction.pk}/', None, None, ctx.access,
+    ),
+    'recurring_transactions': lambda ctx, n: ('get', '/api/accounts/recurring-transactions/', None, None, ctx.access),
+    'recurring_transaction_detail': lambda ctx, n: (
+        'get', f'/api/accounts/recurring-transactions/{ctx.recurring.pk}/', None, None, ctx.access,
+    ),
+    # Termos das descrições geradas pelo seed, com e sem erro de digitação
+    'transactions_search': lambda ctx, n: (
+        'get', f'/api/accounts/transactions/search/?q={("supermercado", "restaurnte", "combustível")[n % 3]}'
+        '&page_size=50', None, None, ctx.access,
+    ),
+    'transactions_export': lambda ctx, n: (
+        'get', f'/api/accounts/transactions/export/{("csv", "ndjson")[n % 2]}/', None, None, ctx.access,
+    ),
+    'financial_summary': lambda ctx, n: (
+        'get', f'/api/accounts/financial-summary/?month_year={ctx.month_year}', None, None, ctx.access,
+    ),
+    'financial_summary_range': lambda ctx, n: (
+        'get', '/api/accounts/financial-summary/range/', None, None, ctx.access,
+    ),
+    'analytics': lambda ctx, n: (
+        'get', '/api/accounts/analytics/?start=2025-01&end=2025-12'
+        '&group_by=category_group,bank_account,transaction_type,week,month', None, None, ctx.access,
+    ),
+    'dashboard': lambda ctx, n: (
+        'get', f'/api/accounts/dashboard/?month_year={ctx.month_year}', None, None, ctx.access,
+    ),
+    'investments': lambda ctx, n: ('get', '/api/accounts/investments/', None, None, ctx.access),
+    'investment_portfolio': lambda ctx, n: ('get', '/api/accounts/investments/portfolio/', None, None, ctx.access),
+    'investment_detail': lambda ctx, n: (
+        'get', f'/api/accounts/investments/{ctx.investment.pk}/', None, None, ctx.access,
+    ),
+    'investment_contributions': lambda ctx, n: (
+        'get', f'/api/accounts/investments/{ctx.investment.pk}/contributions/', None, None, ctx.access,
+    ),
+    'investment_contribution_detail': lambda ctx, n: (
+        'get', f'/api/accounts/investments/{ctx.investment.pk}/contributions/{ctx.contribution.pk}/',
+        None, None, ctx.access,
+    ),
+    'investment_yields': lambda ctx, n: (
+        'get', f'/api/accounts/investments/{ctx.investment.pk}/yields/', None, None, ctx.access,
+    ),
+    'investment_yield_detail': lambda ctx, n: (
+        'get', f'/api/accounts/investments/{ctx.investment.pk}/yields/{ctx.yield_event.pk}/',
+        None, None, ctx.access,
+    ),
+    'cache_stats': lambda ctx, n: ('get', '/api/accounts/cache-stats/', None, None, ctx.admin_access),
+    'db_stats': lambda ctx, n: ('get', '/api/accounts/db-stats/', None, None, ctx.admin_access),
+    'profiling': lambda ctx, n: ('get', '/api/accounts/profiling/', None, None, ctx.admin_access),
+    'jobs': lambda ctx, n: ('get', '/api/accounts/jobs/', None, None, ctx.access),
+    'job_detail': lambda ctx, n: ('get', f'/api/accounts/jobs/{ctx.job.pk}/', None, None, ctx.access),
+    'login': lambda ctx, n: (
+        'post', '/api/accounts/login/', {'username': ctx.user.username, 'password': 'seed'}, 'json', None,
+    ),
+    'token_refresh': lambda ctx, n: (
+        'post', '/api/accounts/token/refresh/', {'refresh': ctx.issue_tokens(ctx.user)['refresh']}, 'json', None,
+    ),
+    'register': lambda ctx, n: ('post', '/api/accounts/register/', {
+        'username': f'benchmark{n}', 'email': f'benchmark{n}@example.com',
+        'password': 'Benchmark!2024', 'password_confirm': 'Benchmark!2024',
+        'first_name': 'Benchmark', 'last_name': str(n),
+    }, 'json', None),
+    'transactions_batch': lambda ctx, n: ('post', '/api/accounts/transactions/batch/', {
+        'operations': [{'op': 'create', 'data': ctx.transaction_data(n)} for _ in range(50)],
+    }, 'json', ctx.access),
+    'transactions_import': lambda ctx, n: (
+        'post', '/api/accounts/transactions/import/',
+        {'file': _csv_upload(ctx, n), 'bank_account': ctx.account.pk, 'expense_category': ctx.expense.pk},
+        'multipart', ctx.access,
+    ),
+    # Só enfileira: o recálculo roda nos workers
+    'ledger_rebuild': lambda ctx, n: (
+        'post', '/api/accounts/ledger/rebuild/', {'user': ctx.user.pk}, 'json', ctx.admin_access,
+    ),
+    'logout': lambda ctx, n: ('post', '/api/accounts/logout/', {}, 'json', ctx.issue_tokens(ctx.user)['access']),
+}
+
+# Escritas medidas separadamente (mesmo nome de URL, outro método)
+WRITE_SCENARIOS = {
+    'bank_accounts': lambda ctx, n: (
+        'post', '/api/accounts/bank-accounts/', {'name': f'Conta benchmark {n}'}, 'json', ctx.access,
+    ),
+    'category_groups': lambda ctx, n: (
+        'post', '/api/accounts/category-groups/',
+        {'name': f'Categoria benchmark {n}', 'transaction_type': 'expense'}, 'json', ctx.access,
+    ),
+    'transactions': lambda ctx, n: (
+        'post', '/api/accounts/transactions/', ctx.transaction_data(n), 'json', ctx.access,
+    ),
+    'investment_contributions': lambda ctx, n: (
+        'post', f'/api/accounts/investments/{ctx.investment.pk}/contributions/',
+        {'amount': '100.00', 'contribution_date': '2025-06-10'}, 'json', ctx.access,
+    ),
+    'investment_contribution_detail': lambda ctx, n: (
+        'put', f'/api/accounts/investments/{ctx.investment.pk}/contributions/{ctx.contribution.pk}/',
+        {'amount': str(500 + n)}, 'json', ctx.access,
+    ),
+    # Começa no mês das transações medidas: gera as ocorrências até hoje
+    'recurring_transactions': lambda ctx, n: ('post', '/api/accounts/recurring-transactions/', {
+        **ctx.transaction_data(n), 'frequency': 'monthly', 'start_date': f'{ctx.month_year}-05',
+    }, 'json', ctx.access),
+    'transaction_detail': lambda ctx, n: (
+        'put', f'/api/accounts/transactions/{ctx.transaction.pk}/',
+        ctx.transaction_data(n), 'json', ctx.access,
+    ),
+}
+
+DELETE_SCENARIOS = {
+    'bank_account_detail': lambda ctx, n: (
+        'delete', f'/api/accounts/bank-accounts/{ctx.new_account(n).pk}/', None, None, ctx.access,
+    ),
+    'transaction_detail': lambda ctx, n: (
+        'delete', f'/api/accounts/transactions/{ctx.new_transaction(n).pk}/', None, None, ctx.access,
+    ),
+}
+
+
+def check_coverage():
+    """Falha se algum endpoint de accounts/urls.py não tiver cenário"""
+    from accounts.urls import urlpatterns
+    missing = [pattern.name for pattern in urlpatterns if pattern.name not in SCENARIOS]
+    if missing:
+        raise SystemExit(f"Endpoints sem cenário de benchmark: {', '.join(missing)}")
+
+
+def measure(client, ctx, scenario, repeat):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    timings, queries, status_code, path, method = [], 0, None, None, None
+    for number in range(repeat):
+        method, path, data, data_format, token = scenario(ctx, number)
+        client.credentials(**({'HTTP_AUTHORIZATION': f'Bearer {token}'} if token else {}))
+        kwargs = {'data': data, 'format': data_format} if data is not None else {}
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            response = getattr(client, method)(path, **kwargs)
+            if response.streaming:
+                # O corpo só é gerado (e consultado) ao ser lido
+                b''.join(response.streaming_content)
+            timings.append((time.perf_counter() - start) * 1000)
+        queries = len(captured)
+        status_code = response.status_code
+
+    timings.sort()
+    return {
+        'method': method.upper(),
+        'path': path,
+        'status': status_code,
+        'queries': queries,
+        'runs': repeat,
+        'median_ms': round(statistics.median(timings), 3),
+        'p95_ms': round(timings[min(len(timings) - 1, round(len(timings) * 0.95))], 3),
+        'min_ms': round(timings[0], 3),
+    }
+
+
+def run_size(size, args):
+    from django.db import connection
+    from rest_framework.test import APIClient
+
+    from accounts.models import User
+    from accounts.seeding import seed
+
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        per_month = max(0, round(size / MONTHS) - INCOMES_PER_MONTH)
+        start = time.perf_counter()
+        counts = seed(
+            users=args.users + 1, transactions_per_month=per_month, years=YEARS,
+            random_seed=args.seed, today=date(2025, 12, 31),
+        )
+        seed_seconds = time.perf_counter() - start
+
+        user = User.objects.get(username='seed00001')
+        admin = User.objects.create_user('benchmark-admin', password='admin', user_type='admin')
+        ctx = Context(user, admin)
+        client = APIClient()
+
+        results = {}
+        for scenarios, suffix in ((SCENARIOS, ''), (WRITE_SCENARIOS, ':write'), (DELETE_SCENARIOS, ':delete')):
+            for name, scenario in scenarios.items():
+                results[name + suffix] = result = measure(client, ctx, scenario, args.repeat)
+                print(f"  {name + suffix:40} {result['status']} {result['median_ms']:9.2f} ms "
+                      f"(p95 {result['p95_ms']:9.2f}, {result['queries']} consultas)")
+        return {
+            'size': size,
+            'transactions': counts['transactions'],
+            'seed_seconds': round(seed_seconds, 3),
+            'endpoints': results,
+        }
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def compare(current, previous_path):
+    with open(previous_path) as file:
+        previous = json.load(file)
+    previous_sizes = {result['size']: result['endpoints'] for result in previous['results']}
+    print(f"\nComparação com {previous['commit']} (mediana atual / anterior):")
+    for result in current['results']:
+        old = previous_sizes.get(result['size'])
+        if old is None:
+            continue
+        print(f"Tamanho {result['size']}:")
+        for name, measures in result['endpoints'].items():
+            if name in old and old[name]['median_ms']:
+                ratio = measures['median_ms'] / old[name]['median_ms']
+                print(f"  {name:40} {ratio:6.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', default='1000,10000,100000', help='Transações por usuário, separadas por vírgula')
+    parser.add_argument('--users', type=int, default=4, help='Usuários extras com o mesmo volume')
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--cache', action='store_true', help='Mantém o cache de respostas ligado')
+    parser.add_argument('--output', help='Arquivo JSON (padrão: benchmarks/results/<commit>.json)')
+    parser.add_argument('--compare', help='JSON de uma execução anterior para comparar')
+    args = parser.parse_args()
+
+    os.environ['ACCOUNTS_CACHE_ENABLED'] = str(args.cache)
+    django.setup()
+    from django.conf import settings
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+
+    check_coverage()
+    setup_test_environment()
+    # Respostas de erro aparecem no status de cada cenário, não no log
+    logging.getLogger('django.request').setLevel(logging.CRITICAL)
+
+    commit = git_commit()
+    report = {
+        'commit': commit,
+        'created_at': datetime.now(dt_timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'database': connection.vendor,
+        'cache': args.cache,
+        'async_views': settings.ACCOUNTS_ASYNC_VIEWS,
+        'repeat': args.repeat,
+        'seed': args.seed,
+        'results': [],
+    }
+    for size in (int(value) for value in args.sizes.split(',')):
+        print(f"{size} transações por usuário ({args.users + 1} usuários)")
+        report['results'].append(run_size(size, args))
+
+    output = args.output or os.path.join(ROOT, 'benchmarks', 'results', f'{commit}.json')
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w') as file:
+        json.dump(report, file, indent=2)
+    print(f"Resultados gravados em {output}")
+
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+"""
+Compara, no modo ASGI, as views síncronas e as assíncronas das leituras.
+
+Sobe o Gunicorn com workers Uvicorn duas vezes (ACCOUNTS_ASYNC_VIEWS
+desligado e ligado) e mede cada configuração com quantidades crescentes de
+requisições simultâneas, usando o cliente de ``load_test.py``.
+
+    python benchmarks/async_benchmark.py --clients 8,32,64 --workers 2
+"""
+import argparse
+import os
+import signal
+
+from load_test import ENDPOINTS, login, print_result, run_load, spawn_server, wait_until_ready
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--username', default='user')
+    parser.add_argument('--password', default='user')
+    parser.add_argument('--clients', default='8,32,64', help='Requisições simultâneas, separadas por vírgula')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--duration', type=float, default=10, help='Segundos por rodada')
+    parser.add_argument('--port', type=int, default=8766)
+    args = parser.parse_args()
+
+    base_url = f'http://127.0.0.1:{args.port}'
+    # Sem o cache de respostas todas as requisições chegam ao banco
+    os.environ['ACCOUNTS_CACHE_ENABLED'] = 'False'
+    for async_views in ('False', 'True'):
+        os.environ['ACCOUNTS_ASYNC_VIEWS'] = async_views
+        label = 'assíncronas' if async_views == 'True' else 'síncronas'
+        server = spawn_server(args.workers, 'asgi', args.port)
+        try:
+            wait_until_ready(base_url)
+            token = login(base_url, args.username, args.password)
+            for clients in (int(value) for value in args.clients.split(',')):
+                print_result(label, run_load(base_url, token, ENDPOINTS, clients, args.duration))
+        finally:
+            server.send_signal(signal.SIGTERM)
+            server.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+"""
+Compara requisições por segundo com autenticação Basic, Session e JWT.
+
+As requisições são feitas em processo pelo cliente de testes do DRF, sem
+rede, então o número medido é o custo do lado do servidor: hash da senha
+(Basic), leitura da sessão e do usuário (Session) ou só a verificação da
+assinatura (JWT). Usa o banco configurado e um usuário temporário,
+removido ao final.
+
+    python benchmarks/auth_benchmark.py --requests 200
+"""
+import argparse
+import base64
+import os
+import sys
+import time
+import uuid
+
+import django
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+django.setup()
+
+from django.test.utils import override_settings, setup_test_environment
+from rest_framework.test import APIClient
+
+from accounts.models import BankAccount, User
+from accounts.tokens import issue_tokens
+
+
+def measure(client, url, requests, **headers):
+    response = client.get(url, **headers)
+    if response.status_code != 200:
+        raise SystemExit(f"Falha na requisição de aquecimento: {response.status_code}")
+    start = time.perf_counter()
+    for _ in range(requests):
+        client.get(url, **headers)
+    return requests / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--requests', type=int, default=200, help='Requisições por esquema')
+    parser.add_argument('--url', default='/api/accounts/bank-accounts/')
+    args = parser.parse_args()
+
+    setup_test_environment()
+    username = f'bench_{uuid.uuid4().hex[:8]}'
+    password = uuid.uuid4().hex
+    user = User.objects.create_user(username, password=password)
+    BankAccount.objects.create(user=user, name='Conta')
+
+    results = {}
+    try:
+        # Com o cache ligado a view responde sem consultar o banco, então a
+        # diferença entre os esquemas é o custo da autenticação
+        with override_settings(ACCOUNTS_CACHE_ENABLED=True):
+            basic = APIClient()
+            credentials = base64.b64encode(f'{username}:{password}'.encode()).decode()
+            basic.credentials(HTTP_AUTHORIZATION=f'Basic {credentials}')
+            results['Basic'] = measure(basic, args.url, args.requests)
+
+            session = APIClient()
+            session.login(username=username, password=password)
+            results['Session'] = measure(session, args.url, args.requests)
+
+            jwt_client = APIClient()
+            jwt_client.credentials(HTTP_AUTHORIZATION=f"Bearer {issue_tokens(user)['access']}")
+            results['JWT'] = measure(jwt_client, args.url, args.requests)
+    finally:
+        user.delete()
+
+    for scheme, rate in results.items():
+        print(f"{scheme:<8} {rate:>10.1f} req/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,182 @@
+#!/usr/bin/env python
+"""
+Teste de carga dos endpoints de leitura da API.
+
+Cada cliente é um processo com conexão HTTP persistente, autenticado por
+token JWT, que percorre os endpoints em sequência durante ``--duration``
+segundos. O resultado mostra requisições por segundo e latências p50/p95.
+
+Contra um servidor já em execução, variando a quantidade de clientes:
+
+    python benchmarks/load_test.py --url http://localhost:8000 --clients 1,2,4,8
+
+Subindo o Gunicorn local com 1, 2, ... workers (até o número de núcleos),
+para ver a vazão acompanhar os núcleos disponíveis:
+
+    python benchmarks/load_test.py --spawn --mode wsgi
+"""
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import signal
+import subprocess
+import sys
+import time
+from urllib.parse import urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENDPOINTS = (
+    '/api/accounts/bank-accounts/',
+    '/api/accounts/category-groups/',
+    '/api/accounts/transactions/',
+    '/api/accounts/financial-summary/',
+    '/api/accounts/dashboard/',
+)
+
+
+def _connection(base_url):
+    parts = urlsplit(base_url)
+    connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+    return connection_class(parts.hostname, parts.port, timeout=30)
+
+
+def login(base_url, username, password):
+    connection = _connection(base_url)
+    connection.request(
+        'POST', '/api/accounts/login/',
+        body=json.dumps({'username': username, 'password': password}),
+        headers={'Content-Type': 'application/json'},
+    )
+    response = connection.getresponse()
+    body = response.read()
+    if response.status != 200:
+        raise SystemExit(f"Falha no login ({response.status}): {body[:200]!r}")
+    return json.loads(body)['access']
+
+
+def client(base_url, token, endpoints, deadline):
+    """Executa requisições até o prazo; retorna (latências, erros)"""
+    connection = _connection(base_url)
+    headers = {'Authorization': f'Bearer {token}'}
+    latencies, errors = [], 0
+    index = 0
+    while time.monotonic() < deadline:
+        path = endpoints[index % len(endpoints)]
+        index += 1
+        start = time.perf_counter()
+        try:
+            connection.request('GET', path, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            if response.status != 200:
+                errors += 1
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            connection.close()
+            connection = _connection(base_url)
+            continue
+        latencies.append(time.perf_counter() - start)
+    return latencies, errors
+
+
+def run_load(base_url, token, endpoints, clients, duration):
+    deadline = time.monotonic() + duration
+    with multiprocessing.Pool(clients) as pool:
+        results = pool.starmap(client, [(base_url, token, endpoints, deadline)] * clients)
+    latencies = sorted(latency for result, _errors in results for latency in result)
+    errors = sum(errors for _result, errors in results)
+    if not latencies:
+        return {'clients': clients, 'rps': 0.0, 'p50_ms': None, 'p95_ms': None, 'errors': errors}
+    return {
+        'clients': clients,
+        'rps': round(len(latencies) / duration, 1),
+        'p50_ms': round(latencies[len(latencies) // 2] * 1000, 2),
+        'p95_ms': round(latencies[int(len(latencies) * 0.95)] * 1000, 2),
+        'errors': errors,
+    }
+
+
+def wait_until_ready(base_url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            connection = _connection(base_url)
+            connection.request('GET', '/api/accounts/csrf/')
+            connection.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise SystemExit("O servidor não respondeu a tempo")
+
+
+def spawn_server(workers, mode, port):
+    env = dict(
+        os.environ,
+        SERVER_MODE=mode,
+        WEB_CONCURRENCY=str(workers),
+        GUNICORN_BIND=f'127.0.0.1:{port}',
+        GUNICORN_ACCESS_LOG='',
+        GUNICORN_LOG_LEVEL='warning',
+        GUNICORN_RELOAD='False',
+    )
+    return subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py'], cwd=ROOT, env=env,
+    )
+
+
+def print_result(label, result):
+    print(
+        f"{label:<12} clientes={result['clients']:<3} {result['rps']:>9.1f} req/s  "
+        f"p50={result['p50_ms']} ms  p95={result['p95_ms']} ms  erros={result['errors']}"
+    )
+
+
+def worker_counts(cores):
+    counts, count = [], 1
+    while count < cores:
+        counts.append(count)
+        count *= 2
+    return counts + [cores]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--url', default='http://localhost:8000')
+    parser.add_argument('--username', default='user')
+    parser.add_argument('--password', default='user')
+    parser.add_argument('--clients', default='1,2,4,8', help='Quantidades de clientes, separadas por vírgula')
+    parser.add_argument('--duration', type=float, default=10, help='Segundos por rodada')
+    parser.add_argument('--endpoint', action='append', help='Endpoint a exercitar (padrão: leituras principais)')
+    parser.add_argument('--spawn', action='store_true', help='Sobe o Gunicorn local variando os workers')
+    parser.add_argument('--mode', default='wsgi', choices=('wsgi', 'asgi'))
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    endpoints = tuple(args.endpoint or ENDPOINTS)
+
+    if not args.spawn:
+        token = login(args.url, args.username, args.password)
+        for clients in (int(value) for value in args.clients.split(',')):
+            print_result('servidor', run_load(args.url, token, endpoints, clients, args.duration))
+        return
+
+    base_url = f'http://127.0.0.1:{args.port}'
+    cores = multiprocessing.cpu_count()
+    print(f"{cores} núcleos disponíveis, modo {args.mode}")
+    for workers in worker_counts(cores):
+        server = spawn_server(workers, args.mode, args.port)
+        try:
+            wait_until_ready(base_url)
+            token = login(base_url, args.username, args.password)
+            # Dois clientes por worker mantêm todos os workers ocupados
+            print_result(f'workers={workers}', run_load(base_url, token, endpoints, workers * 2, args.duration))
+        finally:
+            server.send_signal(signal.SIGTERM)
+            server.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+"""
+Compara a serialização e renderização da listagem de transações.
+
+Mede, para a mesma lista em memória (sem banco), o caminho antigo
+(BankTransactionSerializer + JSONRenderer) e o atual
+(serialize_transaction_rows + ORJSONRenderer).
+
+    python benchmarks/serializer_benchmark.py --rows 10000
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+import django
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+django.setup()
+
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from accounts.models import BankAccount, BankTransaction, CategoryGroup
+from accounts.renderers import ORJSONRenderer
+from accounts.serializers import BankTransactionSerializer, serialize_transaction_rows
+
+
+def build_data(count):
+    """Instâncias (como o ModelSerializer recebe) e tuplas equivalentes de values_list"""
+    account = BankAccount(id=1, name='Conta Corrente')
+    groups = [
+        CategoryGroup(id=1, name='Salário', transaction_type='income'),
+        CategoryGroup(id=2, name='Mercado', transaction_type='expense'),
+    ]
+    now = timezone.now()
+    instances, rows = [], []
+    for i in range(count):
+        group = groups[i % 2]
+        transaction = BankTransaction(
+            id=i + 1, bank_account=account, category_group=group,
+            transaction_type=group.transaction_type, amount=Decimal(f'{i % 5000}.{i % 100:02d}'),
+            description=f'Transação {i}', transaction_date=date(2024, 1, 1) + timedelta(days=i % 365),
+            created_at=now, updated_at=now,
+        )
+        instances.append(transaction)
+        rows.append((
+            transaction.id, account.id, account.name, group.id, group.name, transaction.transaction_type,
+            transaction.amount, transaction.description, transaction.transaction_date,
+            transaction.created_at, transaction.updated_at,
+        ))
+    return instances, rows
+
+
+def best_of(repeat, func):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    instances, rows = build_data(args.rows)
+    if serialize_transaction_rows(rows) != BankTransactionSerializer(instances, many=True).data:
+        raise SystemExit("As duas serializações produziram resultados diferentes")
+
+    model_serializer = best_of(args.repeat, lambda: JSONRenderer().render(
+        BankTransactionSerializer(instances, many=True).data
+    ))
+    fast_serializer = best_of(args.repeat, lambda: ORJSONRenderer().render(
+        serialize_transaction_rows(rows)
+    ))
+
+    print(f"{args.rows} transações (melhor de {args.repeat})")
+    print(f"ModelSerializer + JSONRenderer:  {model_serializer * 1000:8.1f} ms")
+    print(f"values_list + ORJSONRenderer:    {fast_serializer * 1000:8.1f} ms")
+    print(f"Ganho: {model_serializer / fast_serializer:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -52,34 +52,25 @@ function BankTransactions() {
       setLoading(true);
       console.log('🔄 Iniciando carregamento de dados...');
       
-      // Carregar contas bancárias
-      console.log('🏦 Carregando contas bancárias...');
-      const accountsResponse = await axios.get('/api/accounts/bank-accounts/');
-      console.log('✅ Contas bancárias carregadas:', accountsResponse.data);
-      setBankAccounts(accountsResponse.data);
-      
-      // Carregar grupos de categorias
-      console.log('🏷️ Carregando grupos de categorias...');
-      const groupsResponse = await axios.get('/api/accounts/category-groups/');
-      console.log('✅ Grupos de categorias carregados:', groupsResponse.data);
-      console.log('🔍 Estrutura dos grupos de categoria:', groupsResponse.data.map(g => ({
-        id: g.id,
-        name: g.name,
-        transaction_type: g.transaction_type
-      })));
-      setCategoryGroups(groupsResponse.data);
-      
-      // Carregar transações do mês selecionado
-      console.log('💰 Carregando transações...');
-      const transactionsResponse = await axios.get(`/api/accounts/transactions/?month_year=${selectedMonth}`);
-      console.log('✅ Transações carregadas:', transactionsResponse.data);
-      setTransactions(transactionsResponse.data);
-      
-      // Carregar resumo financeiro
-      console.log('📊 Carregando resumo financeiro...');
-      const summaryResponse = await axios.get(`/api/accounts/financial-summary/?month_year=${selectedMonth}`);
-      console.log('✅ Resumo financeiro carregado:', summaryResponse.data);
-      setFinancialSummary(summaryResponse.data);
+      // Carregar contas, categorias, transações e resumo do mês em uma única requisição
+      console.log('📦 Carregando dados da tela...');
+      const dashboardResponse = await axios.get(`/api/accounts/dashboard/?month_year=${selectedMonth}`);
+      const dashboard = dashboardResponse.data;
+      console.log('✅ Dados da tela carregados:', dashboard);
+      setBankAccounts(dashboard.bank_accounts);
+      setCategoryGroups(dashboard.category_groups);
+      setFinancialSummary(dashboard.financial_summary);
+
+      // A listagem é paginada por cursor: seguir o link "next" até o fim do mês
+      const monthTransactions = [...dashboard.transactions.results];
+      let nextUrl = dashboard.transactions.next;
+      while (nextUrl) {
+        const transactionsResponse = await axios.get(nextUrl);
+        monthTransactions.push(...transactionsResponse.data.results);
+        nextUrl = transactionsResponse.data.next;
+      }
+      console.log('✅ Transações carregadas:', monthTransactions);
+      setTransactions(monthTransactions);
       
       console.log('🎉 Todos os dados foram carregados com sucesso!');
       
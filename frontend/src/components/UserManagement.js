@@ -75,7 +75,7 @@ function UserManagement() {
       try {
         setLoading(true);
         await axios.delete(`/api/accounts/users/${userId}/`);
-        setSuccess('Usuário excluído com sucesso!');
+        setSuccess('Exclusão do usuário agendada!');
         fetchUsers(); // Recarregar lista
       } catch (error) {
         setError('Erro ao excluir usuário');
@@ -0,0 +1,58 @@
+"""
+Configuração do Gunicorn para servir o backend em produção.
+
+    gunicorn -c gunicorn.conf.py
+
+SERVER_MODE escolhe entre WSGI (processos com threads ``gthread`` ou, com
+GUNICORN_THREADS=1, processos ``sync``) e ASGI (um laço de eventos do
+Uvicorn por processo). Para recarregar o código sem derrubar conexões,
+envie SIGHUP ao processo mestre: os workers antigos terminam as requisições
+em andamento antes de sair.
+
+O worker ``sync`` só avisa o mestre que está vivo entre uma requisição e
+outra, então qualquer resposta que leve mais que ``timeout`` segundos, como
+a exportação em streaming de um histórico grande, é cortada no meio com
+WORKER TIMEOUT. No ``gthread`` o aviso vem do laço principal do processo
+enquanto as threads atendem, e ``timeout`` só derruba processos travados;
+por isso ele é o padrão no modo WSGI. Cada thread usa a própria conexão com
+o banco (até WEB_CONCURRENCY × GUNICORN_THREADS conexões).
+"""
+import multiprocessing
+
+# Não importar ``config`` diretamente: o Gunicorn lê como configuração todo
+# nome de módulo igual a um ajuste seu, e ``config`` é um deles
+import decouple
+
+SERVER_MODE = decouple.config('SERVER_MODE', default='wsgi')
+
+if SERVER_MODE == 'asgi':
+    wsgi_app = 'backend.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+    threads = 1
+elif SERVER_MODE == 'wsgi':
+    wsgi_app = 'backend.wsgi:application'
+    threads = decouple.config('GUNICORN_THREADS', default=4, cast=int)
+    worker_class = 'gthread' if threads > 1 else 'sync'
+else:
+    raise ValueError("SERVER_MODE deve ser 'wsgi' ou 'asgi'")
+
+bind = decouple.config('GUNICORN_BIND', default='0.0.0.0:8000')
+
+# Um worker por núcleo mais um, como ponto de partida para cargas com banco
+workers = decouple.config('WEB_CONCURRENCY', default=multiprocessing.cpu_count() + 1, cast=int)
+
+# Reinicia cada worker depois de algumas requisições para conter vazamentos
+max_requests = decouple.config('GUNICORN_MAX_REQUESTS', default=1000, cast=int)
+max_requests_jitter = decouple.config('GUNICORN_MAX_REQUESTS_JITTER', default=100, cast=int)
+
+timeout = decouple.config('GUNICORN_TIMEOUT', default=30, cast=int)
+graceful_timeout = decouple.config('GUNICORN_GRACEFUL_TIMEOUT', default=30, cast=int)
+keepalive = decouple.config('GUNICORN_KEEPALIVE', default=5, cast=int)
+
+# Recarga automática ao alterar o código, só para desenvolvimento
+reload = decouple.config('GUNICORN_RELOAD', default=False, cast=bool)
+
+# Log de acesso na saída padrão; vazio desliga
+accesslog = decouple.config('GUNICORN_ACCESS_LOG', default='-') or None
+errorlog = '-'
+loglevel = decouple.config('GUNICORN_LOG_LEVEL', default='info')